@@ -0,0 +1,132 @@
+import asyncio
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Hashable
+
+from app import metrics
+
+
+# Small in-process cache: entries expire `ttl_seconds` after being loaded and
+# the least recently used one is evicted once `max_entries` is reached. A
+# ttl of 0 turns caching off (every lookup loads).
+class TTLCache:
+    def __init__(self, name: str, max_entries: int, ttl_seconds: float):
+        self.name = name
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: OrderedDict[Hashable, tuple[float, Any]] = OrderedDict()
+        self._lock = threading.Lock()
+        # Bumped by invalidate(), so a load that started before it is not stored.
+        self._generation = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def _lookup(self, key: Hashable) -> tuple[bool, Any]:
+        # Caller holds the lock.
+        entry = self._entries.get(key)
+        if entry is not None:
+            if entry[0] > time.monotonic():
+                self._entries.move_to_end(key)
+                self.hits += 1
+                self._record("hit")
+                return True, entry[1]
+            del self._entries[key]
+            self.expirations += 1
+        return False, None
+
+    def _record(self, result: str) -> None:
+        # Caller holds the lock.
+        metrics.cache_lookups.inc(cache=self.name, result=result)
+        metrics.cache_hit_ratio.set(round(self.hits / (self.hits + self.misses), 4), cache=self.name)
+
+    def _store(self, key: Hashable, value: Any, generation: int) -> None:
+        # Caller holds the lock.
+        if self.ttl_seconds <= 0 or self.max_entries <= 0 or generation != self._generation:
+            return
+        self._entries[key] = (time.monotonic() + self.ttl_seconds, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def get_or_load(self, key: Hashable, load: Callable[[], Any]) -> Any:
+        with self._lock:
+            found, value = self._lookup(key)
+            if found:
+                return value
+            self.misses += 1
+            self._record("miss")
+            generation = self._generation
+        value = load()
+        with self._lock:
+            self._store(key, value, generation)
+        return value
+
+    def invalidate(self, key: Hashable | None = None) -> int:
+        with self._lock:
+            self._generation += 1
+            if key is None:
+                removed = len(self._entries)
+                self._entries.clear()
+                return removed
+            return 1 if self._entries.pop(key, None) is not None else 0
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "name": self.name,
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl_seconds,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": round(self.hits / lookups, 4) if lookups else None,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+            }
+
+
+# TTLCache for coroutines running on one event loop, with single-flight loads:
+# concurrent misses for a key wait on the first caller's load instead of
+# starting their own (counted as `coalesced`). The load runs in its own task,
+# so a caller that is cancelled (a client disconnecting) neither cancels it
+# nor fails the other callers waiting on it.
+class AsyncTTLCache(TTLCache):
+    def __init__(self, name: str, max_entries: int, ttl_seconds: float):
+        super().__init__(name, max_entries, ttl_seconds)
+        self._inflight: dict[Hashable, asyncio.Task] = {}
+        self.coalesced = 0
+
+    async def get_or_load(self, key: Hashable, load: Callable[[], Awaitable[Any]]) -> Any:
+        with self._lock:
+            found, value = self._lookup(key)
+            if found:
+                return value
+            task = self._inflight.get(key)
+            if task is not None:
+                self.coalesced += 1
+                self._record("coalesced")
+            else:
+                self.misses += 1
+                self._record("miss")
+                task = self._inflight[key] = asyncio.ensure_future(self._load(key, load, self._generation))
+                # Marks a failure as retrieved when every caller was cancelled.
+                task.add_done_callback(lambda done: done.cancelled() or done.exception())
+        return await asyncio.shield(task)
+
+    async def _load(self, key: Hashable, load: Callable[[], Awaitable[Any]], generation: int) -> Any:
+        try:
+            value = await load()
+            with self._lock:
+                self._store(key, value, generation)
+            return value
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+
+    def stats(self) -> dict[str, Any]:
+        return {**super().stats(), "coalesced": self.coalesced}
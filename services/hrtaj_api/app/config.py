@@ -27,6 +27,43 @@ class Settings:
     staff_owner_user_id: str = os.getenv("HRTAJ_STAFF_OWNER_USER_ID", "")
     default_currency: str = os.getenv("HRTAJ_DEFAULT_CURRENCY", "EGP")
     default_purpose: str = os.getenv("HRTAJ_DEFAULT_PURPOSE", "sale")
+    supabase_pool_size: int = int(os.getenv("SUPABASE_POOL_SIZE", "20"))
+    supabase_keepalive_seconds: float = float(os.getenv("SUPABASE_KEEPALIVE_SECONDS", "30"))
+    supabase_timeout_seconds: float = float(os.getenv("SUPABASE_TIMEOUT_SECONDS", "30"))
+    supabase_connect_timeout_seconds: float = float(os.getenv("SUPABASE_CONNECT_TIMEOUT_SECONDS", "5"))
+    supabase_http2: bool = os.getenv("SUPABASE_HTTP2", "true").lower() in {"1", "true", "yes"}
+    supabase_page_size: int = int(os.getenv("SUPABASE_PAGE_SIZE", "1000"))
+    import_batch_size: int = int(os.getenv("HRTAJ_IMPORT_BATCH_SIZE", "500"))
+    import_chunk_rows: int = int(os.getenv("HRTAJ_IMPORT_CHUNK_ROWS", "5000"))
+    excel_engine: str = os.getenv("HRTAJ_EXCEL_ENGINE", "openpyxl")
+    header_fuzzy_threshold: float = float(os.getenv("HRTAJ_HEADER_FUZZY_THRESHOLD", "0.85"))
+    import_max_unpacked_mb: int = int(os.getenv("HRTAJ_IMPORT_MAX_UNPACKED_MB", "512"))
+    import_error_samples: int = int(os.getenv("HRTAJ_IMPORT_ERROR_SAMPLES", "20"))
+    import_parallel_workers: int = int(os.getenv("HRTAJ_IMPORT_PARALLEL_WORKERS", "0"))
+    dedup_block_limit: int = int(os.getenv("HRTAJ_DEDUP_BLOCK_LIMIT", "50"))
+    import_duplicate_samples: int = int(os.getenv("HRTAJ_IMPORT_DUPLICATE_SAMPLES", "100"))
+    unit_code_block_size: int = int(os.getenv("HRTAJ_UNIT_CODE_BLOCK_SIZE", "500"))
+    lead_batch_size: int = int(os.getenv("HRTAJ_LEAD_BATCH_SIZE", "500"))
+    candidate_cache_ttl_seconds: float = float(os.getenv("HRTAJ_CANDIDATE_CACHE_TTL_SECONDS", "300"))
+    candidate_cache_max_entries: int = int(os.getenv("HRTAJ_CANDIDATE_CACHE_MAX_ENTRIES", "1024"))
+    assignment_load_max_window_hours: int = int(os.getenv("HRTAJ_ASSIGNMENT_LOAD_MAX_WINDOW_HOURS", "168"))
+    assignment_load_bucket_minutes: int = int(os.getenv("HRTAJ_ASSIGNMENT_LOAD_BUCKET_MINUTES", "5"))
+    assignment_load_reconcile_seconds: float = float(os.getenv("HRTAJ_ASSIGNMENT_LOAD_RECONCILE_SECONDS", "300"))
+    sla_monitor_enabled: bool = os.getenv("HRTAJ_SLA_MONITOR_ENABLED", "true").lower() in {"1", "true", "yes"}
+    sla_monitor_minutes: list[int] = field(
+        default_factory=lambda: [int(value) for value in _parse_csv(os.getenv("HRTAJ_SLA_MONITOR_MINUTES", "90"))]
+    )
+    sla_monitor_interval_seconds: float = float(os.getenv("HRTAJ_SLA_MONITOR_INTERVAL_SECONDS", "60"))
+    sla_monitor_full_scan_seconds: float = float(os.getenv("HRTAJ_SLA_MONITOR_FULL_SCAN_SECONDS", "3600"))
+    lead_score_refresh_enabled: bool = os.getenv("HRTAJ_LEAD_SCORE_REFRESH_ENABLED", "true").lower() in {"1", "true", "yes"}
+    lead_score_refresh_seconds: float = float(os.getenv("HRTAJ_LEAD_SCORE_REFRESH_SECONDS", "300"))
+    report_cache_ttl_seconds: float = float(os.getenv("HRTAJ_REPORT_CACHE_TTL_SECONDS", "60"))
+    report_cache_max_entries: int = int(os.getenv("HRTAJ_REPORT_CACHE_MAX_ENTRIES", "256"))
+    export_page_size: int = int(os.getenv("HRTAJ_EXPORT_PAGE_SIZE", "1000"))
+    metrics_enabled: bool = os.getenv("HRTAJ_METRICS_ENABLED", "true").lower() in {"1", "true", "yes"}
+    import_workers: int = int(os.getenv("HRTAJ_IMPORT_WORKERS", "2"))
+    import_max_pending_jobs: int = int(os.getenv("HRTAJ_IMPORT_MAX_PENDING_JOBS", "20"))
+    import_job_retention_seconds: int = int(os.getenv("HRTAJ_IMPORT_JOB_RETENTION_SECONDS", "3600"))
 
 
 settings = Settings()
@@ -1,18 +1,236 @@
-from supabase import Client, create_client
+import asyncio
+import threading
+import time
+from typing import Any, AsyncIterator, Callable, Iterable, Iterator, TypeVar
+
+import httpx
+from postgrest.utils import SyncClient as PostgrestSyncSession
+from supabase import AsyncClient, AsyncClientOptions, Client, ClientOptions, acreate_client, create_client
 from tenacity import retry, stop_after_attempt, wait_exponential
 
+from app import metrics
 from app.config import settings
 from app.logging import get_logger
 
 logger = get_logger(__name__)
 
+T = TypeVar("T")
 
-def get_service_client() -> Client:
+_client: Client | None = None
+_async_client: AsyncClient | None = None
+_client_lock = threading.Lock()
+_async_client_lock = asyncio.Lock()
+
+
+def _check_credentials() -> None:
     if not settings.supabase_url or not settings.supabase_service_role_key:
         raise RuntimeError("SUPABASE_URL or SUPABASE_SERVICE_ROLE_KEY is missing")
-    return create_client(settings.supabase_url, settings.supabase_service_role_key)
 
 
-@retry(stop=stop_after_attempt(3), wait=wait_exponential(min=0.5, max=2))
+def _timeout() -> httpx.Timeout:
+    return httpx.Timeout(settings.supabase_timeout_seconds, connect=settings.supabase_connect_timeout_seconds)
+
+
+def _limits() -> httpx.Limits:
+    return httpx.Limits(
+        max_connections=settings.supabase_pool_size,
+        max_keepalive_connections=settings.supabase_pool_size,
+        keepalive_expiry=settings.supabase_keepalive_seconds,
+    )
+
+
+def _pooled_session(session: httpx.Client | httpx.AsyncClient, session_cls: type) -> Any:
+    # postgrest-py builds its httpx session without pool limits; swap in one that
+    # keeps the same base URL and auth headers but honours our pool settings.
+    return session_cls(
+        base_url=session.base_url,
+        headers=session.headers,
+        timeout=_timeout(),
+        limits=_limits(),
+        http2=settings.supabase_http2,
+        follow_redirects=True,
+    )
+
+
+def _create_service_client() -> Client:
+    _check_credentials()
+    client = create_client(
+        settings.supabase_url,
+        settings.supabase_service_role_key,
+        ClientOptions(postgrest_client_timeout=_timeout()),
+    )
+    default_session = client.postgrest.session
+    client.postgrest.session = _pooled_session(default_session, PostgrestSyncSession)
+    default_session.close()
+    return client
+
+
+async def _create_async_service_client() -> AsyncClient:
+    _check_credentials()
+    client = await acreate_client(
+        settings.supabase_url,
+        settings.supabase_service_role_key,
+        AsyncClientOptions(postgrest_client_timeout=_timeout()),
+    )
+    default_session = client.postgrest.session
+    client.postgrest.session = _pooled_session(default_session, httpx.AsyncClient)
+    await default_session.aclose()
+    return client
+
+
+def get_service_client() -> Client:
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = _create_service_client()
+    return _client
+
+
+async def get_async_service_client() -> AsyncClient:
+    global _async_client
+    if _async_client is None:
+        async with _async_client_lock:
+            if _async_client is None:
+                _async_client = await _create_async_service_client()
+    return _async_client
+
+
+async def open_clients() -> None:
+    if not settings.supabase_url or not settings.supabase_service_role_key:
+        logger.warning("Supabase credentials missing; database clients not created at startup.")
+        return
+    get_service_client()
+    await get_async_service_client()
+    logger.info("Supabase clients ready (pool_size=%s, http2=%s)", settings.supabase_pool_size, settings.supabase_http2)
+
+
+async def close_clients() -> None:
+    global _client, _async_client
+    with _client_lock:
+        client, _client = _client, None
+    if client is not None:
+        client.postgrest.session.close()
+    async_client, _async_client = _async_client, None
+    if async_client is not None:
+        await async_client.postgrest.session.aclose()
+
+
+@retry(stop=stop_after_attempt(3), wait=wait_exponential(min=0.5, max=2), before_sleep=metrics.record_retry)
 def execute(query):
-    return query.execute()
+    started = time.perf_counter()
+    try:
+        response = query.execute()
+    except Exception as exc:
+        metrics.observe_query(query, time.perf_counter() - started, error=exc)
+        raise
+    metrics.observe_query(query, time.perf_counter() - started, response)
+    return response
+
+
+@retry(stop=stop_after_attempt(3), wait=wait_exponential(min=0.5, max=2), before_sleep=metrics.record_retry)
+async def execute_async(query):
+    started = time.perf_counter()
+    try:
+        response = await query.execute()
+    except Exception as exc:
+        metrics.observe_query(query, time.perf_counter() - started, error=exc)
+        raise
+    metrics.observe_query(query, time.perf_counter() - started, response)
+    return response
+
+
+def chunked(items: Iterable[T], size: int) -> Iterator[list[T]]:
+    batch: list[T] = []
+    for item in items:
+        batch.append(item)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def fetch_all(build_query: Callable[[], Any], page_size: int | None = None) -> list[dict[str, Any]]:
+    size = page_size or settings.supabase_page_size
+    rows: list[dict[str, Any]] = []
+    start = 0
+    while True:
+        page = execute(build_query().range(start, start + size - 1)).data or []
+        rows.extend(page)
+        if len(page) < size:
+            return rows
+        start += size
+
+
+def iter_keyset_pages(
+    build_query: Callable[[], Any], sort_column: str, id_column: str, page_size: int | None = None
+) -> Iterator[list[dict[str, Any]]]:
+    # Pages ordered by (sort_column, id_column) without offsets, so every page
+    # is an index range scan. The keyset is walked as two plain filters (the
+    # rest of the last sort value by id, then greater sort values) since many
+    # rows can share a timestamp after bulk inserts.
+    size = page_size or settings.supabase_page_size
+    position: tuple[Any, Any] | None = None
+    while True:
+        if position is not None:
+            value, last_id = position
+            page = execute(
+                build_query().eq(sort_column, value).gt(id_column, last_id).order(id_column).limit(size)
+            ).data or []
+            if page:
+                yield page
+            if len(page) == size:
+                position = (value, page[-1][id_column])
+                continue
+            query = build_query().gt(sort_column, value)
+        else:
+            query = build_query()
+        page = execute(query.order(sort_column).order(id_column).limit(size)).data or []
+        if page:
+            yield page
+        if len(page) < size:
+            return
+        position = (page[-1][sort_column], page[-1][id_column])
+
+
+async def fetch_all_async(build_query: Callable[[], Any], page_size: int | None = None) -> list[dict[str, Any]]:
+    size = page_size or settings.supabase_page_size
+    rows: list[dict[str, Any]] = []
+    start = 0
+    while True:
+        page = (await execute_async(build_query().range(start, start + size - 1))).data or []
+        rows.extend(page)
+        if len(page) < size:
+            return rows
+        start += size
+
+
+async def iter_keyset_pages_async(
+    build_query: Callable[[], Any], sort_column: str, id_column: str, page_size: int | None = None
+) -> AsyncIterator[list[dict[str, Any]]]:
+    # Same walk as iter_keyset_pages, on the async client.
+    size = page_size or settings.supabase_page_size
+    position: tuple[Any, Any] | None = None
+    while True:
+        if position is not None:
+            value, last_id = position
+            page = (
+                await execute_async(
+                    build_query().eq(sort_column, value).gt(id_column, last_id).order(id_column).limit(size)
+                )
+            ).data or []
+            if page:
+                yield page
+            if len(page) == size:
+                position = (value, page[-1][id_column])
+                continue
+            query = build_query().gt(sort_column, value)
+        else:
+            query = build_query()
+        page = (await execute_async(query.order(sort_column).order(id_column).limit(size))).data or []
+        if page:
+            yield page
+        if len(page) < size:
+            return
+        position = (page[-1][sort_column], page[-1][id_column])
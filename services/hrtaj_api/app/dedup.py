@@ -0,0 +1,105 @@
+from dataclasses import dataclass
+from typing import Any
+
+from app.schemas import DuplicateCandidate
+
+
+@dataclass(frozen=True)
+class _Entry:
+    target: str
+    row: int | None
+    sheet: str | None
+    listing_id: str | None
+    phone: str | None
+    address: str | None
+    price: float | None
+
+
+def _reason(a: _Entry, b: _Entry) -> str | None:
+    same_phone = a.phone is not None and a.phone == b.phone
+    same_address = a.address is not None and a.address == b.address
+    same_price = a.price is not None and a.price == b.price
+    if same_phone and same_address:
+        return "phone_address"
+    if same_phone and same_price:
+        return "phone_price"
+    if same_address and same_price:
+        return "address_price"
+    return None
+
+
+# Blocking-key hash index over normalized phone and (address, price). A row is
+# compared only with entries sharing one of its blocks, capped at `block_limit`
+# recent entries per block, so a whole import is checked in near-linear time.
+# Entries for the listing the row itself writes to are never reported.
+class DuplicateIndex:
+    def __init__(self, block_limit: int = 50):
+        self.block_limit = block_limit
+        self._by_phone: dict[str, list[_Entry]] = {}
+        self._by_address_price: dict[tuple[str, float], list[_Entry]] = {}
+        self._loaded_phones: set[str] = set()
+
+    def unloaded_phones(self, phones: list[str | None]) -> list[str]:
+        fresh = sorted({phone for phone in phones if phone and phone not in self._loaded_phones})
+        self._loaded_phones.update(fresh)
+        return fresh
+
+    def _add(self, entry: _Entry) -> None:
+        if entry.phone:
+            self._by_phone.setdefault(entry.phone, []).append(entry)
+        if entry.address and entry.price is not None:
+            self._by_address_price.setdefault((entry.address, entry.price), []).append(entry)
+
+    def add_existing(self, listing_id: str, phone: str | None, address: str | None, price: Any) -> None:
+        self._add(
+            _Entry(
+                target=listing_id,
+                row=None,
+                sheet=None,
+                listing_id=listing_id,
+                phone=phone,
+                address=address,
+                price=float(price) if price is not None else None,
+            )
+        )
+
+    def check(
+        self,
+        row: int,
+        listing_id: str | None,
+        phone: str | None,
+        address: str | None,
+        price: float | None,
+        sheet: str | None = None,
+    ) -> list[DuplicateCandidate]:
+        target = listing_id or f"row:{sheet}:{row}"
+        entry = _Entry(
+            target=target, row=row, sheet=sheet, listing_id=listing_id, phone=phone, address=address, price=price
+        )
+        blocks = []
+        if phone:
+            blocks.append(self._by_phone.get(phone, []))
+        if address and price is not None:
+            blocks.append(self._by_address_price.get((address, price), []))
+
+        found: list[DuplicateCandidate] = []
+        seen: set[str] = {target}
+        for block in blocks:
+            for other in reversed(block[-self.block_limit :]):
+                if other.target in seen:
+                    continue
+                reason = _reason(entry, other)
+                if reason:
+                    seen.add(other.target)
+                    found.append(
+                        DuplicateCandidate(
+                            row=row,
+                            sheet=sheet,
+                            match_row=other.row,
+                            match_sheet=other.sheet,
+                            listing_id=other.listing_id,
+                            reason=reason,
+                        )
+                    )
+        self._add(entry)
+        return found
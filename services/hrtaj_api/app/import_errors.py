@@ -0,0 +1,122 @@
+from array import array
+from typing import Iterator
+
+import numpy as np
+
+from app.schemas import ImportRowError
+
+
+# Row errors kept column-wise: one array each for row number, field id, message
+# id and sheet id, with field names, messages and sheet names interned, so an
+# error costs 16 bytes instead of a pydantic model. Only the first
+# `sample_limit` errors per field are materialized for the report; the rest
+# stay here for streaming.
+class ImportErrorLog:
+    def __init__(self, sample_limit: int = 20):
+        self.sample_limit = sample_limit
+        self._rows = array("q")
+        self._field_ids = array("H")
+        self._message_ids = array("I")
+        self._sheet_ids = array("H")
+        self._fields: list[str] = []
+        self._messages: list[str] = []
+        self._sheets: list[str | None] = [None]
+        self._field_index: dict[str, int] = {}
+        self._message_index: dict[str, int] = {}
+        self._sheet_index: dict[str | None, int] = {None: 0}
+        self._counts: list[int] = []
+        self._samples: list[int] = []
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    def __iter__(self) -> Iterator[ImportRowError]:
+        return self.iter_errors()
+
+    @staticmethod
+    def _intern(table: list, index: dict, value: str | None) -> int:
+        found = index.get(value)
+        if found is None:
+            found = index[value] = len(table)
+            table.append(value)
+        return found
+
+    def _field_id(self, field: str) -> int:
+        if field not in self._field_index:
+            self._counts.append(0)
+        return self._intern(self._fields, self._field_index, field)
+
+    def _message_id(self, message: str) -> int:
+        return self._intern(self._messages, self._message_index, message)
+
+    def _sheet_id(self, sheet: str | None) -> int:
+        return self._intern(self._sheets, self._sheet_index, sheet)
+
+    def _append(self, rows: np.ndarray, field_ids: np.ndarray, message_ids: np.ndarray, sheet_ids: np.ndarray) -> None:
+        base = len(self._rows)
+        sampled: list[int] = []
+        for field_id in np.unique(field_ids).tolist():
+            hits = np.flatnonzero(field_ids == field_id)
+            room = self.sample_limit - self._counts[field_id]
+            if room > 0:
+                sampled.extend((base + hits[:room]).tolist())
+            self._counts[field_id] += len(hits)
+        self._samples.extend(sorted(sampled))
+        self._rows.extend(rows.tolist())
+        self._field_ids.extend(field_ids.tolist())
+        self._message_ids.extend(message_ids.tolist())
+        self._sheet_ids.extend(sheet_ids.tolist())
+
+    def add(self, row: int, field: str, message: str, sheet: str | None = None) -> None:
+        self._append(
+            np.array([row]),
+            np.array([self._field_id(field)]),
+            np.array([self._message_id(message)]),
+            np.array([self._sheet_id(sheet)]),
+        )
+
+    def add_checks(
+        self, rows: np.ndarray, check_ids: np.ndarray, checks: list[tuple[str, str]], sheet: str | None = None
+    ) -> None:
+        # `check_ids[i]` indexes `checks` for the error on `rows[i]`.
+        field_ids = np.array([self._field_id(field) for field, _ in checks], dtype=np.int64)
+        message_ids = np.array([self._message_id(message) for _, message in checks], dtype=np.int64)
+        self._append(
+            np.asarray(rows, dtype=np.int64),
+            field_ids[check_ids],
+            message_ids[check_ids],
+            np.full(len(check_ids), self._sheet_id(sheet), dtype=np.int64),
+        )
+
+    def merge(self, other: "ImportErrorLog") -> None:
+        if not len(other):
+            return
+        field_ids = np.array([self._field_id(field) for field in other._fields], dtype=np.int64)
+        message_ids = np.array([self._message_id(message) for message in other._messages], dtype=np.int64)
+        sheet_ids = np.array([self._sheet_id(sheet) for sheet in other._sheets], dtype=np.int64)
+        self._append(
+            np.frombuffer(other._rows, dtype=np.int64),
+            field_ids[np.frombuffer(other._field_ids, dtype=np.uint16)],
+            message_ids[np.frombuffer(other._message_ids, dtype=np.uint32)],
+            sheet_ids[np.frombuffer(other._sheet_ids, dtype=np.uint16)],
+        )
+
+    def _error(self, index: int) -> ImportRowError:
+        return ImportRowError(
+            row=self._rows[index],
+            field=self._fields[self._field_ids[index]],
+            message=self._messages[self._message_ids[index]],
+            sheet=self._sheets[self._sheet_ids[index]],
+        )
+
+    def counts(self) -> dict[str, int]:
+        return {field: count for field, count in zip(self._fields, self._counts) if count}
+
+    def samples(self) -> list[ImportRowError]:
+        return [self._error(index) for index in self._samples]
+
+    def iter_errors(self) -> Iterator[ImportRowError]:
+        # Bounded by the size at call time, so a log still being filled by a
+        # running import can be streamed safely.
+        stop = len(self._rows)
+        return (self._error(index) for index in range(stop))
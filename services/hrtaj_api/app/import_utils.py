@@ -1,9 +1,20 @@
+import hashlib
 import io
+import json
+import os
 import re
+import zipfile
 from datetime import datetime
-from typing import Any, Dict, Iterable, Tuple
+from difflib import SequenceMatcher
+from functools import lru_cache
+from typing import Any, BinaryIO, Dict, Iterable, Iterator, Sequence, Tuple
 
+import numpy as np
 import pandas as pd
+from pandas.api.types import is_bool_dtype, is_numeric_dtype
+
+from app.config import settings
+from app.import_errors import ImportErrorLog
 
 
 HEADER_ALIASES: Dict[str, Iterable[str]] = {
@@ -43,36 +54,116 @@ HEADER_ALIASES: Dict[str, Iterable[str]] = {
 }
 
 
+HEADER_SEPARATORS = re.compile(r"[\s\-_()]+")
+HEADER_SYMBOLS = re.compile(r"[^\w\u0600-\u06FF]+")
+# Harakat, superscript alef and tatweel carry no meaning in a column header.
+ARABIC_MARKS = re.compile(r"[\u064B-\u065F\u0670\u0640]")
+ARABIC_LETTERS = str.maketrans(
+    {"أ": "ا", "إ": "ا", "آ": "ا", "ٱ": "ا", "ى": "ي", "ئ": "ي", "ؤ": "و", "ة": "ه"}
+)
+ARABIC_DIGITS = str.maketrans("٠١٢٣٤٥٦٧٨٩۰۱۲۳۴۵۶۷۸۹", "01234567890123456789")
+ADDRESS_NOISE = re.compile(r"[^\w\u0600-\u06FF]+")
+FUZZY_MIN_LENGTH = 4
+
+
 def normalize_header(value: str) -> str:
-    cleaned = re.sub(r"[\s\-_()]+", "", str(value).strip().lower())
-    cleaned = re.sub(r"[^\w\u0600-\u06FF]+", "", cleaned)
+    cleaned = HEADER_SEPARATORS.sub("", str(value).strip().lower())
+    cleaned = ARABIC_MARKS.sub("", cleaned).translate(ARABIC_LETTERS)
+    cleaned = HEADER_SYMBOLS.sub("", cleaned)
     return cleaned
 
 
-def map_headers(columns: Iterable[str]) -> Tuple[dict[str, str], dict[str, str]]:
-    normalized = {normalize_header(col): col for col in columns}
-    mapping: dict[str, str] = {}
-    reverse: dict[str, str] = {}
+def _bigrams(text: str) -> set[str]:
+    return {text[i : i + 2] for i in range(len(text) - 1)}
+
+
+def _compile_header_index() -> tuple[dict[str, tuple[str, int]], dict[str, set[str]]]:
+    index: dict[str, tuple[str, int]] = {}
+    grams: dict[str, set[str]] = {}
     for key, aliases in HEADER_ALIASES.items():
-        for alias in aliases:
+        for priority, alias in enumerate(aliases):
             alias_norm = normalize_header(alias)
-            if alias_norm in normalized:
-                source = normalized[alias_norm]
-                mapping[key] = source
-                reverse[source] = key
-                break
+            index.setdefault(alias_norm, (key, priority))
+            if len(alias_norm) >= FUZZY_MIN_LENGTH:
+                for gram in _bigrams(alias_norm):
+                    grams.setdefault(gram, set()).add(alias_norm)
+    return index, grams
+
+
+HEADER_INDEX, HEADER_GRAMS = _compile_header_index()
+
+
+def _fuzzy_candidates(column_norm: str) -> list[tuple[float, str]]:
+    aliases: set[str] = set()
+    for gram in _bigrams(column_norm):
+        aliases |= HEADER_GRAMS.get(gram, set())
+    scored = [(SequenceMatcher(None, column_norm, alias).ratio(), alias) for alias in aliases]
+    return [(score, alias) for score, alias in scored if score >= settings.header_fuzzy_threshold]
+
+
+@lru_cache(maxsize=256)
+def _match_signature(signature: tuple[Any, ...]) -> tuple[tuple[str, Any, float], ...]:
+    normalized = {normalize_header(col): col for col in signature}
+    best: dict[str, tuple[int, Any]] = {}
+    for column_norm, source in normalized.items():
+        match = HEADER_INDEX.get(column_norm)
+        if match and (match[0] not in best or match[1] < best[match[0]][0]):
+            best[match[0]] = (match[1], source)
+    matches = [(key, best[key][1], 1.0) for key in HEADER_ALIASES if key in best]
+
+    used = {source for _, source, _ in matches}
+    pairs: list[tuple[float, str, Any]] = []
+    for column_norm, source in normalized.items():
+        if source in used or len(column_norm) < FUZZY_MIN_LENGTH:
+            continue
+        for score, alias in _fuzzy_candidates(column_norm):
+            key = HEADER_INDEX[alias][0]
+            if key not in best:
+                pairs.append((score, key, source))
+    for score, key, source in sorted(pairs, key=lambda pair: -pair[0]):
+        if key in best or source in used:
+            continue
+        best[key] = (-1, source)
+        used.add(source)
+        matches.append((key, source, round(score, 3)))
+    return tuple(matches)
+
+
+def match_headers(columns: Iterable[str]) -> tuple[dict[str, str], dict[str, str], dict[str, float]]:
+    mapping: dict[str, str] = {}
+    reverse: dict[str, str] = {}
+    scores: dict[str, float] = {}
+    for key, source, score in _match_signature(tuple(columns)):
+        mapping[key] = source
+        reverse[source] = key
+        scores[key] = score
+    return mapping, reverse, scores
+
+
+def map_headers(columns: Iterable[str]) -> Tuple[dict[str, str], dict[str, str]]:
+    mapping, reverse, _ = match_headers(columns)
     return mapping, reverse
 
 
+def header_cache_info() -> dict[str, int]:
+    info = _match_signature.cache_info()
+    return {"hits": info.hits, "misses": info.misses, "size": info.currsize, "max_size": info.maxsize or 0}
+
+
+TRUE_VALUES = {"1", "true", "yes", "y", "نعم", "صح"}
+FALSE_VALUES = {"0", "false", "no", "n", "لا"}
+BOOL_LOOKUP = {**{value: True for value in TRUE_VALUES}, **{value: False for value in FALSE_VALUES}}
+
+
 def parse_bool(value: Any) -> bool | None:
     if value is None or (isinstance(value, float) and pd.isna(value)):
         return None
     if isinstance(value, bool):
         return value
     text = str(value).strip().lower()
-    if text in {"1", "true", "yes", "y", "نعم", "صح"}:
+    if text in TRUE_VALUES:
         return True
-    if text in {"0", "false", "no", "n", "لا"}:
+    if text in FALSE_VALUES:
         return False
     return None
 
@@ -95,6 +186,13 @@ def parse_float(value: Any) -> float | None:
         return None
 
 
+def normalize_text(value: Any) -> str | None:
+    if value is None or (isinstance(value, float) and pd.isna(value)):
+        return None
+    text = str(value).strip()
+    return text or None
+
+
 def parse_date(value: Any) -> str | None:
     if value is None or (isinstance(value, float) and pd.isna(value)):
         return None
@@ -107,17 +205,460 @@ def parse_date(value: Any) -> str | None:
         return None
 
 
-def read_table(file_bytes: bytes, filename: str) -> pd.DataFrame:
+def _as_stream(source: bytes | BinaryIO | str) -> BinaryIO | str:
+    return io.BytesIO(source) if isinstance(source, (bytes, bytearray)) else source
+
+
+def _header_names(values: Iterable[Any]) -> list[str]:
+    names: list[str] = []
+    seen: dict[str, int] = {}
+    for position, value in enumerate(values):
+        name = f"Unnamed: {position}" if value is None or str(value).strip() == "" else str(value)
+        if name in seen:
+            seen[name] += 1
+            name = f"{name}.{seen[name]}"
+        else:
+            seen[name] = 0
+        names.append(name)
+    return names
+
+
+def _excel_value(value: Any) -> Any:
+    if isinstance(value, float) and value.is_integer():
+        return int(value)
+    if isinstance(value, str) and value == "":
+        return None
+    return value
+
+
+def _object_frame(rows: list[list[Any]], columns: list[str], offset: int) -> pd.DataFrame:
+    return pd.DataFrame(rows, columns=columns, index=pd.RangeIndex(offset, offset + len(rows)), dtype=object)
+
+
+EXCEL_ENGINES = ("openpyxl", "calamine")
+ARROW_SUFFIXES = (".parquet", ".feather", ".arrow", ".ipc")
+TABLE_SUFFIXES = (".csv", ".csv.gz", ".xlsx", ".xls", *ARROW_SUFFIXES)
+
+
+def _iter_worksheet_chunks(rows: Iterator[Sequence[Any]], chunksize: int) -> Iterator[pd.DataFrame]:
+    columns = _header_names(next(rows, ()))
+    width = len(columns)
+    offset = 0
+    batch: list[list[Any]] = []
+    blanks: list[list[Any]] = []
+    for values in rows:
+        row = [_excel_value(value) for value in values[:width]]
+        row.extend([None] * (width - len(row)))
+        # Trailing blank rows are dropped (as pd.read_excel does); blank rows
+        # between data rows are kept so row numbers still match the sheet.
+        if all(value is None for value in row):
+            blanks.append(row)
+            continue
+        for pending in [*blanks, row]:
+            batch.append(pending)
+            if len(batch) >= chunksize:
+                yield _object_frame(batch, columns, offset)
+                offset += len(batch)
+                batch = []
+        blanks = []
+    if batch or offset == 0:
+        yield _object_frame(batch, columns, offset)
+
+
+def excel_engine(engine: str | None) -> str:
+    resolved = (engine or settings.excel_engine).lower()
+    if resolved not in EXCEL_ENGINES:
+        raise ValueError(f"Unsupported Excel engine {resolved!r}. Use one of: {', '.join(EXCEL_ENGINES)}.")
+    return resolved
+
+
+def _calamine_rows(sheet) -> Iterator[Sequence[Any]]:
+    # Calamine rows start at the first used column; pad back to column A so
+    # header positions match what openpyxl reports.
+    first_col = sheet.start[1] if sheet.start else 0
+    for values in sheet.iter_rows():
+        yield [None] * first_col + values if first_col else values
+
+
+def _iter_calamine_chunks(
+    stream: BinaryIO | str, chunksize: int, sheets: list[str] | None
+) -> Iterator[tuple[str | None, pd.DataFrame]]:
+    from python_calamine import CalamineWorkbook
+
+    workbook = CalamineWorkbook.from_path(stream) if isinstance(stream, str) else CalamineWorkbook.from_filelike(stream)
+    try:
+        targets = [(None, workbook.sheet_names[0])] if sheets is None else [(name, name) for name in sheets]
+        for name, sheet_name in targets:
+            for df in _iter_worksheet_chunks(_calamine_rows(workbook.get_sheet_by_name(sheet_name)), chunksize):
+                yield name, df
+    finally:
+        workbook.close()
+
+
+def _iter_xlsx_chunks(
+    stream: BinaryIO | str, chunksize: int, sheets: list[str] | None
+) -> Iterator[tuple[str | None, pd.DataFrame]]:
+    from openpyxl import load_workbook
+
+    workbook = load_workbook(stream, read_only=True, data_only=True)
+    try:
+        if sheets is None:
+            targets = [(None, workbook.worksheets[0])]
+        else:
+            targets = [(name, workbook[name]) for name in sheets]
+        for name, worksheet in targets:
+            for df in _iter_worksheet_chunks(worksheet.iter_rows(values_only=True), chunksize):
+                yield name, df
+    finally:
+        workbook.close()
+
+
+def _arrow_input(source: bytes | BinaryIO | str):
+    import pyarrow as pa
+
+    # Spooled uploads on disk are memory-mapped, so Arrow columns are read in
+    # place instead of being copied into the heap first.
+    path = source if isinstance(source, str) else getattr(source, "name", None)
+    if isinstance(path, str) and os.path.isfile(path):
+        return pa.memory_map(path, "r")
+    data = source if isinstance(source, (bytes, bytearray)) else source.read()
+    return pa.BufferReader(data)
+
+
+def _iter_arrow_chunks(source: bytes | BinaryIO | str, lower: str, chunksize: int) -> Iterator[pd.DataFrame]:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    handle = _arrow_input(source)
+    try:
+        if lower.endswith(".parquet"):
+            parquet = pq.ParquetFile(handle)
+            names = parquet.schema_arrow.names
+            batches = parquet.iter_batches(batch_size=chunksize)
+        else:
+            try:
+                table = pa.ipc.open_file(handle).read_all()
+            except pa.ArrowInvalid:
+                handle.seek(0)
+                table = pa.ipc.open_stream(handle).read_all()
+            names = table.schema.names
+            batches = iter(table.to_batches(max_chunksize=chunksize))
+        columns = _header_names(names)
+        offset = 0
+        for batch in batches:
+            df = batch.to_pandas()
+            df.columns = columns
+            df.index = pd.RangeIndex(offset, offset + len(df.index))
+            offset += len(df.index)
+            yield df
+        if offset == 0:
+            yield _object_frame([], columns, 0)
+    finally:
+        handle.close()
+
+
+def list_sheets(source: bytes | BinaryIO | str, filename: str, engine: str | None = None) -> list[str]:
+    stream = _as_stream(source)
+    lower = filename.lower()
+    try:
+        if lower.endswith((".xlsx", ".xls")) and excel_engine(engine) == "calamine":
+            from python_calamine import CalamineWorkbook
+
+            opener = CalamineWorkbook.from_path if isinstance(stream, str) else CalamineWorkbook.from_filelike
+            workbook = opener(stream)
+            try:
+                return list(workbook.sheet_names)
+            finally:
+                workbook.close()
+        if lower.endswith(".xlsx"):
+            from openpyxl import load_workbook
+
+            workbook = load_workbook(stream, read_only=True)
+            try:
+                return list(workbook.sheetnames)
+            finally:
+                workbook.close()
+        if lower.endswith(".xls"):
+            return [str(name) for name in pd.ExcelFile(stream).sheet_names]
+        return []
+    finally:
+        if hasattr(stream, "seek"):
+            stream.seek(0)
+
+
+def iter_sheet_chunks(
+    source: bytes | BinaryIO | str,
+    filename: str,
+    chunksize: int,
+    sheets: list[str] | None = None,
+    engine: str | None = None,
+) -> Iterator[tuple[str | None, pd.DataFrame]]:
+    # Yields (sheet, frame) pairs of at most `chunksize` rows whose index
+    # continues across the chunks of a sheet, so `index + 2` is always the
+    # spreadsheet row number. Without `sheets` only the first sheet is read and
+    # reported as None. CSV cells are read as text so a column's type never
+    # depends on where a chunk boundary falls; Parquet and Arrow keep their
+    # column types.
+    stream = _as_stream(source)
     lower = filename.lower()
-    if lower.endswith(".csv"):
-        return pd.read_csv(io.BytesIO(file_bytes))
-    if lower.endswith(".xlsx") or lower.endswith(".xls"):
-        return pd.read_excel(io.BytesIO(file_bytes))
-    raise ValueError("Unsupported file type. Use CSV or Excel.")
-
-
-def build_row_payload(row: pd.Series, mapping: dict[str, str]) -> dict[str, Any]:
-    payload: dict[str, Any] = {}
-    for key, source in mapping.items():
-        payload[key] = row.get(source)
-    return payload
+    if lower.endswith((".csv", ".csv.gz")):
+        compression = "gzip" if lower.endswith(".gz") else None
+        with pd.read_csv(stream, chunksize=chunksize, dtype=str, compression=compression) as reader:
+            for df in reader:
+                yield None, df
+        return
+    if lower.endswith(ARROW_SUFFIXES):
+        for df in _iter_arrow_chunks(stream, lower, chunksize):
+            yield None, df
+        return
+    if lower.endswith((".xlsx", ".xls")) and excel_engine(engine) == "calamine":
+        yield from _iter_calamine_chunks(stream, chunksize, sheets)
+        return
+    if lower.endswith(".xlsx"):
+        yield from _iter_xlsx_chunks(stream, chunksize, sheets)
+        return
+    if lower.endswith(".xls"):
+        frames = pd.read_excel(stream, sheet_name=sheets) if sheets is not None else {None: pd.read_excel(stream)}
+        for name, df in frames.items():
+            for start in range(0, max(len(df.index), 1), chunksize):
+                yield name, df.iloc[start : start + chunksize]
+        return
+    raise ValueError("Unsupported file type. Use CSV, Excel, Parquet, Arrow (Feather) or a zip of them.")
+
+
+def is_archive(filename: str) -> bool:
+    return filename.lower().endswith(".zip")
+
+
+def list_archive_members(source: bytes | BinaryIO | str) -> list[str]:
+    with zipfile.ZipFile(_as_stream(source)) as archive:
+        members = [
+            info
+            for info in archive.infolist()
+            if not info.is_dir()
+            and not info.filename.startswith("__MACOSX/")
+            and not os.path.basename(info.filename).startswith(".")
+            and info.filename.lower().endswith(TABLE_SUFFIXES)
+        ]
+    # Guards against archives that inflate far beyond what was uploaded.
+    unpacked = sum(info.file_size for info in members)
+    if unpacked > settings.import_max_unpacked_mb * 1024 * 1024:
+        raise ValueError(f"Archive unpacks to more than {settings.import_max_unpacked_mb} MB.")
+    if not members:
+        raise ValueError("Archive contains no CSV, Excel, Parquet or Arrow files.")
+    return [info.filename for info in members]
+
+
+def iter_member_chunks(
+    source: bytes | BinaryIO | str,
+    member: str,
+    chunksize: int,
+    all_sheets: bool = False,
+    engine: str | None = None,
+) -> Iterator[tuple[str, pd.DataFrame]]:
+    # Chunks of one archive member, labelled with the member name (and the
+    # sheet, for extra sheets of a workbook) in place of a sheet name.
+    with zipfile.ZipFile(_as_stream(source)) as archive, archive.open(member) as handle:
+        lower = member.lower()
+        data = handle if lower.endswith((".csv", ".csv.gz")) else handle.read()
+        yield from iter_member_data_chunks(data, member, chunksize, all_sheets, engine)
+
+
+def iter_member_data_chunks(
+    data: bytes | BinaryIO,
+    member: str,
+    chunksize: int,
+    all_sheets: bool = False,
+    engine: str | None = None,
+) -> Iterator[tuple[str, pd.DataFrame]]:
+    # Same as iter_member_chunks for a member already read out of the archive.
+    sheets = (list_sheets(data, member, engine) or None) if all_sheets else None
+    for sheet, df in iter_sheet_chunks(data, member, chunksize, sheets, engine):
+        yield (member if sheet is None else f"{member}:{sheet}"), df
+
+
+def read_archive_member(source: bytes | BinaryIO | str, member: str) -> bytes:
+    with zipfile.ZipFile(_as_stream(source)) as archive:
+        return archive.read(member)
+
+
+def iter_source_chunks(
+    source: bytes | BinaryIO | str,
+    filename: str,
+    chunksize: int,
+    all_sheets: bool = False,
+    engine: str | None = None,
+) -> Iterator[tuple[str | None, pd.DataFrame]]:
+    if is_archive(filename):
+        for member in list_archive_members(source):
+            yield from iter_member_chunks(source, member, chunksize, all_sheets, engine)
+        return
+    sheets = list_sheets(source, filename, engine) if all_sheets else []
+    yield from iter_sheet_chunks(source, filename, chunksize, sheets or None, engine)
+
+
+def iter_table_chunks(
+    source: bytes | BinaryIO | str, filename: str, chunksize: int, engine: str | None = None
+) -> Iterator[pd.DataFrame]:
+    for _, df in iter_sheet_chunks(source, filename, chunksize, engine=engine):
+        yield df
+
+
+def file_sha256(source: bytes | BinaryIO) -> str:
+    if isinstance(source, (bytes, bytearray)):
+        return hashlib.sha256(source).hexdigest()
+    source.seek(0)
+    digest = hashlib.file_digest(source, "sha256").hexdigest()
+    source.seek(0)
+    return digest
+
+
+def payload_fingerprint(*payloads: dict[str, Any]) -> str:
+    encoded = json.dumps(payloads, sort_keys=True, default=str, ensure_ascii=False, separators=(",", ":"))
+    return hashlib.blake2b(encoded.encode("utf-8"), digest_size=16).hexdigest()
+
+
+def source_path(source: bytes | BinaryIO | str) -> str | None:
+    # The path of the file on disk behind `source`, if there is one.
+    if isinstance(source, str):
+        return source
+    name = getattr(source, "name", None)
+    return name if isinstance(name, str) and os.path.isfile(name) else None
+
+
+def worker_source(source: bytes | BinaryIO | str) -> bytes | str:
+    # Something a child process can reopen: the path of a file on disk when the
+    # upload was spooled to one, otherwise its bytes.
+    if isinstance(source, bytes):
+        return source
+    path = source_path(source)
+    if path is not None:
+        return path
+    source.seek(0)
+    data = source.read()
+    source.seek(0)
+    return data
+
+
+# Column-wise counterparts of the scalar parsers above. Each returns an object
+# ndarray holding exactly what the scalar helper would return for every cell,
+# so callers can swap `df.iterrows()` for whole-column coercion.
+
+
+def coerce_text(series: pd.Series) -> np.ndarray:
+    text = series.astype(str).str.strip()
+    keep = series.notna() & (text != "")
+    return text.where(keep, None).to_numpy(dtype=object)
+
+
+def coerce_float(series: pd.Series) -> np.ndarray:
+    null = series.isna().to_numpy()
+    if is_numeric_dtype(series) and not is_bool_dtype(series):
+        values = series.to_numpy(dtype=float)
+        retry = np.zeros(len(series), dtype=bool)
+    else:
+        cleaned = series.astype(str).str.replace(",", "", regex=False)
+        values = pd.to_numeric(cleaned, errors="coerce").to_numpy(dtype=float)
+        retry = np.isnan(values) & ~null
+    out = values.astype(object)
+    out[null] = None
+    for pos in np.flatnonzero(retry):
+        out[pos] = parse_float(series.iat[pos])
+    return out
+
+
+def coerce_int(series: pd.Series) -> np.ndarray:
+    floats = coerce_float(series)
+    present = ~np.equal(floats, None)
+    values = np.where(present, floats, 0.0).astype(float)
+    exact = present & np.isfinite(values) & (np.abs(values) < 2**62)
+    out = np.full(len(series), None, dtype=object)
+    out[exact] = np.trunc(values[exact]).astype(np.int64).astype(object)
+    for pos in np.flatnonzero(present & ~exact):
+        out[pos] = parse_int(series.iat[pos])
+    return out
+
+
+def coerce_bool(series: pd.Series) -> np.ndarray:
+    text = series.astype(str).str.strip().str.lower()
+    mapped = text.map(BOOL_LOOKUP)
+    out = mapped.astype(object).where(mapped.notna() & series.notna(), None).to_numpy(dtype=object)
+    return out
+
+
+def coerce_date(series: pd.Series) -> np.ndarray:
+    # Intake sheets repeat a handful of dates, so parse each distinct value once.
+    codes, uniques = pd.factorize(series, use_na_sentinel=True)
+    parsed = np.array([parse_date(value) for value in uniques] + [None], dtype=object)
+    return parsed[codes]
+
+
+COERCERS = {
+    "text": coerce_text,
+    "float": coerce_float,
+    "int": coerce_int,
+    "bool": coerce_bool,
+    "date": coerce_date,
+}
+
+
+def transform_columns(df: pd.DataFrame, mapping: dict[str, str], kinds: dict[str, str]) -> dict[str, np.ndarray]:
+    columns: dict[str, np.ndarray] = {}
+    for key, kind in kinds.items():
+        source = mapping.get(key)
+        if source is None:
+            columns[key] = np.full(len(df.index), None, dtype=object)
+        else:
+            columns[key] = COERCERS[kind](df[source])
+    return columns
+
+
+def _json_safe(series: pd.Series) -> list[Any]:
+    # Missing cells become None rather than NaN, which is not valid JSON.
+    return series.astype(object).where(series.notna(), None).tolist()
+
+
+def row_records(df: pd.DataFrame, mapping: dict[str, str]) -> list[dict[str, Any]]:
+    keys = list(mapping.keys())
+    values = [_json_safe(df[mapping[key]]) for key in keys]
+    return [dict(zip(keys, row)) for row in zip(*values)] if keys else [{} for _ in range(len(df.index))]
+
+
+def is_missing(values: np.ndarray) -> np.ndarray:
+    return np.equal(values, None)
+
+
+def collect_row_errors(
+    row_numbers: np.ndarray, checks: list[tuple[str, np.ndarray, str]], sheet: str | None = None
+) -> tuple[np.ndarray, ImportErrorLog]:
+    errors = ImportErrorLog()
+    if not checks:
+        return np.zeros(len(row_numbers), dtype=bool), errors
+    masks = np.vstack([mask for _, mask, _ in checks])
+    # Transposed so errors come out row by row, in check order within a row.
+    positions, check_ids = np.nonzero(masks.T)
+    errors.add_checks(row_numbers[positions], check_ids, [(field, message) for field, _, message in checks], sheet)
+    return masks.any(axis=0), errors
+
+
+def coerce_phone_e164(values: np.ndarray) -> np.ndarray:
+    # Same rules as normalizeEgyptPhone in src/lib/phone.ts, which fills
+    # leads.phone_e164 on the web side.
+    series = pd.Series(values, dtype=object)
+    present = series.notna()
+    digits = series.where(present, "").astype(str).str.strip().str.translate(ARABIC_DIGITS)
+    digits = digits.str.replace(r"[^\d+]", "", regex=True).str.replace(r"^\+", "", regex=True)
+    digits = digits.str.replace(r"^00", "", regex=True)
+    local = digits.str.startswith("0")
+    digits = digits.where(~local, "20" + digits.str[1:])
+    digits = digits.where(local | (digits.str.len() != 10), "20" + digits)
+    valid = present & (digits.str.len() >= 11)
+    return ("+" + digits).where(valid, None).to_numpy(dtype=object)
+
+
+def normalize_address(value: Any) -> str | None:
+    text = normalize_text(value)
+    if not text:
+        return None
+    text = ARABIC_MARKS.sub("", text.lower()).translate(ARABIC_LETTERS).translate(ARABIC_DIGITS)
+    return " ".join(ADDRESS_NOISE.sub(" ", text).split()) or None
@@ -0,0 +1,229 @@
+import bisect
+import math
+import threading
+import time
+from typing import Any, Iterable
+
+from starlette.routing import Match
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+IMPORT_BUCKETS = (0.5, 1.0, 5.0, 15.0, 30.0, 60.0, 120.0, 300.0, 600.0, 1800.0)
+
+
+# Minimal Prometheus-style metrics kept in process memory and rendered in the
+# text exposition format. Each metric holds one value per label combination;
+# label values are passed as keyword arguments in `labelnames` order.
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values: dict[tuple[str, ...], Any] = {}
+        self._lock = threading.Lock()
+        registry.append(self)
+
+    def _key(self, labels: dict[str, Any]) -> tuple[str, ...]:
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def _labels(self, key: tuple[str, ...], extra: tuple[tuple[str, str], ...] = ()) -> str:
+        pairs = [*zip(self.labelnames, key), *extra]
+        if not pairs:
+            return ""
+        return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in pairs) + "}"
+
+    def _samples(self) -> list[str]:
+        with self._lock:
+            return [f"{self.name}{self._labels(key)} {_number(value)}" for key, value in sorted(self._values.items())]
+
+    def render(self) -> list[str]:
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}", *self._samples()]
+
+    def value(self, **labels: Any) -> Any:
+        with self._lock:
+            return self._values.get(self._key(labels))
+
+    def clear(self) -> None:
+        with self._lock:
+            self._values.clear()
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def inc(self, amount: float = 1, **labels: Any) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def set(self, value: float, **labels: Any) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def inc(self, amount: float = 1, **labels: Any) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def dec(self, amount: float = 1, **labels: Any) -> None:
+        self.inc(-amount, **labels)
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = (), buckets=LATENCY_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float, **labels: Any) -> None:
+        key = self._key(labels)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                # Per-bucket (not cumulative) counts, then sum and count.
+                state = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            state[0][bisect.bisect_left(self.buckets, value)] += 1
+            state[1] += value
+            state[2] += 1
+
+    def _samples(self) -> list[str]:
+        lines = []
+        with self._lock:
+            for key, (counts, total, count) in sorted(self._values.items()):
+                cumulative = 0
+                for bound, bucket in zip((*self.buckets, math.inf), counts):
+                    cumulative += bucket
+                    lines.append(f"{self.name}_bucket{self._labels(key, (('le', _number(bound)),))} {cumulative}")
+                lines.append(f"{self.name}_sum{self._labels(key)} {_number(total)}")
+                lines.append(f"{self.name}_count{self._labels(key)} {count}")
+        return lines
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _number(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value)) if abs(value) < 1e15 else repr(value)
+    return repr(value) if isinstance(value, float) else str(value)
+
+
+registry: list[_Metric] = []
+
+http_requests = Counter("hrtaj_http_requests_total", "HTTP requests by route and status code.", ("method", "route", "status"))
+http_request_duration = Histogram(
+    "hrtaj_http_request_duration_seconds", "HTTP request latency until the response body is sent.", ("method", "route")
+)
+http_requests_in_progress = Gauge("hrtaj_http_requests_in_progress", "HTTP requests being handled.", ("method", "route"))
+
+db_queries = Counter("hrtaj_db_queries_total", "Supabase query attempts.", ("table", "operation", "outcome"))
+db_query_duration = Histogram(
+    "hrtaj_db_query_duration_seconds", "Supabase query attempt latency.", ("table", "operation")
+)
+db_query_retries = Counter("hrtaj_db_query_retries_total", "Supabase queries retried after a failure.", ("table", "operation"))
+db_rows_returned = Counter("hrtaj_db_rows_returned_total", "Rows returned by Supabase queries.", ("table", "operation"))
+
+import_rows = Counter("hrtaj_import_rows_total", "Imported rows by outcome.", ("kind", "outcome"))
+import_duration = Histogram("hrtaj_import_duration_seconds", "Import run time.", ("kind",), buckets=IMPORT_BUCKETS)
+import_rows_per_second = Gauge("hrtaj_import_rows_per_second", "Throughput of the last finished import.", ("kind",))
+
+cache_lookups = Counter("hrtaj_cache_lookups_total", "In-process cache lookups by result.", ("cache", "result"))
+cache_hit_ratio = Gauge("hrtaj_cache_hit_ratio", "Share of cache lookups answered from the cache.", ("cache",))
+
+
+def render() -> str:
+    return "\n".join(line for metric in registry for line in metric.render()) + "\n"
+
+
+def query_labels(query: Any) -> tuple[str, str]:
+    # postgrest request builders carry the request path and method; the table
+    # is the path's last segment and RPC calls are reported by function name.
+    path = str(getattr(query, "path", "") or "")
+    method = str(getattr(query, "http_method", "") or "").upper()
+    if path.startswith("/rpc/"):
+        return path.removeprefix("/rpc/"), "rpc"
+    table = path.rsplit("/", 1)[-1] or str(getattr(query, "table", "unknown"))
+    if method == "POST":
+        prefer = str(getattr(query, "headers", {}).get("Prefer", ""))
+        return table, "upsert" if "resolution=" in prefer else "insert"
+    operation = {"GET": "select", "HEAD": "select", "PATCH": "update", "DELETE": "delete"}.get(method)
+    return table, operation or str(getattr(query, "action", "unknown"))
+
+
+def observe_query(query: Any, seconds: float, response: Any = None, error: BaseException | None = None) -> None:
+    table, operation = query_labels(query)
+    db_query_duration.observe(seconds, table=table, operation=operation)
+    db_queries.inc(table=table, operation=operation, outcome="error" if error is not None else "ok")
+    data = getattr(response, "data", None)
+    if isinstance(data, list):
+        db_rows_returned.inc(len(data), table=table, operation=operation)
+    elif data is not None:
+        db_rows_returned.inc(1, table=table, operation=operation)
+
+
+def record_retry(retry_state) -> None:
+    # tenacity before_sleep hook: the query is the wrapped call's first argument.
+    query = retry_state.args[0] if retry_state.args else None
+    table, operation = query_labels(query)
+    db_query_retries.inc(table=table, operation=operation)
+
+
+def record_import(kind: str, rows: dict[str, int], seconds: float) -> None:
+    for outcome, count in rows.items():
+        import_rows.inc(count, kind=kind, outcome=outcome)
+    import_duration.observe(seconds, kind=kind)
+    if seconds > 0:
+        import_rows_per_second.set(round(sum(rows.values()) / seconds, 2), kind=kind)
+
+
+def _route_template(scope) -> str:
+    # The matched route's path template, so /v1/export/leads and
+    # /v1/export/listings share one series; unknown paths share "unmatched".
+    app = scope.get("app")
+    for route in getattr(getattr(app, "router", None), "routes", ()):
+        match, _ = route.matches(scope)
+        if match == Match.FULL:
+            return getattr(route, "path", scope["path"])
+    return "unmatched"
+
+
+class RequestMetricsMiddleware:
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        method = scope["method"]
+        route = _route_template(scope)
+        status = 500
+        started = time.perf_counter()
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        http_requests_in_progress.inc(method=method, route=route)
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            http_requests_in_progress.dec(method=method, route=route)
+            http_request_duration.observe(time.perf_counter() - started, method=method, route=route)
+            http_requests.inc(method=method, route=route, status=status)
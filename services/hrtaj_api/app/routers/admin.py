@@ -0,0 +1,41 @@
+from datetime import date
+
+from fastapi import APIRouter, Depends
+
+from app.db import execute, get_service_client
+from app.schemas import ApiResponse
+from app.security import require_admin_key
+from app.services.lead_scores import lead_score_refresher, refresh_lead_scores
+from app.services.lead_service import candidate_cache, invalidate_candidates
+from app.services.report_service import report_cache
+
+router = APIRouter(dependencies=[Depends(require_admin_key)])
+
+
+@router.get("/cache/stats", response_model=ApiResponse)
+def cache_stats() -> ApiResponse:
+    return ApiResponse(ok=True, data={"caches": [candidate_cache.stats(), report_cache.stats()]})
+
+
+@router.post("/cache/candidates/invalidate", response_model=ApiResponse)
+def invalidate_candidate_cache(developer_id: str | None = None, staff: bool = False) -> ApiResponse:
+    removed = invalidate_candidates(developer_id, staff)
+    return ApiResponse(ok=True, data={"removed": removed, "cache": candidate_cache.stats()})
+
+
+@router.post("/cache/reports/invalidate", response_model=ApiResponse)
+def invalidate_report_cache() -> ApiResponse:
+    return ApiResponse(ok=True, data={"removed": report_cache.invalidate(), "cache": report_cache.stats()})
+
+
+@router.post("/lead-scores/refresh", response_model=ApiResponse)
+def refresh_lead_scores_endpoint() -> ApiResponse:
+    counts = refresh_lead_scores()
+    return ApiResponse(ok=True, data={**counts, "last_scheduled_run": lead_score_refresher.last_run})
+
+
+@router.post("/rollups/leads/rebuild", response_model=ApiResponse)
+def rebuild_lead_rollups(from_day: date | None = None) -> ApiResponse:
+    params = {"from_day": from_day.isoformat() if from_day else None}
+    written = execute(get_service_client().rpc("rebuild_lead_daily_rollups", params)).data
+    return ApiResponse(ok=True, data={"rows": written, "from_day": params["from_day"]})
@@ -0,0 +1,33 @@
+from datetime import datetime, timezone
+
+from fastapi import APIRouter, Depends
+from fastapi.responses import JSONResponse, StreamingResponse
+
+from app.schemas import ApiResponse
+from app.security import require_admin_key
+from app.services.export_service import EXPORT_FORMATS, export_rows
+
+router = APIRouter(dependencies=[Depends(require_admin_key)])
+
+
+@router.get("/{table}", response_model=None)
+def export_table(
+    table: str,
+    format: str = "csv",
+    columns: str | None = None,
+    created_from: datetime | None = None,
+    created_to: datetime | None = None,
+) -> JSONResponse | StreamingResponse:
+    selected = [column.strip() for column in columns.split(",") if column.strip()] if columns else None
+    try:
+        body = export_rows(table, format, selected, created_from, created_to)
+    except ValueError as exc:
+        error = ApiResponse(ok=False, error={"code": "invalid_request", "message": str(exc)})
+        return JSONResponse(status_code=400, content=error.model_dump())
+    stamp = datetime.now(timezone.utc).strftime("%Y%m%d%H%M%S")
+    filename = f"{table}-{stamp}.{format}"
+    return StreamingResponse(
+        body,
+        media_type=EXPORT_FORMATS[format],
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
@@ -1,13 +1,54 @@
 ﻿from fastapi import APIRouter, Depends, File, Form, UploadFile
-from fastapi.responses import Response
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import Response, StreamingResponse
 
-from app.import_utils import HEADER_ALIASES
+from app.import_utils import HEADER_ALIASES, HEADER_INDEX, header_cache_info
 from app.schemas import ApiResponse
 from app.security import require_import_key
+from app.services import import_jobs
 from app.services.import_service import import_projects, import_resale
 
 router = APIRouter(dependencies=[Depends(require_import_key)])
 
+SPOOL_CHUNK_BYTES = 1024 * 1024
+
+
+async def _spool_upload(file: UploadFile) -> str:
+    path = import_jobs.spool_path(file.filename or "upload.csv")
+    with open(path, "wb") as handle:
+        while chunk := await file.read(SPOOL_CHUNK_BYTES):
+            handle.write(chunk)
+    return path
+
+
+async def _run_spooled(runner, file: UploadFile, *args, **kwargs):
+    # Imports read from a file on disk, so process-pool workers reopen it by
+    # path instead of being sent copies of the upload.
+    path = await _spool_upload(file)
+
+    def run():
+        with open(path, "rb") as handle:
+            return runner(handle, file.filename or "upload.csv", *args, **kwargs)
+
+    try:
+        return await run_in_threadpool(run)
+    finally:
+        import_jobs.discard_spool(path)
+
+
+def _job_not_found(job_id: str) -> ApiResponse:
+    return ApiResponse(ok=False, error={"code": "not_found", "message": f"Import job {job_id} not found."})
+
+
+async def _enqueue(kind: str, file: UploadFile, **kwargs) -> ApiResponse:
+    path = await _spool_upload(file)
+    try:
+        job = import_jobs.submit(kind, file.filename or "upload.csv", path, **kwargs)
+    except import_jobs.ImportQueueFull as exc:
+        import_jobs.discard_spool(path)
+        return ApiResponse(ok=False, error={"code": "queue_full", "message": str(exc)})
+    return ApiResponse(ok=True, data=job.model_dump())
+
 
 @router.post("/resale", response_model=ApiResponse)
 async def import_resale_endpoint(
@@ -17,17 +58,25 @@ async def import_resale_endpoint(
     default_city: str | None = Form(default=None),
     default_purpose: str | None = Form(default=None),
     dry_run: bool = Form(default=False),
+    parallel: bool = Form(default=False),
+    force: bool = Form(default=False),
+    excel_engine: str | None = Form(default=None),
 ) -> ApiResponse:
-    content = await file.read()
-    report = import_resale(
-        content,
-        file.filename or "upload.csv",
-        owner_user_id,
-        hr_owner_user_id,
-        default_city,
-        default_purpose,
-        dry_run,
-    )
+    try:
+        report = await _run_spooled(
+            import_resale,
+            file,
+            owner_user_id,
+            hr_owner_user_id,
+            default_city,
+            default_purpose,
+            dry_run,
+            parallel=parallel,
+            force=force,
+            excel_engine=excel_engine,
+        )
+    except ValueError as exc:
+        return ApiResponse(ok=False, error={"code": "invalid_request", "message": str(exc)})
     return ApiResponse(ok=True, data=report.model_dump())
 
 
@@ -37,15 +86,113 @@ async def import_projects_endpoint(
     developer_id: str | None = Form(default=None),
     owner_user_id: str | None = Form(default=None),
     dry_run: bool = Form(default=False),
+    all_sheets: bool = Form(default=False),
+    parallel: bool = Form(default=False),
+    force: bool = Form(default=False),
+    excel_engine: str | None = Form(default=None),
 ) -> ApiResponse:
-    content = await file.read()
     try:
-        report = import_projects(content, file.filename or "upload.csv", developer_id, owner_user_id, dry_run)
+        report = await _run_spooled(
+            import_projects,
+            file,
+            developer_id,
+            owner_user_id,
+            dry_run,
+            all_sheets=all_sheets,
+            parallel=parallel,
+            force=force,
+            excel_engine=excel_engine,
+        )
     except ValueError as exc:
         return ApiResponse(ok=False, error={"code": "invalid_request", "message": str(exc)})
     return ApiResponse(ok=True, data=report.model_dump())
 
 
+@router.post("/jobs/resale", response_model=ApiResponse)
+async def enqueue_resale_job(
+    file: UploadFile = File(...),
+    owner_user_id: str | None = Form(default=None),
+    hr_owner_user_id: str | None = Form(default=None),
+    default_city: str | None = Form(default=None),
+    default_purpose: str | None = Form(default=None),
+    dry_run: bool = Form(default=False),
+    parallel: bool = Form(default=False),
+    force: bool = Form(default=False),
+    excel_engine: str | None = Form(default=None),
+) -> ApiResponse:
+    return await _enqueue(
+        "resale",
+        file,
+        owner_user_id=owner_user_id,
+        hr_owner_user_id=hr_owner_user_id,
+        default_city=default_city,
+        default_purpose=default_purpose,
+        dry_run=dry_run,
+        parallel=parallel,
+        force=force,
+        excel_engine=excel_engine,
+    )
+
+
+@router.post("/jobs/projects", response_model=ApiResponse)
+async def enqueue_projects_job(
+    file: UploadFile = File(...),
+    developer_id: str | None = Form(default=None),
+    owner_user_id: str | None = Form(default=None),
+    dry_run: bool = Form(default=False),
+    all_sheets: bool = Form(default=False),
+    parallel: bool = Form(default=False),
+    force: bool = Form(default=False),
+    excel_engine: str | None = Form(default=None),
+) -> ApiResponse:
+    if not developer_id or not owner_user_id:
+        return ApiResponse(
+            ok=False,
+            error={"code": "invalid_request", "message": "developer_id and owner_user_id are required for project import."},
+        )
+    return await _enqueue(
+        "projects",
+        file,
+        developer_id=developer_id,
+        owner_user_id=owner_user_id,
+        dry_run=dry_run,
+        all_sheets=all_sheets,
+        parallel=parallel,
+        force=force,
+        excel_engine=excel_engine,
+    )
+
+
+@router.get("/jobs", response_model=ApiResponse)
+def list_import_jobs() -> ApiResponse:
+    return ApiResponse(ok=True, data=[job.model_dump() for job in import_jobs.list_jobs()])
+
+
+@router.get("/jobs/{job_id}", response_model=ApiResponse)
+def get_import_job(job_id: str) -> ApiResponse:
+    job = import_jobs.get_job(job_id)
+    if not job:
+        return _job_not_found(job_id)
+    return ApiResponse(ok=True, data=job.model_dump())
+
+
+@router.get("/jobs/{job_id}/errors", response_model=None)
+def stream_import_job_errors(job_id: str) -> ApiResponse | StreamingResponse:
+    errors = import_jobs.get_job_errors(job_id)
+    if errors is None:
+        return _job_not_found(job_id)
+    lines = (error.model_dump_json() + "\n" for error in errors.iter_errors())
+    return StreamingResponse(lines, media_type="application/x-ndjson")
+
+
+@router.post("/jobs/{job_id}/cancel", response_model=ApiResponse)
+def cancel_import_job(job_id: str) -> ApiResponse:
+    job = import_jobs.cancel_job(job_id)
+    if not job:
+        return _job_not_found(job_id)
+    return ApiResponse(ok=True, data=job.model_dump())
+
+
 @router.get("/sample-template", response_model=None)
 def sample_template(kind: str = "resale") -> Response:
     if kind == "project":
@@ -102,4 +249,5 @@ def sample_template(kind: str = "resale") -> Response:
 
 @router.get("/mapping", response_model=ApiResponse)
 def get_mapping() -> ApiResponse:
-    return ApiResponse(ok=True, data={"headers": HEADER_ALIASES})
+    index = {alias: key for alias, (key, _) in HEADER_INDEX.items()}
+    return ApiResponse(ok=True, data={"headers": HEADER_ALIASES, "index": index, "cache": header_cache_info()})
@@ -1,25 +1,49 @@
-from fastapi import APIRouter, Depends
+from datetime import datetime
 
-from app.schemas import ApiResponse, LeadRouteRequest, LeadScoreRequest
+from fastapi import APIRouter, Depends, Query
+from fastapi.responses import StreamingResponse
+
+from app.schemas import ApiResponse, LeadRouteBatchRequest, LeadRouteRequest, LeadScoreBatchRequest, LeadScoreRequest
 from app.security import require_leads_key
-from app.services.lead_service import route_lead, score_lead, sla_breached
+from app.services.lead_service import route_lead, route_leads, score_lead, score_leads, sla_report
 
 router = APIRouter(dependencies=[Depends(require_leads_key)])
 
 
 @router.post("/score", response_model=ApiResponse)
-def score_lead_endpoint(payload: LeadScoreRequest) -> ApiResponse:
-    result = score_lead(payload.lead_id, payload.listing_id, payload.source, payload.price)
+async def score_lead_endpoint(payload: LeadScoreRequest) -> ApiResponse:
+    result = await score_lead(payload.lead_id, payload.listing_id, payload.source, payload.price)
     return ApiResponse(ok=True, data=result.model_dump())
 
 
+@router.post("/score/batch", response_model=None)
+def score_leads_batch_endpoint(payload: LeadScoreBatchRequest) -> ApiResponse | StreamingResponse:
+    results = score_leads(payload)
+    if payload.stream:
+        lines = (result.model_dump_json() + "\n" for result in results)
+        return StreamingResponse(lines, media_type="application/x-ndjson")
+    scores = [result.model_dump() for result in results]
+    return ApiResponse(ok=True, data={"results": scores, "count": len(scores)})
+
+
 @router.post("/route", response_model=ApiResponse)
 def route_lead_endpoint(payload: LeadRouteRequest) -> ApiResponse:
     result = route_lead(payload)
     return ApiResponse(ok=True, data=result.model_dump())
 
 
+@router.post("/route/batch", response_model=ApiResponse)
+def route_leads_batch_endpoint(payload: LeadRouteBatchRequest) -> ApiResponse:
+    result = route_leads(payload)
+    return ApiResponse(ok=True, data=result.model_dump())
+
+
 @router.get("/sla", response_model=ApiResponse)
-def sla_endpoint(minutes: int = 90) -> ApiResponse:
-    breached = sla_breached(minutes)
-    return ApiResponse(ok=True, data={"breached": breached, "minutes": minutes})
+async def sla_endpoint(
+    minutes: int = 90,
+    offset: int = Query(default=0, ge=0),
+    limit: int = Query(default=1000, ge=1, le=10000),
+    since: datetime | None = None,
+) -> ApiResponse:
+    data = await sla_report(minutes, offset, limit, since)
+    return ApiResponse(ok=True, data=data)
@@ -0,0 +1,11 @@
+from fastapi import APIRouter, Depends, Response
+
+from app import metrics
+from app.security import require_admin_key
+
+router = APIRouter()
+
+
+@router.get("/metrics", response_model=None, include_in_schema=False, dependencies=[Depends(require_admin_key)])
+def metrics_endpoint() -> Response:
+    return Response(content=metrics.render(), media_type=metrics.CONTENT_TYPE)
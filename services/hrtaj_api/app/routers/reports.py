@@ -1,19 +1,46 @@
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Query, Request, Response
 
-from app.schemas import ApiResponse
+from app.config import settings
 from app.security import require_admin_key
-from app.services.report_service import daily_report, pipeline_report
+from app.services.report_service import cached_report
 
 router = APIRouter()
 
 
-@router.get("/daily", response_model=ApiResponse, dependencies=[Depends(require_admin_key)])
-def daily_endpoint(days: int = 7) -> ApiResponse:
-    data = daily_report(days)
-    return ApiResponse(ok=True, data=data)
+def _etag_matches(if_none_match: str | None, etag: str) -> bool:
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    return etag in (tag.strip().removeprefix("W/") for tag in if_none_match.split(","))
 
 
-@router.get("/pipeline", response_model=ApiResponse, dependencies=[Depends(require_admin_key)])
-def pipeline_endpoint(days: int = 30) -> ApiResponse:
-    data = pipeline_report(days)
-    return ApiResponse(ok=True, data=data)
+async def _report_response(request: Request, report: str, days: int) -> Response:
+    cached = await cached_report(report, days)
+    headers = {
+        "ETag": cached.etag,
+        "Cache-Control": f"private, max-age={int(settings.report_cache_ttl_seconds)}",
+    }
+    if _etag_matches(request.headers.get("if-none-match"), cached.etag):
+        return Response(status_code=304, headers=headers)
+    return Response(content=cached.body, media_type="application/json", headers=headers)
+
+
+@router.get("/daily", response_model=None, dependencies=[Depends(require_admin_key)])
+async def daily_endpoint(request: Request, days: int = 7) -> Response:
+    return await _report_response(request, "daily", days)
+
+
+@router.get("/pipeline", response_model=None, dependencies=[Depends(require_admin_key)])
+async def pipeline_endpoint(request: Request, days: int = 30) -> Response:
+    return await _report_response(request, "pipeline", days)
+
+
+@router.get("/funnel", response_model=None, dependencies=[Depends(require_admin_key)])
+async def funnel_endpoint(request: Request, days: int = Query(default=90, ge=1, le=3650)) -> Response:
+    return await _report_response(request, "funnel", days)
+
+
+@router.get("/cohorts", response_model=None, dependencies=[Depends(require_admin_key)])
+async def cohorts_endpoint(request: Request, weeks: int = Query(default=12, ge=1, le=104)) -> Response:
+    return await _report_response(request, "cohorts", weeks)
@@ -1,3 +1,4 @@
+from datetime import datetime
 from pydantic import BaseModel, Field
 from typing import Any, Optional
 
@@ -18,6 +19,16 @@ class ImportRowError(BaseModel):
     row: int
     field: str
     message: str
+    sheet: Optional[str] = None
+
+
+class DuplicateCandidate(BaseModel):
+    row: int
+    sheet: Optional[str] = None
+    match_row: Optional[int] = None
+    match_sheet: Optional[str] = None
+    listing_id: Optional[str] = None
+    reason: str
 
 
 class ImportReport(BaseModel):
@@ -25,8 +36,32 @@ class ImportReport(BaseModel):
     rows_inserted: int
     rows_updated: int
     rows_failed: int
+    rows_unchanged: int = 0
+    rows_superseded: int = 0
     mapping: dict[str, str]
+    mapping_scores: dict[str, float] = Field(default_factory=dict)
     errors: list[ImportRowError] = Field(default_factory=list)
+    errors_total: int = 0
+    error_counts: dict[str, int] = Field(default_factory=dict)
+    duplicates: list[DuplicateCandidate] = Field(default_factory=list)
+    duplicates_total: int = 0
+    duplicate_counts: dict[str, int] = Field(default_factory=dict)
+    file_sha256: Optional[str] = None
+    file_already_imported: bool = False
+
+
+class ImportJobStatus(BaseModel):
+    job_id: str
+    kind: str
+    filename: str
+    status: str
+    rows_processed: int = 0
+    rows_per_second: Optional[float] = None
+    created_at: datetime
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+    error: Optional[str] = None
+    report: Optional[ImportReport] = None
 
 
 class LeadScoreRequest(BaseModel):
@@ -43,6 +78,19 @@ class LeadScoreResult(BaseModel):
     recommended_next_action: str
 
 
+class LeadScoreBatchRequest(BaseModel):
+    lead_ids: Optional[list[str]] = None
+    status: Optional[str] = None
+    source: Optional[str] = None
+    created_since: Optional[str] = None
+    limit: Optional[int] = Field(default=None, ge=1)
+    stream: bool = False
+
+
+class LeadBatchScore(LeadScoreResult):
+    lead_id: str
+
+
 class LeadRouteRequest(BaseModel):
     lead_id: str
     dry_run: bool = False
@@ -56,3 +104,23 @@ class LeadRouteResult(BaseModel):
     assigned_to: Optional[str]
     mode: str
     candidates: list[str]
+
+
+class LeadRouteBatchRequest(BaseModel):
+    lead_ids: Optional[list[str]] = None
+    limit: Optional[int] = Field(default=None, ge=1)
+    dry_run: bool = False
+    prefer_staff: bool = False
+    window_hours: int = 24
+
+
+class LeadBatchAssignment(BaseModel):
+    lead_id: str
+    assigned_to: Optional[str]
+    mode: str
+
+
+class LeadRouteBatchResult(BaseModel):
+    assignments: list[LeadBatchAssignment]
+    not_found: list[str] = Field(default_factory=list)
+    loads: dict[str, int] = Field(default_factory=dict)
@@ -0,0 +1,208 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+from typing import Any
+
+import numpy as np
+import pandas as pd
+
+from app.db import get_service_client, iter_keyset_pages
+
+FUNNEL_STAGES = ["new", "contacted", "qualified", "meeting_set", "won"]
+# Funnel level of every lead status; statuses between two stages count as the
+# lower one. Closed statuses have no level: such leads keep the highest level
+# their history shows.
+STAGE_LEVELS = {
+    "new": 0,
+    "contacted": 1,
+    "follow_up": 1,
+    "qualified": 2,
+    "viewing": 3,
+    "viewing_scheduled": 3,
+    "meeting_set": 3,
+    "negotiation": 3,
+    "won": 4,
+}
+CLOSED_STATUSES = ["lost", "closed", "archived"]
+EXCLUDED_STATUSES = ["test"]
+TIME_IN_STAGE_QUANTILES = {"p50": 0.5, "p90": 0.9, "p95": 0.95}
+WEEK = np.timedelta64(7, "D")
+
+LEAD_COLUMNS = ["id", "status", "lead_source", "created_at", "updated_at"]
+HISTORY_COLUMNS = ["lead_id", "status", "entered_at", "backfilled"]
+
+
+def _now() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+def _columnar(pages, columns: list[str]) -> pd.DataFrame:
+    # Builds the frame column by column, so each page's dicts can be dropped
+    # as soon as they are read.
+    data: dict[str, list[Any]] = {column: [] for column in columns}
+    for page in pages:
+        for column in columns:
+            data[column].extend(row.get(column) for row in page)
+    return pd.DataFrame(data)
+
+
+def _timestamps(values: pd.Series) -> pd.Series:
+    return pd.to_datetime(values, utc=True, format="ISO8601", errors="coerce")
+
+
+def load_snapshot(client, since: datetime) -> tuple[pd.DataFrame, pd.DataFrame]:
+    leads = _columnar(
+        iter_keyset_pages(
+            lambda: client.table("leads").select(", ".join(LEAD_COLUMNS)).gte("created_at", since.isoformat()),
+            "created_at",
+            "id",
+        ),
+        LEAD_COLUMNS,
+    )
+    history = _columnar(
+        iter_keyset_pages(
+            lambda: client.table("lead_status_history")
+            .select(", ".join(["id", *HISTORY_COLUMNS]))
+            .gte("entered_at", since.isoformat()),
+            "entered_at",
+            "id",
+        ),
+        HISTORY_COLUMNS,
+    )
+    leads["created_at"] = _timestamps(leads["created_at"])
+    leads["updated_at"] = _timestamps(leads["updated_at"])
+    leads = leads[~leads["status"].isin(EXCLUDED_STATUSES)]
+    history["entered_at"] = _timestamps(history["entered_at"])
+    history = history[history["lead_id"].isin(leads["id"])]
+    return leads.reset_index(drop=True), history.reset_index(drop=True)
+
+
+def compute_funnel(leads: pd.DataFrame, history: pd.DataFrame) -> dict[str, Any]:
+    levels = leads["status"].map(STAGE_LEVELS)
+    history_levels = history["status"].map(STAGE_LEVELS).groupby(history["lead_id"]).max()
+    reached = np.fmax(levels.to_numpy(dtype=float), leads["id"].map(history_levels).to_numpy(dtype=float))
+    reached = np.nan_to_num(reached, nan=0).astype(np.int64)
+    # reached_counts[i]: leads that got to stage i or further.
+    reached_counts = np.bincount(reached, minlength=len(FUNNEL_STAGES))[::-1].cumsum()[::-1]
+
+    stages = []
+    for index, stage in enumerate(FUNNEL_STAGES):
+        count = int(reached_counts[index])
+        previous = int(reached_counts[index - 1]) if index else count
+        stages.append(
+            {
+                "stage": stage,
+                "leads": count,
+                "conversion_from_previous": round(count / previous, 4) if previous else None,
+                "conversion_from_start": round(count / reached_counts[0], 4) if reached_counts[0] else None,
+            }
+        )
+    return {
+        "stages": stages,
+        "closed": int(leads["status"].isin(CLOSED_STATUSES).sum()),
+        "time_in_stage_hours": _time_in_stage(history),
+    }
+
+
+def _time_in_stage(history: pd.DataFrame) -> dict[str, dict[str, Any]]:
+    # A stage lasts until the lead's next transition; the current stage of
+    # each lead is still open and not counted. Backfilled rows only bound the
+    # time from creation to the latest status, so they are left out.
+    recorded = history[~history["backfilled"].fillna(False).astype(bool)].dropna(subset=["entered_at"])
+    lead_codes, _ = pd.factorize(recorded["lead_id"])
+    entered = recorded["entered_at"].to_numpy(dtype="datetime64[ns]").view(np.int64)
+    order = np.lexsort((entered, lead_codes))
+    lead_codes, entered = lead_codes[order], entered[order]
+    hours = np.full(len(order), np.nan)
+    same_lead = lead_codes[1:] == lead_codes[:-1]
+    hours[:-1][same_lead] = (entered[1:] - entered[:-1])[same_lead] / 3.6e12
+    spans = pd.DataFrame({"status": recorded["status"].to_numpy()[order], "hours": hours}).dropna()
+    if spans.empty:
+        return {}
+    grouped = spans.groupby("status")["hours"]
+    quantiles = grouped.quantile(list(TIME_IN_STAGE_QUANTILES.values())).unstack()
+    samples = grouped.size()
+    return {
+        status: {
+            **{name: round(float(quantiles.loc[status, q]), 2) for name, q in TIME_IN_STAGE_QUANTILES.items()},
+            "samples": int(samples[status]),
+        }
+        for status in quantiles.index
+    }
+
+
+def _first_entry(history: pd.DataFrame, statuses: list[str]) -> pd.Series:
+    return history[history["status"].isin(statuses)].groupby("lead_id")["entered_at"].min()
+
+
+def _event_week(leads: pd.DataFrame, history: pd.DataFrame, statuses: list[str], cohort_start: pd.Series) -> np.ndarray:
+    # Weeks after the cohort start at which each lead first entered one of
+    # `statuses`; leads whose current status is one of them but that have no
+    # such history fall back to updated_at. -1 where it never happened.
+    at = leads["id"].map(_first_entry(history, statuses))
+    fallback = leads["status"].isin(statuses) & at.isna()
+    at = at.where(~fallback, leads["updated_at"])
+    weeks = ((at - cohort_start) // pd.Timedelta(days=7)).to_numpy(dtype=float)
+    return np.where(np.isnan(weeks), -1, np.maximum(weeks, 0)).astype(np.int64)
+
+
+def compute_cohorts(leads: pd.DataFrame, history: pd.DataFrame, weeks: int, now: datetime) -> list[dict[str, Any]]:
+    if leads.empty:
+        return []
+    created = leads["created_at"]
+    cohort_start = (created - pd.to_timedelta(created.dt.weekday, unit="D")).dt.normalize()
+    source = leads["lead_source"].fillna("unknown").replace("", "unknown")
+    keys = pd.DataFrame({"cohort": cohort_start, "source": source})
+    group_ids = keys.groupby(["cohort", "source"], sort=True).ngroup().to_numpy()
+    groups = keys.drop_duplicates().sort_values(["cohort", "source"]).reset_index(drop=True)
+    sizes = np.bincount(group_ids, minlength=len(groups))
+
+    def cumulative(event_weeks: np.ndarray) -> np.ndarray:
+        # counts[g, k]: leads of group g whose event happened by week k.
+        counts = np.zeros((len(groups), weeks), dtype=np.int64)
+        happened = (event_weeks >= 0) & (event_weeks < weeks)
+        np.add.at(counts, (group_ids[happened], event_weeks[happened]), 1)
+        return counts.cumsum(axis=1)
+
+    closed = cumulative(_event_week(leads, history, CLOSED_STATUSES, cohort_start))
+    won = cumulative(_event_week(leads, history, ["won"], cohort_start))
+    observed = ((pd.Timestamp(now) - groups["cohort"]) // pd.Timedelta(days=7)).to_numpy() + 1
+
+    result = []
+    for index, group in groups.iterrows():
+        span = int(min(max(observed[index], 0), weeks))
+        size = int(sizes[index])
+        result.append(
+            {
+                "cohort_week": group["cohort"].date().isoformat(),
+                "lead_source": group["source"],
+                "leads": size,
+                "retention": np.round(1 - closed[index, :span] / size, 4).tolist(),
+                "won": np.round(won[index, :span] / size, 4).tolist(),
+            }
+        )
+    return result
+
+
+def _cohort_since(weeks: int, now: datetime) -> datetime:
+    week_start = (now - timedelta(days=now.weekday())).replace(hour=0, minute=0, second=0, microsecond=0)
+    return week_start - timedelta(weeks=weeks - 1)
+
+
+def _funnel(days: int) -> dict[str, Any]:
+    now = _now()
+    leads, history = load_snapshot(get_service_client(), now - timedelta(days=days))
+    return {**compute_funnel(leads, history), "window_days": days, "leads": len(leads)}
+
+
+def _cohorts(weeks: int) -> dict[str, Any]:
+    now = _now()
+    leads, history = load_snapshot(get_service_client(), _cohort_since(weeks, now))
+    return {"weeks": weeks, "cohorts": compute_cohorts(leads, history, weeks, now)}
+
+
+async def funnel_report(days: int = 90) -> dict[str, Any]:
+    return await asyncio.to_thread(_funnel, days)
+
+
+async def cohort_report(weeks: int = 12) -> dict[str, Any]:
+    return await asyncio.to_thread(_cohorts, weeks)
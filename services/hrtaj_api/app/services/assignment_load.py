@@ -0,0 +1,196 @@
+import math
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Callable
+
+import numpy as np
+import pandas as pd
+
+from app.config import settings
+from app.db import fetch_all
+from app.logging import get_logger
+
+logger = get_logger(__name__)
+
+
+# Per-assignee assignment counts over a sliding window, kept as one ring of
+# time buckets per assignee (a row of `_counts`), plus the assignee and bucket
+# of every lead assigned in the window so a re-route moves the lead's count to
+# its new assignee. It is seeded from lead_assignments, updated by every
+# assignment this process makes and rebuilt from the database every
+# `reconcile_seconds`, which also picks up assignments made by other
+# processes. Windows are counted to bucket resolution: the oldest bucket is
+# included whole.
+class AssignmentLoadTracker:
+    def __init__(
+        self,
+        max_window_hours: int,
+        bucket_minutes: int,
+        reconcile_seconds: float,
+        clock: Callable[[], float] = time.time,
+    ):
+        self.max_window_hours = max_window_hours
+        self.bucket_seconds = bucket_minutes * 60
+        self.reconcile_seconds = reconcile_seconds
+        self.slots = math.ceil(max_window_hours * 3600 / self.bucket_seconds) + 1
+        self._clock = clock
+        self._lock = threading.Lock()
+        # Held for a whole re-seed (database read included) so only one runs;
+        # never taken while holding _lock.
+        self._seed_lock = threading.Lock()
+        self._index: dict[str, int] = {}
+        self._counts = np.zeros((0, self.slots), dtype=np.int32)
+        self._leads: dict[str, tuple[int, int]] = {}
+        self._bucket = 0
+        self._seeded_at: float | None = None
+        # Assignments recorded while a re-seed is reading the database; they
+        # are replayed onto the new counts when it is swapped in.
+        self._journal: list[tuple[str, str, int]] | None = None
+
+    def covers(self, window_hours: int) -> bool:
+        return 0 < window_hours <= self.max_window_hours
+
+    def reset(self) -> None:
+        with self._lock:
+            self._index = {}
+            self._counts = np.zeros((0, self.slots), dtype=np.int32)
+            self._leads = {}
+            self._seeded_at = None
+
+    def _bucket_of(self, timestamp: float) -> int:
+        return int(timestamp // self.bucket_seconds)
+
+    def _advance(self, bucket: int) -> None:
+        steps = bucket - self._bucket
+        if steps <= 0:
+            return
+        if steps >= self.slots:
+            self._counts[:] = 0
+        else:
+            self._counts[:, np.arange(self._bucket + 1, bucket + 1) % self.slots] = 0
+        self._bucket = bucket
+
+    def _row(self, assignee: str) -> int:
+        row = self._index.get(assignee)
+        if row is None:
+            row = self._index[assignee] = len(self._index)
+            if row >= len(self._counts):
+                grown = np.zeros((max(16, len(self._counts) * 2), self.slots), dtype=np.int32)
+                grown[: len(self._counts)] = self._counts
+                self._counts = grown
+        return row
+
+    def _assign(self, lead_id: str, assignee: str, bucket: int) -> None:
+        # Caller holds the lock.
+        row = self._row(assignee)
+        previous = self._leads.get(lead_id)
+        if previous is not None:
+            previous_row, previous_bucket = previous
+            if previous_row == row:
+                return
+            if previous_bucket > self._bucket - self.slots:
+                self._counts[previous_row, previous_bucket % self.slots] -= 1
+        if bucket > self._bucket - self.slots:
+            self._counts[row, bucket % self.slots] += 1
+        self._leads[lead_id] = (row, bucket)
+
+    def _stale(self, now: float) -> bool:
+        return self._seeded_at is None or now - self._seeded_at >= self.reconcile_seconds
+
+    def refresh(self, client) -> None:
+        # Re-seeds when due. The read runs without holding _lock, so routing
+        # keeps using the previous counts meanwhile; only a tracker that was
+        # never seeded makes callers wait for it.
+        now = self._clock()
+        if not self._stale(now):
+            return
+        if not self._seed_lock.acquire(blocking=self._seeded_at is None):
+            return
+        try:
+            now = self._clock()
+            if not self._stale(now):
+                return
+            with self._lock:
+                self._journal = []
+            try:
+                index, counts, leads, bucket = self._read(client, now)
+            except Exception:
+                with self._lock:
+                    self._journal = None
+                raise
+            with self._lock:
+                journal, self._journal = self._journal, None
+                self._index, self._counts, self._leads, self._bucket = index, counts, leads, bucket
+                self._advance(self._bucket_of(self._clock()))
+                for lead_id, assignee, recorded in journal:
+                    self._assign(lead_id, assignee, recorded)
+                self._seeded_at = now
+            logger.info("Assignment load tracker seeded (%s assignments, %s assignees)", len(leads), len(index))
+        finally:
+            self._seed_lock.release()
+
+    def _read(self, client, now: float) -> tuple[dict[str, int], np.ndarray, dict[str, tuple[int, int]], int]:
+        since = datetime.fromtimestamp(now - self.max_window_hours * 3600, timezone.utc).isoformat()
+        rows = fetch_all(
+            lambda: client.table("lead_assignments")
+            .select("lead_id, assigned_to, created_at")
+            .gte("created_at", since)
+            .order("lead_id")
+        )
+        bucket = self._bucket_of(now)
+        index: dict[str, int] = {}
+        rows = [row for row in rows if row.get("assigned_to") and row.get("created_at")]
+        counts = np.zeros((max(16, len(set(row["assigned_to"] for row in rows))), self.slots), dtype=np.int32)
+        leads: dict[str, tuple[int, int]] = {}
+        if rows:
+            created = pd.to_datetime([row["created_at"] for row in rows], utc=True, format="ISO8601")
+            seconds = created.asi8 // 1_000_000_000
+            # Clock skew can put a row slightly in the future; count it as current.
+            buckets = np.minimum(seconds // self.bucket_seconds, bucket)
+            keep = buckets > bucket - self.slots
+            assignee_rows = np.array(
+                [index.setdefault(row["assigned_to"], len(index)) for row in rows], dtype=np.int64
+            )
+            np.add.at(counts, (assignee_rows[keep], buckets[keep] % self.slots), 1)
+            leads = {
+                row["lead_id"]: (int(assignee_row), int(row_bucket))
+                for row, assignee_row, row_bucket, kept in zip(rows, assignee_rows, buckets, keep)
+                if kept
+            }
+        return index, counts, leads, bucket
+
+    def counts(self, client, candidates: list[str], window_hours: int) -> dict[str, int]:
+        self.refresh(client)
+        now = self._clock()
+        with self._lock:
+            self._advance(self._bucket_of(now))
+            width = self._bucket - self._bucket_of(now - window_hours * 3600) + 1
+            window = np.arange(self._bucket - width + 1, self._bucket + 1) % self.slots
+            known = [candidate for candidate in candidates if candidate in self._index]
+            totals = self._counts[[self._index[candidate] for candidate in known]][:, window].sum(axis=1)
+            loads = dict(zip(known, totals.tolist()))
+        return {candidate: loads.get(candidate, 0) for candidate in candidates}
+
+    def record(self, assignments: dict[str, str]) -> None:
+        # `assignments` maps lead id to its new assignee. A lead that had
+        # another assignee in the window stops counting for them.
+        now = self._clock()
+        with self._lock:
+            bucket = self._bucket_of(now)
+            if self._journal is not None:
+                self._journal.extend((lead_id, assignee, bucket) for lead_id, assignee in assignments.items())
+            # Before the first seed there is nothing to update; the seed will
+            # read these assignments from the database.
+            if self._seeded_at is None:
+                return
+            self._advance(bucket)
+            for lead_id, assignee in assignments.items():
+                self._assign(lead_id, assignee, bucket)
+
+
+assignment_loads = AssignmentLoadTracker(
+    settings.assignment_load_max_window_hours,
+    settings.assignment_load_bucket_minutes,
+    settings.assignment_load_reconcile_seconds,
+)
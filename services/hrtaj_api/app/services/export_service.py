@@ -0,0 +1,183 @@
+import csv
+import io
+import json
+from datetime import datetime
+from typing import Any, Iterator
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from app.config import settings
+from app.db import get_service_client, iter_keyset_pages
+
+# Exportable tables and the unique column that breaks created_at ties.
+EXPORT_TABLES = {"leads": "id", "listings": "id", "resale_intake": "listing_id"}
+EXPORT_FORMATS = {
+    "csv": "text/csv; charset=utf-8",
+    "ndjson": "application/x-ndjson",
+    "parquet": "application/vnd.apache.parquet",
+}
+
+
+def _columns(names: str, **types: pa.DataType) -> dict[str, pa.DataType]:
+    return {name: types.get(name, pa.string()) for name in names.split()}
+
+
+# Exported columns of each table in output order, with their Parquet types.
+# Anything not listed as a number or boolean (uuids, enums, dates, timestamps,
+# json and arrays) is written as text. The schema is fixed up front so a
+# column that is null on the first page cannot be typed from it.
+EXPORT_COLUMNS: dict[str, dict[str, pa.DataType]] = {
+    "leads": _columns(
+        "id listing_id user_id name phone email message source created_at updated_at status assigned_to tags "
+        "first_response_at last_contact_at next_followup_at intent preferred_area budget_min budget_max "
+        "preferred_contact_time notes lead_source lost_reason lost_reason_note priority phone_normalized phone_e164 "
+        "next_action_at next_action_note customer_id created_by updated_by deleted_at deleted_by "
+        "score score_label score_next_action scored_at score_expires_at score_stale",
+        budget_min=pa.float64(),
+        budget_max=pa.float64(),
+        score=pa.int64(),
+        score_stale=pa.bool_(),
+    ),
+    "listings": _columns(
+        "id developer_id project_id owner_user_id hr_owner_user_id agent_user_id title title_ar title_en type purpose "
+        "price currency city area address beds baths size_m2 description description_ar description_en amenities "
+        "status submission_status submitted_at reviewed_at approved_at published_at archived_at listing_code "
+        "unit_code developer_payload inventory_source agent_name floor elevator finishing meters reception kitchen "
+        "view building has_images commission intake_date target ad_channel requested unit_status "
+        "building_entrance_images created_by updated_by created_at updated_at",
+        price=pa.float64(),
+        size_m2=pa.float64(),
+        beds=pa.int64(),
+        baths=pa.int64(),
+        reception=pa.int64(),
+        elevator=pa.bool_(),
+        kitchen=pa.bool_(),
+        has_images=pa.bool_(),
+    ),
+    "resale_intake": _columns(
+        "listing_id agent_name agent_user_id owner_name owner_phone owner_phone_e164 unit_code floor size_m2 "
+        "elevator finishing meters bedrooms reception bathrooms kitchen view building has_images entrance "
+        "commission intake_date target ad_channel address area city price currency notes owner_notes "
+        "last_owner_contact_at last_owner_contact_note next_owner_followup_at raw_payload row_fingerprint "
+        "created_by updated_by created_at updated_at",
+        size_m2=pa.float64(),
+        price=pa.float64(),
+        bedrooms=pa.int64(),
+        reception=pa.int64(),
+        bathrooms=pa.int64(),
+        elevator=pa.bool_(),
+        kitchen=pa.bool_(),
+        has_images=pa.bool_(),
+    ),
+}
+
+
+def _pages(
+    table: str, columns: list[str], created_from: datetime | None, created_to: datetime | None
+) -> Iterator[list[dict[str, Any]]]:
+    client = get_service_client()
+    id_column = EXPORT_TABLES[table]
+    selected = ", ".join(dict.fromkeys([*columns, "created_at", id_column]))
+
+    def build():
+        query = client.table(table).select(selected)
+        if created_from:
+            query = query.gte("created_at", created_from.isoformat())
+        if created_to:
+            query = query.lt("created_at", created_to.isoformat())
+        return query
+
+    for page in iter_keyset_pages(build, "created_at", id_column, settings.export_page_size):
+        yield [{column: row.get(column) for column in columns} for row in page]
+
+
+def _flat_value(value: Any) -> Any:
+    return json.dumps(value, ensure_ascii=False) if isinstance(value, (dict, list)) else value
+
+
+def _iter_csv(pages: Iterator[list[dict[str, Any]]], header: list[str]) -> Iterator[bytes]:
+    buffer = io.StringIO()
+    csv.writer(buffer).writerow(header)
+    yield buffer.getvalue().encode()
+    for page in pages:
+        buffer = io.StringIO()
+        csv.writer(buffer).writerows([_flat_value(row.get(column)) for column in header] for row in page)
+        yield buffer.getvalue().encode()
+
+
+def _iter_ndjson(pages: Iterator[list[dict[str, Any]]]) -> Iterator[bytes]:
+    for page in pages:
+        yield "".join(json.dumps(row, ensure_ascii=False, default=str) + "\n" for row in page).encode()
+
+
+class _DrainableSink(io.RawIOBase):
+    # Write-only file for ParquetWriter whose bytes are handed out (and
+    # released) after each row group, so the file is never held whole.
+    def __init__(self):
+        self._buffer = bytearray()
+        self._position = 0
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        self._buffer.extend(data)
+        self._position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self._position
+
+    def drain(self) -> bytes:
+        data = bytes(self._buffer)
+        self._buffer.clear()
+        return data
+
+
+def _text(value: Any) -> str | None:
+    return value if value is None or isinstance(value, str) else json.dumps(value, ensure_ascii=False, default=str)
+
+
+def _parquet_table(page: list[dict[str, Any]], schema: pa.Schema) -> pa.Table:
+    arrays = []
+    for field in schema:
+        values = [row.get(field.name) for row in page]
+        if pa.types.is_string(field.type):
+            values = [_text(value) for value in values]
+        arrays.append(pa.array(values, type=field.type))
+    return pa.Table.from_arrays(arrays, schema=schema)
+
+
+def _iter_parquet(pages: Iterator[list[dict[str, Any]]], schema: pa.Schema) -> Iterator[bytes]:
+    sink = _DrainableSink()
+    with pq.ParquetWriter(sink, schema) as writer:
+        for page in pages:
+            writer.write_table(_parquet_table(page, schema))
+            yield sink.drain()
+    yield sink.drain()
+
+
+def export_rows(
+    table: str,
+    export_format: str,
+    columns: list[str] | None = None,
+    created_from: datetime | None = None,
+    created_to: datetime | None = None,
+) -> Iterator[bytes]:
+    if table not in EXPORT_TABLES:
+        raise ValueError(f"Unknown export table: {table}")
+    if export_format not in EXPORT_FORMATS:
+        raise ValueError(f"Unknown export format: {export_format}")
+    types = EXPORT_COLUMNS[table]
+    columns = columns or list(types)
+    unknown = [column for column in columns if column not in types]
+    if unknown:
+        raise ValueError(f"Unknown {table} columns: {', '.join(unknown)}")
+    columns = list(dict.fromkeys(columns))
+    pages = _pages(table, columns, created_from, created_to)
+    if export_format == "csv":
+        return _iter_csv(pages, columns)
+    if export_format == "ndjson":
+        return _iter_ndjson(pages)
+    return _iter_parquet(pages, pa.schema([(column, types[column]) for column in columns]))
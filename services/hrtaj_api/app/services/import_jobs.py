@@ -0,0 +1,174 @@
+import os
+import tempfile
+import threading
+import time
+import uuid
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Any, Callable
+
+from app.config import settings
+from app.import_errors import ImportErrorLog
+from app.logging import get_logger
+from app.schemas import ImportJobStatus, ImportReport
+from app.services.import_service import import_projects, import_resale
+
+logger = get_logger(__name__)
+
+ACTIVE_STATES = {"queued", "running"}
+
+
+class ImportCancelled(Exception):
+    pass
+
+
+class ImportQueueFull(Exception):
+    pass
+
+
+@dataclass
+class ImportJob:
+    job_id: str
+    kind: str
+    filename: str
+    path: str
+    created_at: datetime
+    status: str = "queued"
+    started_at: datetime | None = None
+    finished_at: datetime | None = None
+    started_clock: float | None = None
+    finished_clock: float | None = None
+    error: str | None = None
+    report: ImportReport | None = None
+    errors: ImportErrorLog = field(default_factory=lambda: ImportErrorLog(settings.import_error_samples))
+    cancel_event: threading.Event = field(default_factory=threading.Event)
+    future: Future | None = None
+
+    def snapshot(self) -> ImportJobStatus:
+        report = self.report
+        rows_processed = report.rows_total if report else 0
+        rows_per_second = None
+        if self.started_clock is not None and rows_processed:
+            elapsed = (self.finished_clock or time.monotonic()) - self.started_clock
+            rows_per_second = round(rows_processed / elapsed, 1) if elapsed > 0 else None
+        return ImportJobStatus(
+            job_id=self.job_id,
+            kind=self.kind,
+            filename=self.filename,
+            status=self.status,
+            rows_processed=rows_processed,
+            rows_per_second=rows_per_second,
+            created_at=self.created_at,
+            started_at=self.started_at,
+            finished_at=self.finished_at,
+            error=self.error,
+            report=report,
+        )
+
+
+_executor = ThreadPoolExecutor(max_workers=settings.import_workers, thread_name_prefix="import-job")
+_jobs: dict[str, ImportJob] = {}
+_lock = threading.Lock()
+
+
+def _now() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+def _prune_finished() -> None:
+    cutoff = time.monotonic() - settings.import_job_retention_seconds
+    for job_id, job in list(_jobs.items()):
+        if job.status not in ACTIVE_STATES and (job.finished_clock or 0) < cutoff:
+            del _jobs[job_id]
+
+
+def discard_spool(path: str) -> None:
+    try:
+        os.unlink(path)
+    except FileNotFoundError:
+        pass
+
+
+def _finish(job: ImportJob, status: str, error: str | None = None) -> None:
+    with _lock:
+        job.status = status
+        job.error = error
+        job.finished_at = _now()
+        job.finished_clock = time.monotonic()
+    discard_spool(job.path)
+
+
+def _run(job: ImportJob, runner: Callable[..., ImportReport], kwargs: dict[str, Any]) -> None:
+    with _lock:
+        if job.cancel_event.is_set():
+            job.status = "cancelled"
+        else:
+            job.status = "running"
+            job.started_at = _now()
+            job.started_clock = time.monotonic()
+    if job.status == "cancelled":
+        _finish(job, "cancelled")
+        return
+
+    def on_progress(report: ImportReport) -> None:
+        job.report = report.model_copy(update={"errors": list(report.errors)})
+        if job.cancel_event.is_set():
+            raise ImportCancelled()
+
+    try:
+        with open(job.path, "rb") as handle:
+            job.report = runner(handle, job.filename, on_progress=on_progress, error_log=job.errors, **kwargs)
+    except ImportCancelled:
+        _finish(job, "cancelled")
+    except Exception as exc:
+        logger.exception("Import job %s failed", job.job_id)
+        _finish(job, "failed", str(exc))
+    else:
+        _finish(job, "succeeded")
+
+
+def spool_path(filename: str) -> str:
+    suffix = os.path.splitext(filename)[1]
+    handle, path = tempfile.mkstemp(prefix="hrtaj-import-", suffix=suffix)
+    os.close(handle)
+    return path
+
+
+def submit(kind: str, filename: str, path: str, **kwargs: Any) -> ImportJobStatus:
+    runner = import_projects if kind == "projects" else import_resale
+    with _lock:
+        _prune_finished()
+        pending = sum(1 for job in _jobs.values() if job.status in ACTIVE_STATES)
+        if pending >= settings.import_max_pending_jobs:
+            raise ImportQueueFull(f"Import queue is full ({pending} jobs pending).")
+        job = ImportJob(job_id=uuid.uuid4().hex, kind=kind, filename=filename, path=path, created_at=_now())
+        _jobs[job.job_id] = job
+        job.future = _executor.submit(_run, job, runner, kwargs)
+    return job.snapshot()
+
+
+def get_job(job_id: str) -> ImportJobStatus | None:
+    job = _jobs.get(job_id)
+    return job.snapshot() if job else None
+
+
+def get_job_errors(job_id: str) -> ImportErrorLog | None:
+    job = _jobs.get(job_id)
+    return job.errors if job else None
+
+
+def list_jobs() -> list[ImportJobStatus]:
+    with _lock:
+        jobs = sorted(_jobs.values(), key=lambda job: job.created_at, reverse=True)
+    return [job.snapshot() for job in jobs]
+
+
+def cancel_job(job_id: str) -> ImportJobStatus | None:
+    job = _jobs.get(job_id)
+    if not job:
+        return None
+    job.cancel_event.set()
+    if job.future and job.future.cancel():
+        _finish(job, "cancelled")
+    return job.snapshot()
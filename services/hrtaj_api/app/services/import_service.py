@@ -1,33 +1,48 @@
-from typing import Any
-from datetime import datetime
-import random
-
+from contextlib import closing
+from dataclasses import dataclass, field
+from typing import Any, BinaryIO, Callable, Iterator
+from datetime import datetime, timezone
+import hashlib
+import json
+import time
+
+import numpy as np
 import pandas as pd
 
+from app import metrics
 from app.config import settings
-from app.db import execute, get_service_client
+from app.db import chunked, execute, fetch_all, get_service_client
+from app.dedup import DuplicateIndex
+from app.import_errors import ImportErrorLog
 from app.import_utils import (
-    build_row_payload,
-    map_headers,
-    parse_bool,
-    parse_date,
-    parse_float,
-    parse_int,
-    read_table,
+    coerce_phone_e164,
+    collect_row_errors,
+    file_sha256,
+    is_missing,
+    is_archive,
+    iter_member_chunks,
+    iter_member_data_chunks,
+    iter_sheet_chunks,
+    iter_source_chunks,
+    list_archive_members,
+    list_sheets,
+    match_headers,
+    normalize_address,
+    payload_fingerprint,
+    read_archive_member,
+    row_records,
+    source_path,
+    transform_columns,
+    worker_source,
 )
 from app.logging import get_logger
-from app.schemas import ImportReport, ImportRowError
+from app.schemas import DuplicateCandidate, ImportReport
+from app.services.transform_pool import map_ordered
+from app.services.unit_codes import allocate_unit_codes
 
 logger = get_logger(__name__)
 
 
-def _normalize_text(value: Any) -> str | None:
-    if value is None or (isinstance(value, float) and pd.isna(value)):
-        return None
-    text = str(value).strip()
-    return text or None
-
-
 def _build_title(unit_type: str | None, area: str | None) -> str:
     if unit_type and area:
         return f"{unit_type} - {area}"
@@ -43,12 +58,6 @@ def _collect_amenities(elevator: bool | None, kitchen: bool | None) -> list[str]
     return amenities
 
 
-def _generate_unit_code(prefix: str = "HR") -> str:
-    stamp = datetime.utcnow().strftime("%Y%m%d")
-    rand = random.randint(1000, 9999)
-    return f"{prefix}-{stamp}-{rand}"
-
-
 def _ensure_owner_user_id(owner_user_id: str | None) -> str:
     if owner_user_id:
         return owner_user_id
@@ -57,123 +66,348 @@ def _ensure_owner_user_id(owner_user_id: str | None) -> str:
     raise ValueError("owner_user_id is required (HRTAJ_STAFF_OWNER_USER_ID not set).")
 
 
-def _find_existing_resale(client, unit_code: str | None, address: str | None, owner_phone: str | None, price: float | None) -> str | None:
-    if unit_code:
-        found = execute(
-            client.table("listings").select("id").eq("unit_code", unit_code).limit(1)
-        ).data
-        if found:
-            return found[0]["id"]
+def _resale_key(owner_phone: str | None, address: str | None, price: float | None) -> tuple[str, str, float] | None:
     if address and owner_phone and price is not None:
-        found = execute(
-            client.table("resale_intake")
-            .select("listing_id")
-            .eq("owner_phone", owner_phone)
-            .eq("address", address)
-            .eq("price", price)
-            .limit(1)
-        ).data
-        if found:
-            return found[0]["listing_id"]
+        return owner_phone, address, float(price)
     return None
 
 
-def import_resale(
-    file_bytes: bytes,
-    filename: str,
-    owner_user_id: str | None,
-    hr_owner_user_id: str | None,
-    default_city: str | None,
-    default_purpose: str | None,
-    dry_run: bool,
-) -> ImportReport:
-    client = get_service_client()
-    df = read_table(file_bytes, filename)
-    mapping, _ = map_headers(df.columns)
+ResaleRow = tuple[int, dict[str, Any], dict[str, Any]]
 
-    required = {"type", "price", "address"}
-    missing = required - set(mapping.keys())
 
-    report = ImportReport(
-        rows_total=len(df.index),
-        rows_inserted=0,
-        rows_updated=0,
-        rows_failed=0,
-        mapping=mapping,
-        errors=[],
-    )
-
-    if missing:
-        report.errors.append(
-            ImportRowError(row=0, field="headers", message=f"Missing required headers: {sorted(missing)}")
+def _prefetch_resale_matches(
+    client, rows: list[ResaleRow]
+) -> tuple[dict[str, str], dict[tuple[str, str, float], str], dict[str, str]]:
+    batch_size = settings.import_batch_size
+    known_codes: dict[str, str] = {}
+    by_code: dict[str, str] = {}
+    codes = sorted({listing["unit_code"] for _, listing, _ in rows if listing["unit_code"]})
+    for chunk in chunked(codes, batch_size):
+        found = fetch_all(
+            lambda: client.table("listings").select("id, unit_code").in_("unit_code", chunk).order("id")
+        )
+        for item in found:
+            by_code.setdefault(item["unit_code"], item["id"])
+            known_codes.setdefault(item["id"], item["unit_code"])
+
+    by_key: dict[tuple[str, str, float], str] = {}
+    phones = sorted({intake["owner_phone"] for _, _, intake in rows if intake["owner_phone"]})
+    for chunk in chunked(phones, batch_size):
+        found = fetch_all(
+            lambda: client.table("resale_intake")
+            .select("listing_id, owner_phone, address, price, unit_code")
+            .in_("owner_phone", chunk)
+            .order("listing_id")
+        )
+        for item in found:
+            key = _resale_key(item.get("owner_phone"), item.get("address"), item.get("price"))
+            if key:
+                by_key.setdefault(key, item["listing_id"])
+            if item.get("unit_code"):
+                known_codes.setdefault(item["listing_id"], item["unit_code"])
+    return by_code, by_key, known_codes
+
+
+def _prefetch_duplicate_candidates(client, rows: list[ResaleRow], dedup: DuplicateIndex) -> None:
+    phones = dedup.unloaded_phones([intake["owner_phone_e164"] for _, _, intake in rows])
+    for chunk in chunked(phones, settings.import_batch_size):
+        found = fetch_all(
+            lambda: client.table("resale_intake")
+            .select("listing_id, owner_phone_e164, address, price")
+            .in_("owner_phone_e164", chunk)
+            .order("listing_id")
         )
-        report.rows_failed = report.rows_total
-        return report
+        for item in found:
+            dedup.add_existing(
+                item["listing_id"], item.get("owner_phone_e164"), normalize_address(item.get("address")), item.get("price")
+            )
 
-    try:
-        resolved_owner_id = _ensure_owner_user_id(owner_user_id)
-    except ValueError as exc:
-        report.errors.append(ImportRowError(row=0, field="owner_user_id", message=str(exc)))
-        report.rows_failed = report.rows_total
-        return report
-
-    default_currency = settings.default_currency
-    default_purpose = default_purpose or settings.default_purpose
-
-    for idx, row in df.iterrows():
-        row_number = idx + 2
-        payload = build_row_payload(row, mapping)
-        errors: list[ImportRowError] = []
-
-        unit_type = _normalize_text(payload.get("type"))
-        price = parse_float(payload.get("price"))
-        address = _normalize_text(payload.get("address"))
-        area = _normalize_text(payload.get("area"))
-        city = _normalize_text(payload.get("city")) or default_city or area
-        if not unit_type:
-            errors.append(ImportRowError(row=row_number, field="type", message="Missing unit type."))
-        if price is None:
-            errors.append(ImportRowError(row=row_number, field="price", message="Invalid price."))
-        if not address:
-            errors.append(ImportRowError(row=row_number, field="address", message="Missing address."))
-        if not city:
-            errors.append(ImportRowError(row=row_number, field="city", message="Missing city or default_city."))
-
-        if errors:
-            report.errors.extend(errors)
-            report.rows_failed += 1
+
+def _report_duplicate(report: ImportReport, candidate: DuplicateCandidate) -> None:
+    # Like row errors, only the first few candidates are kept in the report;
+    # the rest are counted per reason.
+    report.duplicates_total += 1
+    report.duplicate_counts[candidate.reason] = report.duplicate_counts.get(candidate.reason, 0) + 1
+    if len(report.duplicates) < settings.import_duplicate_samples:
+        report.duplicates.append(candidate)
+
+
+def _flag_duplicates(
+    dedup: DuplicateIndex,
+    sheet: str | None,
+    rows: list[ResaleRow],
+    listing_ids: list[str | None],
+    report: ImportReport,
+) -> None:
+    for (row_number, _, intake), listing_id in zip(rows, listing_ids):
+        found = dedup.check(
+            row_number,
+            listing_id,
+            intake["owner_phone_e164"],
+            normalize_address(intake["address"]),
+            intake["price"],
+            sheet,
+        )
+        for candidate in found:
+            _report_duplicate(report, candidate)
+
+
+def _flag_dry_run_duplicates(
+    client, dedup: DuplicateIndex, sheet: str | None, rows: list[ResaleRow], report: ImportReport
+) -> None:
+    # Same checks as a real import: rows are compared with existing intake
+    # rows too, and a row that would update a listing is not reported against it.
+    if not rows:
+        return
+    by_code, by_key, _ = _prefetch_resale_matches(client, rows)
+    _prefetch_duplicate_candidates(client, rows, dedup)
+    listing_ids: list[str | None] = []
+    for _, listing_payload, intake_payload in rows:
+        key = _resale_key(intake_payload["owner_phone"], intake_payload["address"], intake_payload["price"])
+        unit_code = listing_payload["unit_code"]
+        listing_ids.append((by_code.get(unit_code) if unit_code else None) or (by_key.get(key) if key else None))
+    _flag_duplicates(dedup, sheet, rows, listing_ids, report)
+
+
+def _prefetch_fingerprints(client, listing_ids: list[str]) -> dict[str, str | None]:
+    fingerprints: dict[str, str | None] = {}
+    for chunk in chunked(listing_ids, settings.import_batch_size):
+        found = fetch_all(
+            lambda: client.table("resale_intake")
+            .select("listing_id, row_fingerprint")
+            .in_("listing_id", chunk)
+            .order("listing_id")
+        )
+        for item in found:
+            fingerprints[item["listing_id"]] = item.get("row_fingerprint")
+    return fingerprints
+
+
+def _update_listings(client, listings: list[dict[str, Any]]) -> None:
+    # UPDATE through apply_listing_updates rather than an upsert, which would
+    # run insert triggers and RLS insert checks and need every NOT NULL column.
+    # One call sets one column list, so payloads are grouped by their keys.
+    groups: dict[tuple[str, ...], list[dict[str, Any]]] = {}
+    for listing in listings:
+        groups.setdefault(tuple(sorted(listing)), []).append(listing)
+    for group in groups.values():
+        for chunk in chunked(group, settings.import_batch_size):
+            execute(client.rpc("apply_listing_updates", {"rows": chunk}))
+
+
+def _write_resale_rows(
+    client, rows: list[ResaleRow], report: ImportReport, dedup: DuplicateIndex, sheet: str | None
+) -> None:
+    if not rows:
+        return
+    by_code, by_key, known_codes = _prefetch_resale_matches(client, rows)
+    _prefetch_duplicate_candidates(client, rows, dedup)
+
+    # Targets are existing listing ids (str) or numbered new listings (int), so
+    # a unit repeated inside the batch resolves to the row that first introduced
+    # it, exactly as the old row-at-a-time lookups did.
+    targets: list[str | int] = []
+    new_listings = 0
+    for _, listing_payload, intake_payload in rows:
+        unit_code = listing_payload["unit_code"]
+        key = _resale_key(intake_payload["owner_phone"], intake_payload["address"], intake_payload["price"])
+        target: str | int | None = by_code.get(unit_code) if unit_code else None
+        if target is None and key:
+            target = by_key.get(key)
+        if target is None:
+            target = new_listings
+            new_listings += 1
+        if unit_code:
+            by_code.setdefault(unit_code, target)
+        if key:
+            by_key.setdefault(key, target)
+        targets.append(target)
+
+    # A listing named by several rows takes the last of them and the others are
+    # reported as superseded. Writing each in turn would leave the listing on
+    # the last row's fingerprint, so every re-import would rewrite it again.
+    last = {target: index for index, target in enumerate(targets)}
+    kept: list[int] = []
+    for index, target in enumerate(targets):
+        if last[target] == index:
+            kept.append(index)
             continue
+        report.rows_superseded += 1
+        _report_duplicate(
+            report,
+            DuplicateCandidate(
+                row=rows[index][0],
+                sheet=sheet,
+                match_row=rows[last[target]][0],
+                match_sheet=sheet,
+                listing_id=target if isinstance(target, str) else None,
+                reason="superseded",
+            ),
+        )
+    rows = [rows[index] for index in kept]
+    targets = [targets[index] for index in kept]
+
+    # Existing listings are only rewritten when the row's fingerprint differs
+    # from the last one written for that listing.
+    current = _prefetch_fingerprints(client, sorted({target for target in targets if isinstance(target, str)}))
+    inserts: list[tuple[dict[str, Any], dict[str, Any]]] = []
+    updates: dict[str, tuple[dict[str, Any], dict[str, Any]]] = {}
+    for (_, listing_payload, intake_payload), target in zip(rows, targets):
+        if isinstance(target, int):
+            inserts.append((listing_payload, intake_payload))
+            report.rows_inserted += 1
+        elif current.get(target) == intake_payload["row_fingerprint"]:
+            report.rows_unchanged += 1
+        else:
+            updates[target] = (listing_payload, intake_payload)
+            report.rows_updated += 1
 
-        unit_code = _normalize_text(payload.get("unit_code")) or _generate_unit_code("HR")
-        owner_name = _normalize_text(payload.get("owner_name"))
-        owner_phone = _normalize_text(payload.get("owner_phone"))
-        floor = _normalize_text(payload.get("floor"))
-        size_m2 = parse_float(payload.get("size_m2"))
-        elevator = parse_bool(payload.get("elevator"))
-        finishing = _normalize_text(payload.get("finishing"))
-        meters = _normalize_text(payload.get("meters"))
-        bedrooms = parse_int(payload.get("bedrooms"))
-        reception = parse_int(payload.get("reception"))
-        bathrooms = parse_int(payload.get("bathrooms"))
-        kitchen = parse_bool(payload.get("kitchen"))
-        view = _normalize_text(payload.get("view"))
-        building = _normalize_text(payload.get("building"))
-        has_images = parse_bool(payload.get("has_images"))
-        entrance = _normalize_text(payload.get("entrance"))
-        commission = _normalize_text(payload.get("commission"))
-        date_value = parse_date(payload.get("date"))
-        intake_date = date_value.split("T")[0] if date_value else None
-        target = _normalize_text(payload.get("target"))
-        ad_channel = _normalize_text(payload.get("ad_channel"))
-        notes = _normalize_text(payload.get("notes"))
-        currency = _normalize_text(payload.get("currency")) or default_currency
+    # Rows without a unit code keep the code of the listing they update; new
+    # listings draw one from the reserved block.
+    for listing_id, (listing_payload, intake_payload) in updates.items():
+        if not listing_payload["unit_code"] and listing_id in known_codes:
+            listing_payload["unit_code"] = intake_payload["unit_code"] = known_codes[listing_id]
+    uncoded = [payloads for payloads in [*inserts, *updates.values()] if not payloads[0]["unit_code"]]
+    for (listing_payload, intake_payload), code in zip(uncoded, allocate_unit_codes(client, "HR", len(uncoded))):
+        listing_payload["unit_code"] = intake_payload["unit_code"] = code
+
+    batch_size = settings.import_batch_size
+    inserted_ids: list[str] = []
+    for chunk in chunked(inserts, batch_size):
+        inserted = execute(client.table("listings").insert([listing for listing, _ in chunk])).data
+        intakes = [
+            {**intake, "listing_id": row["id"]} for (_, intake), row in zip(chunk, inserted)
+        ]
+        execute(client.table("resale_intake").insert(intakes))
+        inserted_ids.extend(row["id"] for row in inserted)
+    _update_listings(client, [{**listing, "id": listing_id} for listing_id, (listing, _) in updates.items()])
+    # Listings created outside the importer may have no intake row yet.
+    for chunk in chunked(updates.items(), batch_size):
+        execute(
+            client.table("resale_intake").upsert(
+                [{**intake, "listing_id": listing_id} for listing_id, (_, intake) in chunk],
+                on_conflict="listing_id",
+            )
+        )
 
-        purpose = _normalize_text(payload.get("purpose")) or default_purpose
+    new_ids = iter(inserted_ids)
+    listing_ids = [next(new_ids) if isinstance(target, int) else target for target in targets]
+    _flag_duplicates(dedup, sheet, rows, listing_ids, report)
+
+
+RESALE_COLUMNS = {
+    "type": "text",
+    "price": "float",
+    "address": "text",
+    "area": "text",
+    "city": "text",
+    "unit_code": "text",
+    "owner_name": "text",
+    "owner_phone": "text",
+    "floor": "text",
+    "size_m2": "float",
+    "elevator": "bool",
+    "finishing": "text",
+    "meters": "text",
+    "bedrooms": "int",
+    "reception": "int",
+    "bathrooms": "int",
+    "kitchen": "bool",
+    "view": "text",
+    "building": "text",
+    "has_images": "bool",
+    "entrance": "text",
+    "commission": "text",
+    "date": "date",
+    "target": "text",
+    "ad_channel": "text",
+    "notes": "text",
+    "currency": "text",
+    "purpose": "text",
+    "agent": "text",
+}
+
+
+@dataclass(frozen=True)
+class ResaleContext:
+    owner_user_id: str
+    hr_owner_user_id: str | None
+    default_city: str | None
+    default_purpose: str
+    default_currency: str
+
+
+@dataclass
+class PreparedChunk:
+    sheet: str | None
+    mapping: dict[str, str]
+    scores: dict[str, float]
+    rows: list[Any]
+    errors: ImportErrorLog
+    failed: int
+
+
+def _missing_headers(
+    sheet: str | None, df: pd.DataFrame, mapping: dict[str, str], scores: dict[str, float], required: set[str]
+) -> PreparedChunk | None:
+    missing = required - set(mapping.keys())
+    if not missing:
+        return None
+    # Reported once per sheet; blank extra sheets of a workbook are skipped quietly.
+    first_chunk = df.index[0] == 0 if len(df.index) else sheet is None
+    errors = ImportErrorLog()
+    if first_chunk:
+        errors.add(0, "headers", f"Missing required headers: {sorted(missing)}", sheet)
+    return PreparedChunk(sheet, mapping, scores, [], errors, len(df.index))
+
+
+def _prepare_resale_rows(sheet: str | None, df: pd.DataFrame, ctx: ResaleContext) -> PreparedChunk:
+    mapping, _, scores = match_headers(df.columns)
+    rejected = _missing_headers(sheet, df, mapping, scores, {"type", "price", "address"})
+    if rejected:
+        return rejected
+
+    cols = transform_columns(df, mapping, RESALE_COLUMNS)
+    raw_rows = row_records(df, mapping)
+    row_numbers = df.index.to_numpy() + 2
+    cities = np.array(
+        [city or ctx.default_city or area for city, area in zip(cols["city"], cols["area"])], dtype=object
+    )
+    failed, errors = collect_row_errors(
+        row_numbers,
+        [
+            ("type", is_missing(cols["type"]), "Missing unit type."),
+            ("price", is_missing(cols["price"]), "Invalid price."),
+            ("address", is_missing(cols["address"]), "Missing address."),
+            ("city", np.equal(cities, None) | np.equal(cities, ""), "Missing city or default_city."),
+        ],
+        sheet,
+    )
+
+    phones_e164 = coerce_phone_e164(cols["owner_phone"])
+    rows: list[ResaleRow] = []
+    for pos in np.flatnonzero(~failed):
+        unit_type = cols["type"][pos]
+        price = cols["price"][pos]
+        address = cols["address"][pos]
+        area = cols["area"][pos]
+        city = cities[pos]
+        unit_code = cols["unit_code"][pos]
+        size_m2 = cols["size_m2"][pos]
+        elevator = cols["elevator"][pos]
+        bedrooms = cols["bedrooms"][pos]
+        bathrooms = cols["bathrooms"][pos]
+        kitchen = cols["kitchen"][pos]
+        date_value = cols["date"][pos]
+        intake_date = date_value.split("T")[0] if date_value else None
+        notes = cols["notes"][pos]
+        currency = cols["currency"][pos] or ctx.default_currency
+        purpose = cols["purpose"][pos] or ctx.default_purpose
         title = _build_title(unit_type, area)
         amenities = _collect_amenities(elevator, kitchen)
 
         listing_payload = {
-            "owner_user_id": resolved_owner_id,
+            "owner_user_id": ctx.owner_user_id,
             "developer_id": None,
             "title": title,
             "title_ar": title,
@@ -192,233 +426,560 @@ def import_resale(
             "amenities": amenities,
             "status": "draft",
             "submission_status": "submitted",
-            "hr_owner_user_id": hr_owner_user_id,
+            "hr_owner_user_id": ctx.hr_owner_user_id,
             "unit_code": unit_code,
             "inventory_source": "resale",
         }
 
         intake_payload = {
             "listing_id": None,
-            "agent_name": _normalize_text(payload.get("agent")),
-            "owner_name": owner_name,
-            "owner_phone": owner_phone,
+            "agent_name": cols["agent"][pos],
+            "owner_name": cols["owner_name"][pos],
+            "owner_phone": cols["owner_phone"][pos],
+            "owner_phone_e164": phones_e164[pos],
             "unit_code": unit_code,
-            "floor": floor,
+            "floor": cols["floor"][pos],
             "size_m2": size_m2,
             "elevator": elevator,
-            "finishing": finishing,
-            "meters": meters,
+            "finishing": cols["finishing"][pos],
+            "meters": cols["meters"][pos],
             "bedrooms": bedrooms,
-            "reception": reception,
+            "reception": cols["reception"][pos],
             "bathrooms": bathrooms,
             "kitchen": kitchen,
-            "view": view,
-            "building": building,
-            "has_images": has_images,
-            "entrance": entrance,
-            "commission": commission,
+            "view": cols["view"][pos],
+            "building": cols["building"][pos],
+            "has_images": cols["has_images"][pos],
+            "entrance": cols["entrance"][pos],
+            "commission": cols["commission"][pos],
             "intake_date": intake_date,
-            "target": target,
-            "ad_channel": ad_channel,
+            "target": cols["target"][pos],
+            "ad_channel": cols["ad_channel"][pos],
             "address": address,
             "area": area,
             "city": city,
             "price": price,
             "currency": currency,
             "notes": notes,
-            "raw_payload": payload,
-            "created_by": hr_owner_user_id or resolved_owner_id,
+            "raw_payload": raw_rows[pos],
+            "created_by": ctx.hr_owner_user_id or ctx.owner_user_id,
         }
+        # Rows without a unit code are given one when written, so re-uploads of
+        # such a row still hash the same.
+        intake_payload["row_fingerprint"] = payload_fingerprint(listing_payload, intake_payload)
+        rows.append((int(row_numbers[pos]), listing_payload, intake_payload))
+    return PreparedChunk(sheet, mapping, scores, rows, errors, int(failed.sum()))
 
-        if dry_run:
-            report.rows_inserted += 1
-            continue
 
-        existing_id = _find_existing_resale(client, unit_code, address, owner_phone, price)
-        if existing_id:
-            execute(client.table("listings").update(listing_payload).eq("id", existing_id))
-            intake_payload["listing_id"] = existing_id
-            execute(
-                client.table("resale_intake").upsert(intake_payload, on_conflict="listing_id")
+def _prepare_part(
+    prepare: Callable[..., PreparedChunk],
+    args: tuple[Any, ...],
+    source: bytes | str,
+    filename: str,
+    part: str | None,
+    chunk_rows: int,
+    all_sheets: bool,
+    excel_engine: str | None,
+) -> list[PreparedChunk]:
+    # One archive member or one workbook sheet, read and prepared in a worker.
+    # Without a part, `source` is the content of the archive member `filename`.
+    if part is None:
+        chunks = iter_member_data_chunks(source, filename, chunk_rows, all_sheets, excel_engine)
+    elif is_archive(filename):
+        chunks = iter_member_chunks(source, part, chunk_rows, all_sheets, excel_engine)
+    else:
+        chunks = iter_sheet_chunks(source, filename, chunk_rows, [part], excel_engine)
+    return [prepare(sheet, df, *args) for sheet, df in chunks]
+
+
+def _prepared_chunks(
+    prepare: Callable[..., PreparedChunk],
+    args: tuple[Any, ...],
+    source: bytes | BinaryIO,
+    filename: str,
+    all_sheets: bool,
+    parallel: bool,
+    excel_engine: str | None,
+) -> Iterator[PreparedChunk]:
+    # Members of a zip, and the sheets of a workbook in parallel mode, are read
+    # and prepared whole by pool workers; otherwise chunks are read here and
+    # only prepared in workers (or inline when not parallel).
+    chunk_rows = settings.import_chunk_rows
+    if is_archive(filename):
+        parts = list_archive_members(source)
+    else:
+        parts = list_sheets(source, filename, excel_engine) if all_sheets and parallel else []
+    if len(parts) > 1 and (parallel or is_archive(filename)):
+        if is_archive(filename) and source_path(source) is None:
+            # No file on disk to reopen: send each worker its own member, read
+            # here as its task is submitted, rather than the whole archive.
+            tasks = (
+                (prepare, args, read_archive_member(source, part), part, None, chunk_rows, all_sheets, excel_engine)
+                for part in parts
             )
-            report.rows_updated += 1
         else:
-            inserted = execute(client.table("listings").insert(listing_payload)).data
-            listing_id = inserted[0]["id"]
-            intake_payload["listing_id"] = listing_id
-            execute(client.table("resale_intake").insert(intake_payload))
-            report.rows_inserted += 1
+            detached = worker_source(source)
+            tasks = (
+                (prepare, args, detached, filename, part, chunk_rows, all_sheets, excel_engine) for part in parts
+            )
+        with closing(map_ordered(_prepare_part, tasks, True)) as results:
+            for chunks in results:
+                yield from chunks
+        return
+
+    tasks = (
+        (sheet, df, *args)
+        for sheet, df in iter_source_chunks(source, filename, chunk_rows, all_sheets, excel_engine)
+    )
+    with closing(map_ordered(prepare, tasks, parallel)) as results:
+        yield from results
 
-    return report
 
+def _empty_report(mapping: dict[str, str], scores: dict[str, float]) -> ImportReport:
+    return ImportReport(
+        rows_total=0,
+        rows_inserted=0,
+        rows_updated=0,
+        rows_failed=0,
+        mapping=mapping,
+        mapping_scores=scores,
+        errors=[],
+    )
 
-def _find_project(client, developer_id: str, project_code: str | None, project_title: str | None) -> str | None:
-    if project_code:
-        found = execute(
-            client.table("projects")
-            .select("id")
-            .eq("developer_id", developer_id)
-            .eq("project_code", project_code)
-            .limit(1)
-        ).data
-        if found:
-            return found[0]["id"]
-    if project_title:
-        found = execute(
-            client.table("projects")
-            .select("id")
-            .eq("developer_id", developer_id)
-            .eq("title_ar", project_title)
-            .limit(1)
-        ).data
-        if found:
-            return found[0]["id"]
-    return None
 
+def _options_hash(options: dict[str, Any]) -> str:
+    return hashlib.sha256(json.dumps(options, sort_keys=True, default=str).encode("utf-8")).hexdigest()
 
-def _find_existing_project_unit(client, unit_code: str | None, project_id: str) -> str | None:
-    if unit_code:
-        found = execute(
-            client.table("listings")
-            .select("id")
-            .eq("project_id", project_id)
-            .eq("unit_code", unit_code)
-            .limit(1)
-        ).data
-        if found:
-            return found[0]["id"]
-    return None
 
+def _find_imported_file(client, kind: str, sha256: str, options_hash: str) -> ImportReport | None:
+    found = execute(
+        client.table("import_files")
+        .select("report")
+        .eq("kind", kind)
+        .eq("sha256", sha256)
+        .eq("options_hash", options_hash)
+        .limit(1)
+    ).data
+    if not found:
+        return None
+    report = ImportReport.model_validate(found[0]["report"])
+    return report.model_copy(
+        update={
+            "rows_inserted": 0,
+            "rows_updated": 0,
+            "rows_unchanged": report.rows_inserted + report.rows_updated + report.rows_unchanged,
+            "duplicates": [],
+            "duplicates_total": 0,
+            "duplicate_counts": {},
+            "file_already_imported": True,
+        }
+    )
 
-def import_projects(
-    file_bytes: bytes,
+
+def _record_imported_file(
+    client, kind: str, filename: str, sha256: str, options_hash: str, report: ImportReport
+) -> None:
+    execute(
+        client.table("import_files").upsert(
+            {
+                "kind": kind,
+                "sha256": sha256,
+                "options_hash": options_hash,
+                "filename": filename,
+                "report": report.model_dump(mode="json"),
+                "updated_at": datetime.now(timezone.utc).isoformat(),
+            },
+            on_conflict="kind,sha256,options_hash",
+        )
+    )
+
+
+def _previous_import(
+    client, kind: str, source: bytes | BinaryIO, options: dict[str, Any], force: bool, errors: ImportErrorLog
+) -> tuple[tuple[str, str], ImportReport | None]:
+    # An upload identical to one already imported with the same options is
+    # answered from the stored report instead of being re-read and re-written.
+    file_key = (file_sha256(source), _options_hash(options))
+    previous = None if force else _find_imported_file(client, kind, *file_key)
+    if previous:
+        for error in previous.errors:
+            errors.add(error.row, error.field, error.message, error.sheet)
+    return file_key, previous
+
+
+def _publish_errors(report: ImportReport, errors: ImportErrorLog) -> None:
+    report.errors = errors.samples()
+    report.errors_total = len(errors)
+    report.error_counts = errors.counts()
+
+
+def _record_throughput(kind: str, report: ImportReport, started: float) -> None:
+    rows = {
+        "inserted": report.rows_inserted,
+        "updated": report.rows_updated,
+        "unchanged": report.rows_unchanged,
+        "superseded": report.rows_superseded,
+        "failed": report.rows_failed,
+    }
+    metrics.record_import(kind, rows, time.perf_counter() - started)
+
+
+def _fail_all(
+    errors: ImportErrorLog, chunks: Iterator[tuple[str | None, pd.DataFrame]], field: str, message: str
+) -> ImportReport:
+    report: ImportReport | None = None
+    total = 0
+    for _, df in chunks:
+        if report is None:
+            mapping, _, scores = match_headers(df.columns)
+            report = _empty_report(mapping, scores)
+        total += len(df.index)
+    report = report or _empty_report({}, {})
+    errors.add(0, field, message)
+    report.rows_total = report.rows_failed = total
+    _publish_errors(report, errors)
+    return report
+
+
+def import_resale(
+    source: bytes | BinaryIO,
     filename: str,
-    developer_id: str | None,
     owner_user_id: str | None,
+    hr_owner_user_id: str | None,
+    default_city: str | None,
+    default_purpose: str | None,
     dry_run: bool,
+    on_progress: Callable[[ImportReport], None] | None = None,
+    parallel: bool = False,
+    error_log: ImportErrorLog | None = None,
+    force: bool = False,
+    excel_engine: str | None = None,
 ) -> ImportReport:
-    if not developer_id:
-        raise ValueError("developer_id is required for project import.")
-    if not owner_user_id:
-        raise ValueError("owner_user_id is required for project import.")
-
+    started = time.perf_counter()
     client = get_service_client()
-    df = read_table(file_bytes, filename)
-    mapping, _ = map_headers(df.columns)
-
-    required = {"type", "price"}
-    missing = required - set(mapping.keys())
+    log = error_log if error_log is not None else ImportErrorLog(settings.import_error_samples)
+    file_key = None
+    if not dry_run:
+        options = {
+            "owner_user_id": owner_user_id,
+            "hr_owner_user_id": hr_owner_user_id,
+            "default_city": default_city,
+            "default_purpose": default_purpose,
+        }
+        file_key, previous = _previous_import(client, "resale", source, options, force, log)
+        if previous:
+            return previous
 
-    report = ImportReport(
-        rows_total=len(df.index),
-        rows_inserted=0,
-        rows_updated=0,
-        rows_failed=0,
-        mapping=mapping,
-        errors=[],
+    try:
+        resolved_owner_id = _ensure_owner_user_id(owner_user_id)
+    except ValueError as exc:
+        chunks = iter_source_chunks(source, filename, settings.import_chunk_rows, engine=excel_engine)
+        return _fail_all(log, chunks, "owner_user_id", str(exc))
+
+    ctx = ResaleContext(
+        owner_user_id=resolved_owner_id,
+        hr_owner_user_id=hr_owner_user_id,
+        default_city=default_city,
+        default_purpose=default_purpose or settings.default_purpose,
+        default_currency=settings.default_currency,
     )
+    report: ImportReport | None = None
+    dedup = DuplicateIndex(settings.dedup_block_limit)
+    prepared = _prepared_chunks(_prepare_resale_rows, (ctx,), source, filename, False, parallel, excel_engine)
+    with closing(prepared) as chunks:
+        for chunk in chunks:
+            if report is None:
+                report = _empty_report(chunk.mapping, chunk.scores)
+            report.rows_total += len(chunk.rows) + chunk.failed
+            log.merge(chunk.errors)
+            report.rows_failed += chunk.failed
+
+            if dry_run:
+                report.rows_inserted += len(chunk.rows)
+                _flag_dry_run_duplicates(client, dedup, chunk.sheet, chunk.rows, report)
+            else:
+                # Lookups and writes are batched inside; the whole chunk goes in
+                # at once so repeated units collapse across batch boundaries.
+                _write_resale_rows(client, chunk.rows, report, dedup, chunk.sheet)
+            if on_progress:
+                _publish_errors(report, log)
+                on_progress(report)
+    report = report or _empty_report({}, {})
+    _publish_errors(report, log)
+    if file_key:
+        report.file_sha256 = file_key[0]
+        _record_imported_file(client, "resale", filename, *file_key, report)
+    if not dry_run:
+        _record_throughput("resale", report, started)
+    return report
 
-    if missing:
-        report.errors.append(
-            ImportRowError(row=0, field="headers", message=f"Missing required headers: {sorted(missing)}")
+
+PROJECT_COLUMNS = {
+    "project_title": "text",
+    "project_code": "text",
+    "project_city": "text",
+    "project_area": "text",
+    "type": "text",
+    "price": "float",
+    "unit_code": "text",
+    "bedrooms": "int",
+    "bathrooms": "int",
+    "size_m2": "float",
+    "area": "text",
+    "city": "text",
+    "address": "text",
+    "currency": "text",
+    "notes": "text",
+}
+
+
+@dataclass
+class DeveloperCatalog:
+    projects_by_code: dict[str, str | int] = field(default_factory=dict)
+    projects_by_title: dict[str, str | int] = field(default_factory=dict)
+    units: dict[tuple[str, str], str] = field(default_factory=dict)
+
+
+def _load_developer_catalog(client, developer_id: str) -> DeveloperCatalog:
+    catalog = DeveloperCatalog()
+    projects = fetch_all(
+        lambda: client.table("projects")
+        .select("id, project_code, title_ar")
+        .eq("developer_id", developer_id)
+        .order("id")
+    )
+    for project in projects:
+        if project.get("project_code"):
+            catalog.projects_by_code.setdefault(project["project_code"], project["id"])
+        if project.get("title_ar"):
+            catalog.projects_by_title.setdefault(project["title_ar"], project["id"])
+
+    project_ids = [project["id"] for project in projects]
+    for chunk in chunked(project_ids, settings.import_batch_size):
+        units = fetch_all(
+            lambda: client.table("listings")
+            .select("id, project_id, unit_code")
+            .in_("project_id", chunk)
+            .order("id")
         )
-        report.rows_failed = report.rows_total
-        return report
-
-    project_cache: dict[str, str] = {}
-
-    for idx, row in df.iterrows():
-        row_number = idx + 2
-        payload = build_row_payload(row, mapping)
-        errors: list[ImportRowError] = []
-
-        project_title = _normalize_text(payload.get("project_title"))
-        project_code = _normalize_text(payload.get("project_code"))
-        unit_type = _normalize_text(payload.get("type"))
-        price = parse_float(payload.get("price"))
-        if not project_title and not project_code:
-            errors.append(
-                ImportRowError(row=row_number, field="project_title", message="Missing project title or code.")
-            )
-        if not unit_type:
-            errors.append(ImportRowError(row=row_number, field="type", message="Missing unit type."))
-        if price is None:
-            errors.append(ImportRowError(row=row_number, field="price", message="Invalid price."))
-
-        if errors:
-            report.errors.extend(errors)
-            report.rows_failed += 1
-            continue
+        for unit in units:
+            catalog.units.setdefault((unit["project_id"], unit["unit_code"]), unit["id"])
+    return catalog
 
-        cache_key = project_code or project_title
-        project_id = project_cache.get(cache_key)
-        if not project_id:
-            project_id = _find_project(client, developer_id, project_code, project_title)
-        if not project_id:
-            project_payload = {
-                "developer_id": developer_id,
-                "owner_user_id": owner_user_id,
-                "project_code": project_code,
-                "title_ar": project_title,
-                "title_en": project_title,
-                "description_ar": None,
-                "description_en": None,
-                "city": _normalize_text(payload.get("project_city")),
-                "area": _normalize_text(payload.get("project_area")),
-                "submission_status": "submitted",
-                "developer_payload": payload,
-            }
-            if not dry_run:
-                inserted = execute(client.table("projects").insert(project_payload)).data
-                project_id = inserted[0]["id"]
-            else:
-                project_id = "dry-run"
-        project_cache[cache_key] = project_id
-
-        unit_code = _normalize_text(payload.get("unit_code")) or _generate_unit_code("PR")
-        beds = parse_int(payload.get("bedrooms")) or 0
-        baths = parse_int(payload.get("bathrooms")) or 0
-        size_m2 = parse_float(payload.get("size_m2"))
-        area = _normalize_text(payload.get("area"))
-        city = _normalize_text(payload.get("city")) or _normalize_text(payload.get("project_city")) or area
-        address = _normalize_text(payload.get("address"))
+
+def _resolve_projects(
+    client,
+    catalog: DeveloperCatalog,
+    requests: list[tuple[str | None, str | None, dict[str, Any]]],
+    dry_run: bool,
+) -> list[str | None]:
+    # Projects first seen in this chunk get a pending slot (an int) so later rows
+    # with the same code or title share it; all of them are created in one bulk
+    # insert and the slots are swapped for real ids afterwards.
+    new_projects: list[dict[str, Any]] = []
+    slots: list[str | int] = []
+    for project_code, project_title, project_payload in requests:
+        found = None
+        if project_code:
+            found = catalog.projects_by_code.get(project_code)
+        if found is None and project_title:
+            found = catalog.projects_by_title.get(project_title)
+        if found is None:
+            found = len(new_projects)
+            new_projects.append(project_payload)
+        if project_code:
+            catalog.projects_by_code.setdefault(project_code, found)
+        if project_title:
+            catalog.projects_by_title.setdefault(project_title, found)
+        slots.append(found)
+
+    if dry_run:
+        return [None] * len(slots)
+
+    created: list[str] = []
+    for chunk in chunked(new_projects, settings.import_batch_size):
+        created.extend(row["id"] for row in execute(client.table("projects").insert(chunk)).data)
+    for index in (catalog.projects_by_code, catalog.projects_by_title):
+        for name, slot in index.items():
+            if isinstance(slot, int):
+                index[name] = created[slot]
+    return [created[slot] if isinstance(slot, int) else slot for slot in slots]
+
+
+def _write_project_units(
+    client, catalog: DeveloperCatalog, listings: list[dict[str, Any]], report: ImportReport
+) -> None:
+    inserts: list[dict[str, Any]] = []
+    updates: dict[str, dict[str, Any]] = {}
+    pending: dict[tuple[str, str], int] = {}
+    uncoded = [listing for listing in listings if not listing["unit_code"]]
+    for listing_payload, code in zip(uncoded, allocate_unit_codes(client, "PR", len(uncoded))):
+        listing_payload["unit_code"] = code
+    for listing_payload in listings:
+        key = (listing_payload["project_id"], listing_payload["unit_code"])
+        existing_id = catalog.units.get(key)
+        if existing_id:
+            updates[existing_id] = listing_payload
+            report.rows_updated += 1
+        elif key in pending:
+            inserts[pending[key]] = listing_payload
+            report.rows_updated += 1
+        else:
+            pending[key] = len(inserts)
+            inserts.append(listing_payload)
+            report.rows_inserted += 1
+
+    batch_size = settings.import_batch_size
+    for chunk in chunked(inserts, batch_size):
+        inserted = execute(client.table("listings").insert(chunk)).data
+        for row in inserted:
+            catalog.units.setdefault((row["project_id"], row["unit_code"]), row["id"])
+    _update_listings(client, [{**listing, "id": listing_id} for listing_id, listing in updates.items()])
+
+
+def _prepare_project_rows(
+    sheet: str | None, df: pd.DataFrame, developer_id: str, owner_user_id: str
+) -> PreparedChunk:
+    mapping, _, scores = match_headers(df.columns)
+    rejected = _missing_headers(sheet, df, mapping, scores, {"type", "price"})
+    if rejected:
+        return rejected
+
+    cols = transform_columns(df, mapping, PROJECT_COLUMNS)
+    raw_rows = row_records(df, mapping)
+    row_numbers = df.index.to_numpy() + 2
+    failed, errors = collect_row_errors(
+        row_numbers,
+        [
+            (
+                "project_title",
+                is_missing(cols["project_title"]) & is_missing(cols["project_code"]),
+                "Missing project title or code.",
+            ),
+            ("type", is_missing(cols["type"]), "Missing unit type."),
+            ("price", is_missing(cols["price"]), "Invalid price."),
+        ],
+        sheet,
+    )
+
+    rows = []
+    for pos in np.flatnonzero(~failed):
+        unit_type = cols["type"][pos]
+        area = cols["area"][pos]
         title = _build_title(unit_type, area)
+        project_payload = {
+            "developer_id": developer_id,
+            "owner_user_id": owner_user_id,
+            "project_code": cols["project_code"][pos],
+            "title_ar": cols["project_title"][pos],
+            "title_en": cols["project_title"][pos],
+            "description_ar": None,
+            "description_en": None,
+            "city": cols["project_city"][pos],
+            "area": cols["project_area"][pos],
+            "submission_status": "submitted",
+            "developer_payload": raw_rows[pos],
+        }
         listing_payload = {
             "owner_user_id": owner_user_id,
             "developer_id": developer_id,
-            "project_id": project_id if project_id != "dry-run" else None,
+            "project_id": None,
             "title": title,
             "title_ar": title,
             "title_en": title,
             "type": unit_type,
             "purpose": "new-development",
-            "price": price,
-            "currency": _normalize_text(payload.get("currency")) or settings.default_currency,
-            "city": city,
+            "price": cols["price"][pos],
+            "currency": cols["currency"][pos] or settings.default_currency,
+            "city": cols["city"][pos] or cols["project_city"][pos] or area,
             "area": area,
-            "address": address,
-            "beds": beds,
-            "baths": baths,
-            "size_m2": size_m2,
-            "description": _normalize_text(payload.get("notes")),
+            "address": cols["address"][pos],
+            "beds": cols["bedrooms"][pos] or 0,
+            "baths": cols["bathrooms"][pos] or 0,
+            "size_m2": cols["size_m2"][pos],
+            "description": cols["notes"][pos],
             "amenities": [],
             "status": "draft",
             "submission_status": "submitted",
-            "unit_code": unit_code,
+            "unit_code": cols["unit_code"][pos],
             "inventory_source": "project",
-            "developer_payload": payload,
+            "developer_payload": raw_rows[pos],
         }
+        rows.append((cols["project_code"][pos], cols["project_title"][pos], project_payload, listing_payload))
+    return PreparedChunk(sheet, mapping, scores, rows, errors, int(failed.sum()))
 
-        if dry_run:
-            report.rows_inserted += 1
-            continue
 
-        existing_id = _find_existing_project_unit(client, unit_code, project_id)
-        if existing_id:
-            execute(client.table("listings").update(listing_payload).eq("id", existing_id))
-            report.rows_updated += 1
-        else:
-            execute(client.table("listings").insert(listing_payload))
-            report.rows_inserted += 1
+def import_projects(
+    source: bytes | BinaryIO,
+    filename: str,
+    developer_id: str | None,
+    owner_user_id: str | None,
+    dry_run: bool,
+    on_progress: Callable[[ImportReport], None] | None = None,
+    all_sheets: bool = False,
+    parallel: bool = False,
+    error_log: ImportErrorLog | None = None,
+    force: bool = False,
+    excel_engine: str | None = None,
+) -> ImportReport:
+    if not developer_id:
+        raise ValueError("developer_id is required for project import.")
+    if not owner_user_id:
+        raise ValueError("owner_user_id is required for project import.")
 
+    started = time.perf_counter()
+    client = get_service_client()
+    log = error_log if error_log is not None else ImportErrorLog(settings.import_error_samples)
+    file_key = None
+    if not dry_run:
+        options = {"developer_id": developer_id, "owner_user_id": owner_user_id, "all_sheets": all_sheets}
+        file_key, previous = _previous_import(client, "projects", source, options, force, log)
+        if previous:
+            return previous
+    report: ImportReport | None = None
+    catalog: DeveloperCatalog | None = DeveloperCatalog() if dry_run else None
+    prepared = _prepared_chunks(
+        _prepare_project_rows, (developer_id, owner_user_id), source, filename, all_sheets, parallel, excel_engine
+    )
+    with closing(prepared) as chunks:
+        for chunk in chunks:
+            if report is None:
+                report = _empty_report(chunk.mapping, chunk.scores)
+            report.rows_total += len(chunk.rows) + chunk.failed
+            log.merge(chunk.errors)
+            report.rows_failed += chunk.failed
+            if chunk.rows:
+                if catalog is None:
+                    catalog = _load_developer_catalog(client, developer_id)
+                _write_project_chunk(client, catalog, chunk.rows, dry_run, report)
+            if on_progress:
+                _publish_errors(report, log)
+                on_progress(report)
+    report = report or _empty_report({}, {})
+    _publish_errors(report, log)
+    if file_key:
+        report.file_sha256 = file_key[0]
+        _record_imported_file(client, "projects", filename, *file_key, report)
+    if not dry_run:
+        _record_throughput("projects", report, started)
     return report
+
+
+def _write_project_chunk(
+    client,
+    catalog: DeveloperCatalog,
+    rows: list[tuple[str | None, str | None, dict[str, Any], dict[str, Any]]],
+    dry_run: bool,
+    report: ImportReport,
+) -> None:
+    project_ids = _resolve_projects(
+        client, catalog, [(code, title, project) for code, title, project, _ in rows], dry_run
+    )
+
+    if dry_run:
+        report.rows_inserted += len(rows)
+        return
+
+    listings = [{**listing, "project_id": project_id} for (_, _, _, listing), project_id in zip(rows, project_ids)]
+    for batch in chunked(listings, settings.import_batch_size):
+        _write_project_units(client, catalog, batch, report)
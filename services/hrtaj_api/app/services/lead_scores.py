@@ -0,0 +1,116 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable
+
+import pandas as pd
+
+from app.config import settings
+from app.db import chunked, execute, get_service_client
+from app.logging import get_logger
+from app.services.lead_service import LEAD_SCORE_FIELDS, fetch_listing_prices, score_batch
+
+logger = get_logger(__name__)
+
+# Age boundaries of the scoring rules; a lead's score can change when it passes one.
+AGE_BOUNDARIES = [timedelta(hours=24), timedelta(days=7)]
+REFRESH_FIELDS = ", ".join([*LEAD_SCORE_FIELDS, "updated_at"])
+
+
+def _now() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+def _score_expiry(created_at: pd.Series, now: datetime) -> list[str | None]:
+    created = pd.to_datetime(created_at, utc=True, errors="coerce", format="ISO8601")
+    expires = pd.Series(pd.NaT, index=created.index, dtype="datetime64[ns, UTC]")
+    # Nearest boundary last, so it wins where several are still ahead.
+    for boundary in reversed(AGE_BOUNDARIES):
+        ahead = created + boundary
+        expires = expires.mask(ahead > pd.Timestamp(now), ahead)
+    return [None if pd.isna(value) else value.isoformat() for value in expires]
+
+
+def _score_rows(client, leads: list[dict[str, Any]], now: datetime) -> list[dict[str, Any]]:
+    scores = score_batch(leads, fetch_listing_prices(client, leads))
+    expiry = _score_expiry(pd.Series([lead.get("created_at") for lead in leads], dtype=object), now)
+    return [
+        {
+            "id": result.lead_id,
+            "score": result.score,
+            "score_label": result.label,
+            "score_next_action": result.recommended_next_action,
+            # The updated_at that was read, not now(): an edit made meanwhile
+            # leaves the lead stale, so it is scored again next time.
+            "scored_at": lead["updated_at"],
+            "score_expires_at": expires_at,
+        }
+        for lead, result, expires_at in zip(leads, scores, expiry)
+    ]
+
+
+def _rescore(client, narrow: Callable[[Any], Any], now: datetime) -> int:
+    # Pages by id; rows written in earlier pages drop out of the filter
+    # without shifting later pages.
+    size = settings.lead_batch_size
+    written = 0
+    last_id: str | None = None
+    while True:
+        query = narrow(client.table("leads").select(REFRESH_FIELDS))
+        if last_id is not None:
+            query = query.gt("id", last_id)
+        leads = execute(query.order("id").limit(size)).data or []
+        if leads:
+            rows = _score_rows(client, leads, now)
+            for chunk in chunked(rows, size):
+                written += int(execute(client.rpc("apply_lead_scores", {"scores": chunk})).data or 0)
+            last_id = leads[-1]["id"]
+        if len(leads) < size:
+            return written
+
+
+def refresh_lead_scores() -> dict[str, int]:
+    # Stale leads: never scored, edited since (updated_at > scored_at) or on a
+    # listing whose price changed (the listings trigger clears scored_at).
+    # Decayed leads: crossed a 24h / 7d age boundary since they were scored.
+    client = get_service_client()
+    now = _now()
+    stale = _rescore(client, lambda query: query.eq("score_stale", True), now)
+    decayed = _rescore(client, lambda query: query.lte("score_expires_at", now.isoformat()), now)
+    if stale or decayed:
+        logger.info("Lead scores refreshed (stale=%s, decayed=%s)", stale, decayed)
+    return {"stale": stale, "decayed": decayed}
+
+
+class LeadScoreRefresher:
+    def __init__(self, interval_seconds: float):
+        self.interval_seconds = interval_seconds
+        self.last_run: dict[str, Any] | None = None
+        self._task: asyncio.Task | None = None
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                counts = await asyncio.to_thread(refresh_lead_scores)
+                self.last_run = {**counts, "finished_at": _now().isoformat()}
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("Lead score refresh failed")
+            await asyncio.sleep(self.interval_seconds)
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+            logger.info("Lead score refresher started (interval=%ss)", self.interval_seconds)
+
+    async def stop(self) -> None:
+        task, self._task = self._task, None
+        if task is not None:
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+
+
+lead_score_refresher = LeadScoreRefresher(settings.lead_score_refresh_seconds)
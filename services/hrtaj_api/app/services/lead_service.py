@@ -1,41 +1,101 @@
+import asyncio
+import heapq
+import threading
 from collections import Counter
 from datetime import datetime, timedelta, timezone
-from typing import Any
+from typing import Any, Iterator
 
-from app.db import execute, get_service_client
+import numpy as np
+import pandas as pd
+
+from app.cache import TTLCache
+from app.config import settings
+from app.db import (
+    chunked,
+    execute,
+    execute_async,
+    fetch_all,
+    get_async_service_client,
+    get_service_client,
+    iter_keyset_pages_async,
+)
 from app.logging import get_logger
-from app.schemas import LeadRouteRequest, LeadRouteResult, LeadScoreResult
+from app.schemas import (
+    LeadBatchScore,
+    LeadBatchAssignment,
+    LeadRouteBatchRequest,
+    LeadRouteBatchResult,
+    LeadRouteRequest,
+    LeadRouteResult,
+    LeadScoreBatchRequest,
+    LeadScoreResult,
+)
+from app.services.assignment_load import assignment_loads
+from app.services.sla_monitor import SLA_FIELDS, sla_monitor
 
 logger = get_logger(__name__)
 
+_routing_lock = threading.Lock()
+
+PRIORITY_SOURCES = {"campaign", "partner", "referral"}
+NEXT_ACTIONS = {"hot": "call_within_2_hours", "warm": "follow_up_today", "cold": "qualify_later"}
+LEAD_SCORE_FIELDS = ["id", "listing_id", "phone", "email", "source", "created_at"]
+
+# Routing candidates change a few times a week, so they are cached per process:
+# ("staff",) for admin/ops profiles and ("developer", id) for a developer's members.
+candidate_cache = TTLCache(
+    "routing_candidates", settings.candidate_cache_max_entries, settings.candidate_cache_ttl_seconds
+)
+
 
 def _now() -> datetime:
     return datetime.now(timezone.utc)
 
 
-def score_lead(lead_id: str | None, listing_id: str | None, source: str | None, price: float | None) -> LeadScoreResult:
-    client = get_service_client()
+async def _fetch_one(query) -> dict[str, Any] | None:
+    rows = (await execute_async(query)).data
+    return rows[0] if rows else None
+
+
+def _listing_price_query(client, listing_id: str):
+    return client.table("listings").select("price, inventory_source").eq("id", listing_id).limit(1)
+
+
+async def score_lead(
+    lead_id: str | None, listing_id: str | None, source: str | None, price: float | None
+) -> LeadScoreResult:
+    client = await get_async_service_client()
     lead = None
     listing = None
-    if lead_id:
-        lead_resp = execute(client.table("leads").select("*").eq("id", lead_id).limit(1)).data
-        lead = lead_resp[0] if lead_resp else None
-        listing_id = listing_id or (lead.get("listing_id") if lead else None)
-        source = source or (lead.get("source") if lead else None)
+    lead_query = client.table("leads").select("*").eq("id", lead_id).limit(1) if lead_id else None
+    if lead_query is not None and listing_id:
+        # Both ids are known up front, so fetch the lead and listing concurrently.
+        lead, listing = await asyncio.gather(
+            _fetch_one(lead_query),
+            _fetch_one(_listing_price_query(client, listing_id)),
+        )
+    elif lead_query is not None:
+        lead = await _fetch_one(lead_query)
+        listing_id = lead.get("listing_id") if lead else None
+        if listing_id:
+            listing = await _fetch_one(_listing_price_query(client, listing_id))
+    elif listing_id:
+        listing = await _fetch_one(_listing_price_query(client, listing_id))
+    if lead:
+        source = source or lead.get("source")
     if listing_id:
-        listing_resp = execute(
-            client.table("listings").select("price, inventory_source").eq("id", listing_id).limit(1)
-        ).data
-        listing = listing_resp[0] if listing_resp else None
         price = price or (listing.get("price") if listing else None)
+    return _score(lead, source, price)
+
 
+def _score(lead: dict[str, Any] | None, source: str | None, price: float | None) -> LeadScoreResult:
     score = 0
     if lead:
         if lead.get("phone"):
             score += 30
         if lead.get("email"):
             score += 20
-    if source and source.lower() in {"campaign", "partner", "referral"}:
+    if source and source.lower() in PRIORITY_SOURCES:
         score += 15
     if lead and lead.get("created_at"):
         created = datetime.fromisoformat(lead["created_at"].replace("Z", "+00:00"))
@@ -48,24 +108,121 @@ def score_lead(lead_id: str | None, listing_id: str | None, source: str | None,
 
     score = min(score, 100)
     label = "hot" if score >= 80 else "warm" if score >= 50 else "cold"
-    recommended = "call_within_2_hours" if label == "hot" else "follow_up_today" if label == "warm" else "qualify_later"
-    return LeadScoreResult(score=score, label=label, recommended_next_action=recommended)
+    return LeadScoreResult(score=score, label=label, recommended_next_action=NEXT_ACTIONS[label])
 
 
-def _candidate_staff(client) -> list[str]:
+def _iter_lead_batches(client, request: LeadScoreBatchRequest) -> Iterator[list[dict[str, Any]]]:
+    size = settings.lead_batch_size
+    columns = ", ".join(LEAD_SCORE_FIELDS)
+    if request.lead_ids is not None:
+        lead_ids = request.lead_ids[: request.limit] if request.limit else request.lead_ids
+        for chunk in chunked(lead_ids, size):
+            found = fetch_all(
+                lambda: client.table("leads").select(columns).in_("id", sorted(set(chunk))).order("id")
+            )
+            by_id = {row["id"]: row for row in found}
+            # Unknown ids score like a lead that has no data, as /score does.
+            yield [by_id.get(lead_id) or {"id": lead_id} for lead_id in chunk]
+        return
+
+    # Filtered batches page by id instead of offset, so each page is an index
+    # range scan however deep into the table it is.
+    last_id: str | None = None
+    remaining = request.limit
+    while remaining is None or remaining > 0:
+        query = client.table("leads").select(columns)
+        if request.status:
+            query = query.eq("status", request.status)
+        if request.source:
+            query = query.eq("source", request.source)
+        if request.created_since:
+            query = query.gte("created_at", request.created_since)
+        if last_id is not None:
+            query = query.gt("id", last_id)
+        page_size = size if remaining is None else min(size, remaining)
+        rows = execute(query.order("id").limit(page_size)).data or []
+        if rows:
+            yield rows
+        if len(rows) < page_size:
+            return
+        last_id = rows[-1]["id"]
+        if remaining is not None:
+            remaining -= len(rows)
+
+
+def fetch_listing_prices(client, leads: list[dict[str, Any]]) -> dict[str, Any]:
+    prices: dict[str, Any] = {}
+    listing_ids = sorted({lead["listing_id"] for lead in leads if lead.get("listing_id")})
+    for chunk in chunked(listing_ids, settings.lead_batch_size):
+        found = fetch_all(lambda: client.table("listings").select("id, price").in_("id", chunk).order("id"))
+        prices.update((row["id"], row.get("price")) for row in found)
+    return prices
+
+
+def _truthy(values: pd.Series) -> np.ndarray:
+    return (values.notna() & values.astype(bool)).to_numpy()
+
+
+def score_batch(leads: list[dict[str, Any]], prices: dict[str, Any]) -> list[LeadBatchScore]:
+    # Same rules as _score, applied to the whole batch at once.
+    frame = pd.DataFrame.from_records(leads, columns=LEAD_SCORE_FIELDS)
+    score = np.where(_truthy(frame["phone"]), 30, 0) + np.where(_truthy(frame["email"]), 20, 0)
+    source = frame["source"].astype("string").str.lower()
+    score += np.where(source.isin(PRIORITY_SOURCES).fillna(False).to_numpy(dtype=bool), 15, 0)
+    created = pd.to_datetime(frame["created_at"], utc=True, errors="coerce", format="ISO8601")
+    age = pd.Timestamp(_now()) - created
+    score += np.select(
+        [(age < pd.Timedelta(hours=24)).to_numpy(), (age < pd.Timedelta(days=7)).to_numpy()], [15, 5], 0
+    )
+    price = pd.to_numeric(frame["listing_id"].map(prices), errors="coerce")
+    score += np.where((price > 0).to_numpy(), 10, 0)
+    score = np.minimum(score, 100)
+    labels = np.select([score >= 80, score >= 50], ["hot", "warm"], "cold")
+    return [
+        LeadBatchScore(lead_id=lead_id, score=value, label=label, recommended_next_action=NEXT_ACTIONS[label])
+        for lead_id, value, label in zip(frame["id"].tolist(), score.tolist(), labels.tolist())
+    ]
+
+
+def score_leads(request: LeadScoreBatchRequest) -> Iterator[LeadBatchScore]:
+    client = get_service_client()
+    for leads in _iter_lead_batches(client, request):
+        yield from score_batch(leads, fetch_listing_prices(client, leads))
+
+
+def _load_staff(client) -> tuple[str, ...]:
     profiles = execute(
         client.table("profiles").select("id, role").in_("role", ["admin", "ops"])
     ).data
-    return [row["id"] for row in profiles or []]
+    return tuple(row["id"] for row in profiles or [])
 
 
-def _candidate_developer_members(client, developer_id: str | None) -> list[str]:
-    if not developer_id:
-        return []
+def _load_developer_members(client, developer_id: str) -> tuple[str, ...]:
     members = execute(
         client.table("developer_members").select("user_id").eq("developer_id", developer_id)
     ).data
-    return [row["user_id"] for row in members or []]
+    return tuple(row["user_id"] for row in members or [])
+
+
+def _candidate_staff(client) -> list[str]:
+    return list(candidate_cache.get_or_load(("staff",), lambda: _load_staff(client)))
+
+
+def _candidate_developer_members(client, developer_id: str | None) -> list[str]:
+    if not developer_id:
+        return []
+    key = ("developer", developer_id)
+    return list(candidate_cache.get_or_load(key, lambda: _load_developer_members(client, developer_id)))
+
+
+def invalidate_candidates(developer_id: str | None = None, staff: bool = False) -> int:
+    # No arguments drops every cached candidate set.
+    if developer_id is None and not staff:
+        return candidate_cache.invalidate()
+    removed = candidate_cache.invalidate(("developer", developer_id)) if developer_id else 0
+    if staff:
+        removed += candidate_cache.invalidate(("staff",))
+    return removed
 
 
 def _load_counts(client, candidate_ids: list[str], window_hours: int) -> dict[str, int]:
@@ -82,6 +239,29 @@ def _load_counts(client, candidate_ids: list[str], window_hours: int) -> dict[st
     return {candidate: counts.get(candidate, 0) for candidate in candidate_ids}
 
 
+def _prepare_assignment_counts(client, window_hours: int) -> None:
+    # Re-seeding the tracker reads lead_assignments; done before taking the
+    # routing lock so the read never holds up other routing calls.
+    if assignment_loads.covers(window_hours):
+        assignment_loads.refresh(client)
+
+
+def _assignment_counts(client, candidates: list[str], window_hours: int) -> dict[str, int]:
+    if assignment_loads.covers(window_hours):
+        return assignment_loads.counts(client, candidates, window_hours)
+    return _load_counts(client, candidates, window_hours)
+
+
+def _candidate_pool(client, listing: dict[str, Any], prefer_staff: bool) -> tuple[list[str], str]:
+    inventory_source = listing.get("inventory_source") or "resale"
+    if prefer_staff or inventory_source == "resale":
+        return _candidate_staff(client), "staff"
+    candidates = _candidate_developer_members(client, listing.get("developer_id"))
+    if not candidates:
+        return _candidate_staff(client), "staff_fallback"
+    return candidates, "developer"
+
+
 def route_lead(request: LeadRouteRequest) -> LeadRouteResult:
     client = get_service_client()
     lead_resp = execute(
@@ -98,23 +278,19 @@ def route_lead(request: LeadRouteRequest) -> LeadRouteResult:
         .limit(1)
     ).data
     listing = listing_resp[0] if listing_resp else {}
+    candidates, mode = _candidate_pool(client, listing, request.prefer_staff)
 
-    inventory_source = listing.get("inventory_source") or "resale"
-    if request.prefer_staff or inventory_source == "resale":
-        candidates = _candidate_staff(client)
-        mode = "staff"
-    else:
-        candidates = _candidate_developer_members(client, listing.get("developer_id"))
-        if not candidates:
-            candidates = _candidate_staff(client)
-            mode = "staff_fallback"
-        else:
-            mode = "developer"
-
-    counts = _load_counts(client, candidates, request.window_hours)
-    assigned_to = None
-    if candidates:
-        assigned_to = min(candidates, key=lambda cid: counts.get(cid, 0))
+    # Picking and recording happen under one lock, so concurrent route calls in
+    # this process see each other's assignments instead of all taking the same
+    # least-loaded candidate.
+    _prepare_assignment_counts(client, request.window_hours)
+    with _routing_lock:
+        counts = _assignment_counts(client, candidates, request.window_hours)
+        assigned_to = None
+        if candidates:
+            assigned_to = min(candidates, key=lambda cid: counts.get(cid, 0))
+        if assigned_to and not request.dry_run:
+            assignment_loads.record({request.lead_id: assigned_to})
 
     if assigned_to and not request.dry_run:
         execute(
@@ -133,14 +309,170 @@ def route_lead(request: LeadRouteRequest) -> LeadRouteResult:
     )
 
 
-def sla_breached(minutes: int) -> list[dict[str, Any]]:
+def _unrouted_leads(client, request: LeadRouteBatchRequest) -> list[dict[str, Any]]:
+    size = settings.lead_batch_size
+    if request.lead_ids is not None:
+        found: dict[str, dict[str, Any]] = {}
+        for chunk in chunked(sorted(set(request.lead_ids)), size):
+            rows = fetch_all(lambda: client.table("leads").select("id, listing_id").in_("id", chunk).order("id"))
+            found.update((row["id"], row) for row in rows)
+        return [found[lead_id] for lead_id in dict.fromkeys(request.lead_ids) if lead_id in found]
+
+    # Nothing is written until every lead is read, so paging by id is stable.
+    leads: list[dict[str, Any]] = []
+    last_id: str | None = None
+    while request.limit is None or len(leads) < request.limit:
+        page_size = size if request.limit is None else min(size, request.limit - len(leads))
+        query = client.table("leads").select("id, listing_id").is_("assigned_to", "null")
+        if last_id is not None:
+            query = query.gt("id", last_id)
+        rows = execute(query.order("id").limit(page_size)).data or []
+        leads.extend(rows)
+        if len(rows) < page_size:
+            break
+        last_id = rows[-1]["id"]
+    return leads
+
+
+def _listings_by_id(client, leads: list[dict[str, Any]]) -> dict[str, dict[str, Any]]:
+    listings: dict[str, dict[str, Any]] = {}
+    listing_ids = sorted({lead["listing_id"] for lead in leads if lead.get("listing_id")})
+    for chunk in chunked(listing_ids, settings.lead_batch_size):
+        rows = fetch_all(
+            lambda: client.table("listings")
+            .select("id, developer_id, inventory_source")
+            .in_("id", chunk)
+            .order("id")
+        )
+        listings.update((row["id"], row) for row in rows)
+    return listings
+
+
+def _balance(
+    pools: dict[tuple[str, ...], list[str]], members: dict[tuple[str, ...], list[str]], loads: dict[str, int]
+) -> dict[str, str]:
+    # One min-heap of (load, position, candidate) per pool; `loads` is shared,
+    # so a person in several pools is charged for every lead they get. Stale
+    # heap entries are refreshed when popped. Ties go to the earlier candidate,
+    # as in route_lead.
+    assigned: dict[str, str] = {}
+    for pool, lead_ids in pools.items():
+        candidates = members[pool]
+        if not candidates:
+            continue
+        heap = [(loads[candidate], position, candidate) for position, candidate in enumerate(candidates)]
+        heapq.heapify(heap)
+        for lead_id in lead_ids:
+            while True:
+                load, position, candidate = heapq.heappop(heap)
+                if load == loads[candidate]:
+                    break
+                heapq.heappush(heap, (loads[candidate], position, candidate))
+            assigned[lead_id] = candidate
+            loads[candidate] += 1
+            heapq.heappush(heap, (loads[candidate], position, candidate))
+    return assigned
+
+
+def _write_assignments(client, assigned: dict[str, str]) -> None:
+    batch_size = settings.lead_batch_size
+    by_assignee: dict[str, list[str]] = {}
+    for lead_id, assignee in assigned.items():
+        by_assignee.setdefault(assignee, []).append(lead_id)
+    for assignee, lead_ids in by_assignee.items():
+        for chunk in chunked(lead_ids, batch_size):
+            execute(client.table("leads").update({"assigned_to": assignee}).in_("id", chunk))
+    for chunk in chunked(assigned.items(), batch_size):
+        execute(
+            client.table("lead_assignments").upsert(
+                [{"lead_id": lead_id, "assigned_to": assignee} for lead_id, assignee in chunk],
+                on_conflict="lead_id",
+            )
+        )
+
+
+def route_leads(request: LeadRouteBatchRequest) -> LeadRouteBatchResult:
     client = get_service_client()
+    leads = _unrouted_leads(client, request)
+    found = {lead["id"] for lead in leads}
+    not_found = [lead_id for lead_id in dict.fromkeys(request.lead_ids or []) if lead_id not in found]
+    listings = _listings_by_id(client, leads)
+
+    pools: dict[tuple[str, ...], list[str]] = {}
+    members: dict[tuple[str, ...], list[str]] = {}
+    modes: dict[str, str] = {}
+    for lead in leads:
+        listing = listings.get(lead.get("listing_id"), {})
+        candidates, mode = _candidate_pool(client, listing, request.prefer_staff)
+        pool = ("developer", listing["developer_id"]) if mode == "developer" else ("staff",)
+        members[pool] = candidates
+        pools.setdefault(pool, []).append(lead["id"])
+        modes[lead["id"]] = mode
+
+    everyone = list(dict.fromkeys(candidate for candidates in members.values() for candidate in candidates))
+    _prepare_assignment_counts(client, request.window_hours)
+    with _routing_lock:
+        loads = _assignment_counts(client, everyone, request.window_hours)
+        assigned = _balance(pools, members, loads)
+        if not request.dry_run:
+            assignment_loads.record(assigned)
+    if assigned and not request.dry_run:
+        _write_assignments(client, assigned)
+
+    return LeadRouteBatchResult(
+        assignments=[
+            LeadBatchAssignment(lead_id=lead["id"], assigned_to=assigned.get(lead["id"]), mode=modes[lead["id"]])
+            for lead in leads
+        ],
+        not_found=not_found,
+        loads={candidate: loads[candidate] for candidate in everyone},
+    )
+
+
+async def sla_breached(minutes: int, since: datetime | None = None) -> list[dict[str, Any]]:
+    client = await get_async_service_client()
     threshold = (_now() - timedelta(minutes=minutes)).isoformat()
-    rows = execute(
-        client.table("leads")
-        .select("id, listing_id, status, updated_at, created_at")
-        .lte("updated_at", threshold)
-        .neq("status", "won")
-        .neq("status", "lost")
-    ).data
-    return rows or []
+
+    def build():
+        query = (
+            client.table("leads")
+            .select(SLA_FIELDS)
+            .lte("updated_at", threshold)
+            .neq("status", "won")
+            .neq("status", "lost")
+            .is_("deleted_at", "null")
+        )
+        if since is not None:
+            query = query.gt("updated_at", (since - timedelta(minutes=minutes)).isoformat())
+        return query
+
+    rows: list[dict[str, Any]] = []
+    async for page in iter_keyset_pages_async(build, "updated_at", "id"):
+        rows.extend(page)
+    return rows
+
+
+async def sla_report(minutes: int, offset: int, limit: int, since: datetime | None) -> dict[str, Any]:
+    if since is not None and since.tzinfo is None:
+        since = since.replace(tzinfo=timezone.utc)
+    snapshot = sla_monitor.snapshot
+    if snapshot is None:
+        # The monitor has not finished its first scan (or is disabled).
+        rows = await sla_breached(minutes, since)
+        total, page, as_of, resolved = len(rows), rows[offset : offset + limit], _now(), None
+    else:
+        start, stop = snapshot.breach_range(minutes, since)
+        total = stop - start
+        page = snapshot.rows[min(start + offset, stop) : min(start + offset + limit, stop)]
+        as_of = snapshot.as_of
+        resolved = sla_monitor.resolved_since(minutes, since) if since is not None else None
+    return {
+        "breached": page,
+        "minutes": minutes,
+        "total": total,
+        "offset": offset,
+        "limit": limit,
+        "as_of": as_of.isoformat(),
+        "since": since.isoformat() if since else None,
+        "resolved": resolved,
+    }
@@ -1,38 +1,89 @@
+import asyncio
+import hashlib
+from dataclasses import dataclass
 from datetime import datetime, timedelta, timezone
-from typing import Any
+from typing import Any, Awaitable, Callable
 
-from app.db import execute, get_service_client
+from app.cache import AsyncTTLCache
+from app.config import settings
+from app.db import execute_async, fetch_all_async, get_async_service_client
+from app.schemas import ApiResponse
+from app.services.analytics import cohort_report, funnel_report
+
+
+@dataclass(frozen=True)
+class CachedReport:
+    body: bytes
+    etag: str
+
+
+# Rendered report responses keyed by (report, days).
+report_cache = AsyncTTLCache("reports", settings.report_cache_max_entries, settings.report_cache_ttl_seconds)
 
 
 def _now() -> datetime:
     return datetime.now(timezone.utc)
 
 
-def daily_report(days: int = 7) -> dict[str, Any]:
-    client = get_service_client()
+def _lead_rollups(client, cutoff: str):
+    # lead_daily_rollups holds one row per (day, status, source), kept current
+    # by triggers on leads, so a window costs days x statuses x sources rows.
+    return fetch_all_async(
+        lambda: client.table("lead_daily_rollups")
+        .select("day, status, source, leads")
+        .gte("day", cutoff)
+        .order("day")
+        .order("status")
+        .order("source")
+    )
+
+
+async def daily_report(days: int = 7) -> dict[str, Any]:
+    client = await get_async_service_client()
     cutoff = (_now() - timedelta(days=days)).date().isoformat()
 
-    units = execute(
-        client.table("report_units_per_day").select("*").gte("day", cutoff)
-    ).data
-    leads = execute(
-        client.table("report_leads_per_day").select("*").gte("day", cutoff)
-    ).data
+    units, rollups = await asyncio.gather(
+        execute_async(client.table("report_units_per_day").select("*").gte("day", cutoff)),
+        _lead_rollups(client, cutoff),
+    )
+    leads_per_day: dict[str, int] = {}
+    for row in rollups:
+        leads_per_day[row["day"]] = leads_per_day.get(row["day"], 0) + row["leads"]
 
     return {
-        "units": units or [],
-        "leads": leads or [],
+        "units": units.data or [],
+        "leads": [{"day": day, "leads": count} for day, count in sorted(leads_per_day.items(), reverse=True) if count],
     }
 
 
-def pipeline_report(days: int = 30) -> dict[str, Any]:
-    client = get_service_client()
-    cutoff = (_now() - timedelta(days=days)).isoformat()
-    rows = execute(
-        client.table("leads").select("status, created_at").gte("created_at", cutoff)
-    ).data
+async def pipeline_report(days: int = 30) -> dict[str, Any]:
+    client = await get_async_service_client()
+    cutoff = (_now() - timedelta(days=days)).date().isoformat()
     counts: dict[str, int] = {}
-    for row in rows or []:
-        status = row.get("status") or "new"
-        counts[status] = counts.get(status, 0) + 1
-    return {"counts": counts, "window_days": days}
+    by_source: dict[str, dict[str, int]] = {}
+    for row in await _lead_rollups(client, cutoff):
+        if not row["leads"]:
+            continue
+        status = row["status"] or "new"
+        counts[status] = counts.get(status, 0) + row["leads"]
+        per_source = by_source.setdefault(row["source"] or "unknown", {})
+        per_source[status] = per_source.get(status, 0) + row["leads"]
+    return {"counts": counts, "by_source": by_source, "window_days": days, "since_day": cutoff}
+
+
+async def _render(build: Callable[[int], Awaitable[dict[str, Any]]], days: int) -> CachedReport:
+    body = ApiResponse(ok=True, data=await build(days)).model_dump_json().encode()
+    # Strong ETag: it changes with every byte of the body.
+    return CachedReport(body, '"' + hashlib.blake2b(body, digest_size=16).hexdigest() + '"')
+
+
+REPORTS: dict[str, Callable[[int], Awaitable[dict[str, Any]]]] = {
+    "daily": daily_report,
+    "pipeline": pipeline_report,
+    "funnel": funnel_report,
+    "cohorts": cohort_report,
+}
+
+
+async def cached_report(report: str, days: int) -> CachedReport:
+    return await report_cache.get_or_load((report, days), lambda: _render(REPORTS[report], days))
@@ -0,0 +1,168 @@
+import asyncio
+import bisect
+from collections import deque
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+from typing import Any
+
+from app.config import settings
+from app.db import get_async_service_client, iter_keyset_pages_async
+from app.logging import get_logger
+
+logger = get_logger(__name__)
+
+CLOSED_STATUSES = ("won", "lost")
+SLA_FIELDS = "id, listing_id, status, updated_at, created_at, deleted_at"
+# Rows committed late can carry an updated_at slightly older than the
+# watermark (it is the transaction start), so each scan re-reads this much.
+SCAN_OVERLAP = timedelta(minutes=1)
+
+
+def _now() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+def _parse(value: str) -> datetime:
+    return datetime.fromisoformat(value.replace("Z", "+00:00"))
+
+
+@dataclass
+class SlaSnapshot:
+    as_of: datetime
+    # Open leads oldest first, with their parsed updated_at alongside for bisecting.
+    rows: list[dict[str, Any]]
+    updated: list[datetime]
+
+    def breach_range(self, minutes: int, since: datetime | None = None) -> tuple[int, int]:
+        # rows[start:stop] breach `minutes`; with `since`, only those whose
+        # breach began after it (updated_at + minutes > since).
+        threshold = timedelta(minutes=minutes)
+        stop = bisect.bisect_right(self.updated, self.as_of - threshold)
+        start = bisect.bisect_right(self.updated, since - threshold, hi=stop) if since else 0
+        return start, stop
+
+
+@dataclass
+class _Resolved:
+    ids: set[str] = field(default_factory=set)
+    # (time the lead left the breach set, lead id), oldest first.
+    log: deque[tuple[datetime, str]] = field(default_factory=lambda: deque(maxlen=10_000))
+
+
+# Keeps every open lead (status not won/lost) in memory, refreshed from
+# `leads.updated_at` changes since the last scan. Each refresh publishes a
+# snapshot sorted by updated_at, so the leads breaching any threshold are a
+# prefix of it. For the configured thresholds it also remembers which leads
+# left the breach set, to answer `since` queries.
+class SlaMonitor:
+    def __init__(self, thresholds: list[int], interval_seconds: float, full_scan_seconds: float):
+        self.thresholds = thresholds
+        self.interval_seconds = interval_seconds
+        self.full_scan_seconds = full_scan_seconds
+        self.snapshot: SlaSnapshot | None = None
+        self._open: dict[str, tuple[datetime, dict[str, Any]]] = {}
+        self._watermark: datetime | None = None
+        self._full_scan_at: datetime | None = None
+        # Start of the previous scan; hard deletes after it are read from
+        # lead_deletions on the next incremental pass.
+        self._scanned_at: datetime | None = None
+        self._resolved = {minutes: _Resolved() for minutes in thresholds}
+        self._task: asyncio.Task | None = None
+
+    def _apply(self, row: dict[str, Any]) -> None:
+        if row.get("status") in CLOSED_STATUSES or row.get("deleted_at"):
+            self._open.pop(row["id"], None)
+        else:
+            self._open[row["id"]] = (_parse(row["updated_at"]), row)
+
+    async def _scan(self, client, since: datetime | None, open_only: bool) -> None:
+        # Keyset pagination on (updated_at, id): bulk updates give many rows
+        # the same updated_at, so the id part matters.
+        def base():
+            query = client.table("leads").select(SLA_FIELDS)
+            if open_only:
+                for status in CLOSED_STATUSES:
+                    query = query.neq("status", status)
+                query = query.is_("deleted_at", "null")
+            if since is not None:
+                query = query.gte("updated_at", since.isoformat())
+            return query
+
+        async for rows in iter_keyset_pages_async(base, "updated_at", "id", settings.supabase_page_size):
+            for row in rows:
+                self._apply(row)
+            latest = _parse(rows[-1]["updated_at"])
+            if self._watermark is None or latest > self._watermark:
+                self._watermark = latest
+
+    async def _drop_deleted(self, client, since: datetime) -> None:
+        # Hard-deleted leads never show up in the updated_at scan.
+        pages = iter_keyset_pages_async(
+            lambda: client.table("lead_deletions").select("lead_id, deleted_at").gte("deleted_at", since.isoformat()),
+            "deleted_at",
+            "lead_id",
+            settings.supabase_page_size,
+        )
+        async for rows in pages:
+            for row in rows:
+                self._open.pop(row["lead_id"], None)
+
+    async def refresh(self) -> SlaSnapshot:
+        client = await get_async_service_client()
+        started = _now()
+        full = self._full_scan_at is None or (started - self._full_scan_at).total_seconds() >= self.full_scan_seconds
+        if full:
+            self._open, self._watermark = {}, None
+            await self._scan(client, None, open_only=True)
+            self._full_scan_at = started
+        else:
+            since = self._watermark - SCAN_OVERLAP if self._watermark else None
+            await self._scan(client, since, open_only=False)
+            await self._drop_deleted(client, self._scanned_at - SCAN_OVERLAP)
+        self._scanned_at = started
+
+        ordered = sorted(self._open.values(), key=lambda item: (item[0], item[1]["id"]))
+        snapshot = SlaSnapshot(started, [row for _, row in ordered], [updated for updated, _ in ordered])
+        for minutes, resolved in self._resolved.items():
+            _, stop = snapshot.breach_range(minutes)
+            current = {row["id"] for row in snapshot.rows[:stop]}
+            for lead_id in resolved.ids - current:
+                resolved.log.append((started, lead_id))
+            resolved.ids = current
+        self.snapshot = snapshot
+        return snapshot
+
+    def resolved_since(self, minutes: int, since: datetime) -> list[str] | None:
+        resolved = self._resolved.get(minutes)
+        if resolved is None:
+            return None
+        return [lead_id for at, lead_id in resolved.log if at > since]
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await self.refresh()
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("SLA monitor refresh failed")
+            await asyncio.sleep(self.interval_seconds)
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+            logger.info("SLA monitor started (thresholds=%s, interval=%ss)", self.thresholds, self.interval_seconds)
+
+    async def stop(self) -> None:
+        task, self._task = self._task, None
+        if task is not None:
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+
+
+sla_monitor = SlaMonitor(
+    settings.sla_monitor_minutes, settings.sla_monitor_interval_seconds, settings.sla_monitor_full_scan_seconds
+)
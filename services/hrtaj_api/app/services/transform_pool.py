@@ -0,0 +1,74 @@
+import multiprocessing
+import os
+import threading
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Callable, Iterable, Iterator
+
+from app.config import settings
+from app.logging import get_logger
+
+logger = get_logger(__name__)
+
+_pool: ProcessPoolExecutor | None = None
+_pool_lock = threading.Lock()
+
+
+def pool_size() -> int:
+    return settings.import_parallel_workers or os.cpu_count() or 1
+
+
+def _get_pool() -> ProcessPoolExecutor:
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            # Spawned rather than forked: the API process runs request and
+            # import-job threads, which must not be duplicated mid-flight.
+            _pool = ProcessPoolExecutor(max_workers=pool_size(), mp_context=multiprocessing.get_context("spawn"))
+        return _pool
+
+
+def _discard_pool(broken: ProcessPoolExecutor) -> None:
+    global _pool
+    with _pool_lock:
+        if _pool is broken:
+            _pool = None
+    broken.shutdown(wait=False, cancel_futures=True)
+
+
+def shutdown_transform_pool() -> None:
+    global _pool
+    with _pool_lock:
+        pool, _pool = _pool, None
+    if pool is not None:
+        pool.shutdown(wait=True, cancel_futures=True)
+
+
+def map_ordered(fn: Callable[..., Any], tasks: Iterable[tuple[Any, ...]], parallel: bool) -> Iterator[Any]:
+    # Runs fn(*task) for each task and yields the results in task order. In
+    # parallel mode the tasks run in worker processes with at most two per
+    # worker in flight, so the caller can consume (and write) earlier results
+    # while later ones are still being computed.
+    if not parallel:
+        for task in tasks:
+            yield fn(*task)
+        return
+
+    pool = _get_pool()
+    window = pool_size() * 2
+    pending: deque[Future] = deque()
+    try:
+        for task in tasks:
+            pending.append(pool.submit(fn, *task))
+            if len(pending) >= window:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+    except BrokenProcessPool:
+        logger.exception("Import transform pool broke; it will be recreated")
+        _discard_pool(pool)
+        raise
+    finally:
+        for future in pending:
+            future.cancel()
@@ -0,0 +1,47 @@
+import threading
+from dataclasses import dataclass, field
+
+from app.config import settings
+from app.db import execute
+
+
+@dataclass
+class _CodeBlock:
+    # Reserved values not handed out yet: next_value up to end (exclusive).
+    next_value: int = 0
+    end: int = 0
+    lock: threading.Lock = field(default_factory=threading.Lock)
+
+
+_blocks: dict[str, _CodeBlock] = {}
+_blocks_lock = threading.Lock()
+
+
+def format_unit_code(prefix: str, value: int) -> str:
+    return f"{prefix}-{value:07d}"
+
+
+def _reserve(client, prefix: str, size: int) -> int:
+    return int(execute(client.rpc("reserve_unit_code_block", {"code_prefix": prefix, "block_size": size})).data)
+
+
+def allocate_unit_codes(client, prefix: str, count: int) -> list[str]:
+    # Codes come from per-prefix counter blocks reserved in the database, so
+    # they never repeat across imports, workers or API processes and need no
+    # lookup before use. Values left in a block when the process exits are
+    # simply skipped.
+    if count <= 0:
+        return []
+    with _blocks_lock:
+        block = _blocks.setdefault(prefix, _CodeBlock())
+    codes: list[str] = []
+    with block.lock:
+        while len(codes) < count:
+            if block.next_value >= block.end:
+                size = max(settings.unit_code_block_size, count - len(codes))
+                block.next_value = _reserve(client, prefix, size)
+                block.end = block.next_value + size
+            take = min(count - len(codes), block.end - block.next_value)
+            codes.extend(format_unit_code(prefix, value) for value in range(block.next_value, block.next_value + take))
+            block.next_value += take
+    return codes
@@ -0,0 +1,77 @@
+"""Time the funnel and cohort computations over a synthetic lead snapshot.
+
+Builds the same frames load_snapshot returns (leads plus their status history,
+each lead walking part of the funnel) and times compute_funnel and
+compute_cohorts on them.
+
+Run from services/hrtaj_api:  python -m benchmarks.bench_analytics [leads]
+"""
+
+import sys
+import time
+from datetime import datetime, timezone
+
+import numpy as np
+import pandas as pd
+
+from app.services.analytics import FUNNEL_STAGES, compute_cohorts, compute_funnel
+
+SOURCES = ["campaign", "partner", "walk_in", "referral", None]
+NOW = datetime(2026, 10, 18, tzinfo=timezone.utc)
+
+
+def make_snapshot(leads: int, weeks: int = 12) -> tuple[pd.DataFrame, pd.DataFrame]:
+    rng = np.random.default_rng(7)
+    ids = np.array([f"lead-{index:08d}" for index in range(leads)])
+    created = pd.Timestamp(NOW) - pd.to_timedelta(rng.uniform(0, weeks * 7 * 86400, leads), unit="s")
+    # Furthest funnel stage reached, then whether the lead was lost after it.
+    depth = rng.choice(len(FUNNEL_STAGES), size=leads, p=[0.35, 0.3, 0.2, 0.1, 0.05])
+    lost = (depth < len(FUNNEL_STAGES) - 1) & (rng.random(leads) < 0.4)
+
+    steps = depth + 1 + lost
+    lead_index = np.repeat(np.arange(leads), steps)
+    position = np.arange(len(lead_index)) - np.repeat(np.cumsum(steps) - steps, steps)
+    stages = np.array(FUNNEL_STAGES + ["lost"])
+    status = np.where(position > depth[lead_index], len(FUNNEL_STAGES), position)
+    gaps = np.where(position == 0, 0.0, rng.exponential(36 * 3600, len(lead_index)))
+    offsets = pd.Series(gaps).groupby(lead_index).cumsum().to_numpy()
+    entered = created[lead_index] + pd.to_timedelta(offsets, unit="s")
+
+    history = pd.DataFrame(
+        {
+            "lead_id": ids[lead_index],
+            "status": stages[status],
+            "entered_at": entered,
+            "backfilled": False,
+        }
+    )
+    last = history.groupby("lead_id", sort=False).tail(1)
+    frame = pd.DataFrame(
+        {
+            "id": ids,
+            "status": last["status"].to_numpy(),
+            "lead_source": rng.choice(np.array(SOURCES, dtype=object), size=leads),
+            "created_at": created,
+            "updated_at": last["entered_at"].to_numpy(),
+        }
+    )
+    frame["updated_at"] = pd.to_datetime(frame["updated_at"], utc=True)
+    return frame, history
+
+
+def main() -> None:
+    leads = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    frame, history = make_snapshot(leads)
+    print(f"leads={leads} transitions={len(history)}")
+
+    started = time.perf_counter()
+    compute_funnel(frame, history)
+    print(f"funnel:  {time.perf_counter() - started:8.3f}s")
+
+    started = time.perf_counter()
+    cohorts = compute_cohorts(frame, history, 12, NOW)
+    print(f"cohorts: {time.perf_counter() - started:8.3f}s  ({len(cohorts)} cohort/source groups)")
+
+
+if __name__ == "__main__":
+    main()
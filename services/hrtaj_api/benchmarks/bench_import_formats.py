@@ -0,0 +1,83 @@
+"""Compare parse time and peak memory of the import readers across upload formats.
+
+Writes the same resale dataset as CSV, XLSX, Parquet and Feather, then reads each
+file through iter_table_chunks in a fresh process and reports how far peak RSS
+rose above the process's footprint after imports.
+
+Run from services/hrtaj_api:  python -m benchmarks.bench_import_formats [rows]
+"""
+
+import multiprocessing
+import os
+import resource
+import sys
+import tempfile
+import time
+
+from app.config import settings
+from app.import_utils import iter_table_chunks
+from benchmarks.bench_import_transform import make_frame
+
+CASES = [
+    ("csv", None),
+    ("xlsx", "openpyxl"),
+    ("xlsx", "calamine"),
+    ("parquet", None),
+    ("feather", None),
+]
+
+
+def write_files(rows: int, directory: str) -> dict[str, str]:
+    # Everything as text, like a sheet typed by hand, so each format holds the same cells.
+    df = make_frame(rows).map(lambda value: None if value is None else str(value))
+    paths = {suffix: os.path.join(directory, f"resale.{suffix}") for suffix, _ in CASES}
+    df.to_csv(paths["csv"], index=False)
+    df.to_excel(paths["xlsx"], index=False)
+    df.to_parquet(paths["parquet"])
+    df.to_feather(paths["feather"])
+    return paths
+
+
+def peak_rss_mb() -> float:
+    # VmHWM starts over at exec, unlike ru_maxrss which a spawned child
+    # inherits from the benchmark process that wrote the files.
+    try:
+        with open("/proc/self/status") as status:
+            for line in status:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def read_all(path: str, engine: str | None, results) -> None:
+    baseline = peak_rss_mb()
+    started = time.perf_counter()
+    rows = 0
+    with open(path, "rb") as handle:
+        for chunk in iter_table_chunks(handle, path, settings.import_chunk_rows, engine):
+            rows += len(chunk.index)
+    seconds = time.perf_counter() - started
+    results.put((rows, seconds, peak_rss_mb() - baseline))
+
+
+def main() -> None:
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 50_000
+    context = multiprocessing.get_context("spawn")
+    with tempfile.TemporaryDirectory() as directory:
+        paths = write_files(rows, directory)
+        print(f"rows={rows}")
+        for suffix, engine in CASES:
+            results = context.Queue()
+            process = context.Process(target=read_all, args=(paths[suffix], engine, results))
+            process.start()
+            read_rows, seconds, peak_mb = results.get()
+            process.join()
+            size_mb = os.path.getsize(paths[suffix]) / 1024 / 1024
+            label = f"{suffix} ({engine})" if engine else suffix
+            print(f"{label:18} {seconds:8.3f}s  peak +{peak_mb:6.1f} MB  file {size_mb:6.1f} MB  rows={read_rows}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""Compare the row-at-a-time import parsing loop with the column-wise transform.
+
+Run from services/hrtaj_api:  python -m benchmarks.bench_import_transform [rows]
+"""
+
+import random
+import sys
+import time
+from typing import Any
+
+import pandas as pd
+
+from app.import_utils import (
+    map_headers,
+    normalize_text,
+    parse_bool,
+    parse_date,
+    parse_float,
+    parse_int,
+    transform_columns,
+)
+from app.services.import_service import RESALE_COLUMNS
+
+SCALAR = {
+    "text": normalize_text,
+    "float": parse_float,
+    "int": parse_int,
+    "bool": parse_bool,
+    "date": parse_date,
+}
+
+
+def make_frame(rows: int) -> pd.DataFrame:
+    rng = random.Random(7)
+    dates = [f"2024-0{month}-1{day}" for month in range(1, 10) for day in range(10)]
+    return pd.DataFrame(
+        {
+            "نوع": [rng.choice(["شقة", "فيلا", "دوبلكس", None]) for _ in range(rows)],
+            "السعر": [f"{rng.randint(500, 9000)},000" for _ in range(rows)],
+            "العنوان": [f"{rng.randint(1, 400)} شارع النيل" for _ in range(rows)],
+            "المنطقة": [rng.choice(["المعادي", "الزمالك", "التجمع"]) for _ in range(rows)],
+            "المساحة": [rng.choice([120, 150.5, "200", None]) for _ in range(rows)],
+            "مصعد": [rng.choice(["نعم", "لا", "yes", None]) for _ in range(rows)],
+            "غ": [rng.choice(["2", "3", 4, None]) for _ in range(rows)],
+            "ح": [rng.choice(["1", "2", None]) for _ in range(rows)],
+            "تاريخ": [rng.choice(dates) for _ in range(rows)],
+            "الرقم": [f"010{rng.randint(10000000, 99999999)}" for _ in range(rows)],
+        }
+    )
+
+
+# The importer's old per-row path, kept here as the baseline.
+def build_row_payload(row: pd.Series, mapping: dict[str, str]) -> dict[str, Any]:
+    payload: dict[str, Any] = {}
+    for key, source in mapping.items():
+        payload[key] = row.get(source)
+    return payload
+
+
+def row_loop(df: pd.DataFrame, mapping: dict[str, str]) -> None:
+    for _, row in df.iterrows():
+        payload = build_row_payload(row, mapping)
+        for key, kind in RESALE_COLUMNS.items():
+            SCALAR[kind](payload.get(key))
+
+
+def main() -> None:
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    df = make_frame(rows)
+    mapping, _ = map_headers(df.columns)
+
+    started = time.perf_counter()
+    row_loop(df, mapping)
+    loop_seconds = time.perf_counter() - started
+
+    started = time.perf_counter()
+    transform_columns(df, mapping, RESALE_COLUMNS)
+    column_seconds = time.perf_counter() - started
+
+    print(f"rows={rows}")
+    print(f"row loop:        {loop_seconds:8.3f}s")
+    print(f"column transform:{column_seconds:8.3f}s  ({loop_seconds / column_seconds:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
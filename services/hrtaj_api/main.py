@@ -1,17 +1,41 @@
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
 from app.config import settings
+from app.metrics import RequestMetricsMiddleware
+from app.db import close_clients, open_clients
 from app.logging import configure_logging, get_logger
-from app.routers import health, imports, leads, reports
+from app.routers import admin, exports, health, imports, leads, metrics, reports
+from app.services.lead_scores import lead_score_refresher
+from app.services.sla_monitor import sla_monitor
+from app.services.transform_pool import shutdown_transform_pool
 
 configure_logging(settings.log_level)
 logger = get_logger(__name__)
 
+
+@asynccontextmanager
+async def lifespan(_: FastAPI):
+    await open_clients()
+    has_credentials = bool(settings.supabase_url and settings.supabase_service_role_key)
+    if settings.sla_monitor_enabled and has_credentials:
+        sla_monitor.start()
+    if settings.lead_score_refresh_enabled and has_credentials:
+        lead_score_refresher.start()
+    yield
+    await lead_score_refresher.stop()
+    await sla_monitor.stop()
+    shutdown_transform_pool()
+    await close_clients()
+
+
 app = FastAPI(
     title="HRTAJ API",
     version="0.1.0",
     description="HRTAJ auxiliary service for imports, CRM automation, and reporting.",
+    lifespan=lifespan,
 )
 
 app.add_middleware(
@@ -21,10 +45,16 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+if settings.metrics_enabled:
+    app.add_middleware(RequestMetricsMiddleware)
 
 app.include_router(health.router)
 app.include_router(imports.router, prefix="/v1/import", tags=["import"])
 app.include_router(leads.router, prefix="/v1/leads", tags=["leads"])
 app.include_router(reports.router, prefix="/v1/reports", tags=["reports"])
+app.include_router(admin.router, prefix="/v1/admin", tags=["admin"])
+app.include_router(exports.router, prefix="/v1/export", tags=["export"])
+if settings.metrics_enabled:
+    app.include_router(metrics.router)
 
 logger.info("HRTAJ API initialized (env=%s)", settings.app_env)
@@ -0,0 +1,185 @@
+import itertools
+from types import SimpleNamespace
+from typing import Any
+
+import pytest
+
+
+class FakeQuery:
+    def __init__(self, client: "FakeClient", table: str):
+        self.client = client
+        self.table = table
+        self.filters: list = []
+        self.action = "select"
+        self.payload: Any = None
+        self.on_conflict: str | None = None
+        self.bounds: tuple[int, int] | None = None
+        self.orders: list[tuple[str, bool]] = []
+
+    def select(self, *_args, **_kwargs):
+        self.action = "select"
+        return self
+
+    def eq(self, column, value):
+        self.filters.append(lambda row: row.get(column) == value)
+        return self
+
+    def neq(self, column, value):
+        self.filters.append(lambda row: row.get(column) != value)
+        return self
+
+    def in_(self, column, values):
+        allowed = set(values)
+        self.filters.append(lambda row: row.get(column) in allowed)
+        return self
+
+    def is_(self, column, value):
+        self.filters.append(lambda row: row.get(column) is None)
+        return self
+
+    def gt(self, column, value):
+        self.filters.append(lambda row: row.get(column) is not None and row.get(column) > value)
+        return self
+
+    def gte(self, column, value):
+        self.filters.append(lambda row: row.get(column) is not None and row.get(column) >= value)
+        return self
+
+    def lt(self, column, value):
+        self.filters.append(lambda row: row.get(column) is not None and row.get(column) < value)
+        return self
+
+    def lte(self, column, value):
+        self.filters.append(lambda row: row.get(column) is not None and row.get(column) <= value)
+        return self
+
+    def order(self, column, desc=False, **_kwargs):
+        self.orders.append((column, desc))
+        return self
+
+    def limit(self, size):
+        self.bounds = (0, size - 1)
+        return self
+
+    def range(self, start, end):
+        self.bounds = (start, end)
+        return self
+
+    def insert(self, payload):
+        self.action, self.payload = "insert", payload
+        return self
+
+    def upsert(self, payload, on_conflict=None):
+        self.action, self.payload, self.on_conflict = "upsert", payload, on_conflict
+        return self
+
+    def update(self, payload):
+        self.action, self.payload = "update", payload
+        return self
+
+    def execute(self):
+        self.client.calls.append((self.table, self.action))
+        rows = self.client.tables.setdefault(self.table, [])
+        if self.action == "select":
+            found = [row for row in rows if all(check(row) for check in self.filters)]
+            for column, desc in reversed(self.orders):
+                found.sort(key=lambda row: (row.get(column) is None, row.get(column)), reverse=desc)
+            if self.bounds:
+                found = found[self.bounds[0] : self.bounds[1] + 1]
+            return SimpleNamespace(data=[dict(row) for row in found])
+        items = self.payload if isinstance(self.payload, list) else [self.payload]
+        if self.action == "update":
+            matched = [row for row in rows if all(check(row) for check in self.filters)]
+            for row in matched:
+                row.update(self.payload)
+            return SimpleNamespace(data=[dict(row) for row in matched])
+        written = []
+        key = self.on_conflict or self.client.primary_keys.get(self.table, "id")
+        for item in items:
+            item = dict(item)
+            existing = next((row for row in rows if key in item and row.get(key) == item[key]), None)
+            if self.action == "upsert" and existing is not None:
+                existing.update(item)
+                written.append(dict(existing))
+                continue
+            if "id" not in item and self.table not in self.client.primary_keys:
+                item["id"] = f"{self.table}-{next(self.client.ids)}"
+            rows.append(item)
+            written.append(dict(item))
+        return SimpleNamespace(data=written)
+
+
+class FakeRpc:
+    def __init__(self, client: "FakeClient", name: str, params: dict[str, Any]):
+        self.client = client
+        self.name = name
+        self.params = params
+
+    def execute(self):
+        self.client.calls.append((self.name, "rpc"))
+        if self.name == "reserve_unit_code_block":
+            prefix, size = self.params["code_prefix"], self.params["block_size"]
+            start = self.client.counters.get(prefix, 0) + 1
+            self.client.counters[prefix] = start + size - 1
+            return SimpleNamespace(data=start)
+        if self.name == "apply_lead_scores":
+            leads = {row["id"]: row for row in self.client.tables.get("leads", [])}
+            written = 0
+            for score in self.params["scores"]:
+                lead = leads.get(score["id"])
+                if lead is not None:
+                    lead.update({key: value for key, value in score.items() if key != "id"})
+                    lead["score_stale"] = False
+                    written += 1
+            return SimpleNamespace(data=written)
+        if self.name == "apply_listing_updates":
+            listings = {row["id"]: row for row in self.client.tables.get("listings", [])}
+            written = 0
+            for update in self.params["rows"]:
+                listing = listings.get(update["id"])
+                if listing is not None:
+                    listing.update(update)
+                    written += 1
+            return SimpleNamespace(data=written)
+        raise NotImplementedError(self.name)
+
+
+class FakeClient:
+    primary_keys = {"resale_intake": "listing_id", "lead_assignments": "lead_id"}
+
+    def __init__(self, tables: dict[str, list[dict[str, Any]]] | None = None):
+        self.tables = {name: [dict(row) for row in rows] for name, rows in (tables or {}).items()}
+        self.calls: list[tuple[str, str]] = []
+        self.ids = itertools.count(1)
+        self.counters: dict[str, int] = {}
+
+    def table(self, name: str) -> FakeQuery:
+        return FakeQuery(self, name)
+
+    def rpc(self, name: str, params: dict[str, Any]) -> FakeRpc:
+        return FakeRpc(self, name, params)
+
+
+@pytest.fixture(autouse=True)
+def reset_unit_code_blocks():
+    from app.services import unit_codes
+
+    unit_codes._blocks.clear()
+    yield
+    unit_codes._blocks.clear()
+
+
+@pytest.fixture(autouse=True)
+def reset_routing_state():
+    from app.services import lead_service
+
+    lead_service.candidate_cache.invalidate()
+    lead_service.assignment_loads.reset()
+    yield
+    lead_service.candidate_cache.invalidate()
+    lead_service.assignment_loads.reset()
+
+
+@pytest.fixture
+def fake_client():
+    return FakeClient
@@ -0,0 +1,95 @@
+from datetime import datetime, timezone
+
+import pandas as pd
+
+from app.services import analytics
+
+NOW = datetime(2026, 10, 18, 9, tzinfo=timezone.utc)
+
+LEADS = [
+    {"id": "a", "status": "won", "lead_source": "campaign", "created_at": "2026-10-05T10:00:00+00:00", "updated_at": "2026-10-14T10:00:00+00:00"},
+    {"id": "b", "status": "lost", "lead_source": "campaign", "created_at": "2026-10-06T10:00:00+00:00", "updated_at": "2026-10-08T10:00:00+00:00"},
+    {"id": "c", "status": "contacted", "lead_source": None, "created_at": "2026-10-07T10:00:00+00:00", "updated_at": "2026-10-07T12:00:00+00:00"},
+    {"id": "d", "status": "new", "lead_source": "campaign", "created_at": "2026-10-13T10:00:00+00:00", "updated_at": "2026-10-13T10:00:00+00:00"},
+    {"id": "e", "status": "test", "lead_source": "campaign", "created_at": "2026-10-13T11:00:00+00:00", "updated_at": "2026-10-13T11:00:00+00:00"},
+]
+
+HISTORY = [
+    ("a", "new", "2026-10-05T10:00:00+00:00", False),
+    ("a", "contacted", "2026-10-05T12:00:00+00:00", False),
+    ("a", "qualified", "2026-10-06T12:00:00+00:00", False),
+    ("a", "meeting_set", "2026-10-08T12:00:00+00:00", False),
+    ("a", "won", "2026-10-14T10:00:00+00:00", False),
+    ("b", "new", "2026-10-06T10:00:00+00:00", False),
+    ("b", "contacted", "2026-10-06T14:00:00+00:00", False),
+    ("b", "qualified", "2026-10-07T10:00:00+00:00", False),
+    ("b", "lost", "2026-10-08T10:00:00+00:00", False),
+    ("c", "new", "2026-10-07T10:00:00+00:00", True),
+    ("c", "contacted", "2026-10-07T12:00:00+00:00", True),
+    ("d", "new", "2026-10-13T10:00:00+00:00", False),
+    ("e", "new", "2026-10-13T11:00:00+00:00", False),
+]
+
+
+def _snapshot(fake_client):
+    client = fake_client(
+        {
+            "leads": [dict(row) for row in LEADS],
+            "lead_status_history": [
+                {"id": f"h{index:02d}", "lead_id": lead, "status": status, "entered_at": at, "backfilled": backfilled}
+                for index, (lead, status, at, backfilled) in enumerate(HISTORY)
+            ],
+        }
+    )
+    return analytics.load_snapshot(client, datetime(2026, 10, 1, tzinfo=timezone.utc))
+
+
+def test_funnel_counts_stages_reached_and_time_in_stage(fake_client):
+    leads, history = _snapshot(fake_client)
+    assert sorted(leads["id"]) == ["a", "b", "c", "d"]
+
+    funnel = analytics.compute_funnel(leads, history)
+
+    assert [(stage["stage"], stage["leads"]) for stage in funnel["stages"]] == [
+        ("new", 4),
+        ("contacted", 3),
+        ("qualified", 2),
+        ("meeting_set", 1),
+        ("won", 1),
+    ]
+    assert funnel["stages"][2]["conversion_from_previous"] == round(2 / 3, 4)
+    assert funnel["stages"][4]["conversion_from_start"] == 0.25
+    assert funnel["closed"] == 1
+    # Backfilled spans of "c" and still-open stages are left out.
+    assert funnel["time_in_stage_hours"]["new"] == {"p50": 3.0, "p90": 3.8, "p95": 3.9, "samples": 2}
+    assert funnel["time_in_stage_hours"]["meeting_set"]["samples"] == 1
+    assert "won" not in funnel["time_in_stage_hours"]
+
+
+def test_cohorts_group_by_week_and_source(fake_client):
+    leads, history = _snapshot(fake_client)
+
+    cohorts = analytics.compute_cohorts(leads, history, 4, NOW)
+
+    assert cohorts == [
+        {"cohort_week": "2026-10-05", "lead_source": "campaign", "leads": 2, "retention": [0.5, 0.5], "won": [0.0, 0.5]},
+        {"cohort_week": "2026-10-05", "lead_source": "unknown", "leads": 1, "retention": [1.0, 1.0], "won": [0.0, 0.0]},
+        {"cohort_week": "2026-10-12", "lead_source": "campaign", "leads": 1, "retention": [1.0], "won": [0.0]},
+    ]
+
+
+def test_cohorts_fall_back_to_updated_at_without_history():
+    leads = pd.DataFrame(
+        {
+            "id": ["x"],
+            "status": ["lost"],
+            "lead_source": ["partner"],
+            "created_at": pd.to_datetime(["2026-09-28T10:00:00Z"], utc=True),
+            "updated_at": pd.to_datetime(["2026-10-09T10:00:00Z"], utc=True),
+        }
+    )
+    history = pd.DataFrame({column: [] for column in analytics.HISTORY_COLUMNS})
+    history["entered_at"] = pd.to_datetime(history["entered_at"], utc=True)
+
+    (cohort,) = analytics.compute_cohorts(leads, history, 8, NOW)
+    assert cohort["retention"] == [1.0, 0.0, 0.0]
@@ -0,0 +1,75 @@
+import threading
+from datetime import datetime, timedelta, timezone
+
+from app.services.assignment_load import AssignmentLoadTracker
+
+NOW = datetime(2026, 10, 18, 12, 2, tzinfo=timezone.utc)
+
+
+def _assignment(lead_id: str, assignee: str, age: timedelta) -> dict:
+    return {"lead_id": lead_id, "assigned_to": assignee, "created_at": (NOW - age).isoformat()}
+
+
+def test_tracker_counts_sliding_windows_and_reconciles(fake_client):
+    client = fake_client(
+        {
+            "lead_assignments": [
+                _assignment("l1", "a", timedelta(minutes=10)),
+                _assignment("l2", "a", timedelta(hours=5)),
+                _assignment("l3", "b", timedelta(hours=30)),
+                _assignment("l4", "b", timedelta(days=9)),
+                _assignment("l5", None, timedelta(minutes=1)),
+            ]
+        }
+    )
+    clock = [NOW.timestamp()]
+    tracker = AssignmentLoadTracker(72, 5, 300, clock=lambda: clock[0])
+
+    assert tracker.counts(client, ["a", "b", "c"], 24) == {"a": 2, "b": 0, "c": 0}
+    assert tracker.counts(client, ["a", "b"], 48) == {"a": 2, "b": 1}
+    assert tracker.counts(client, ["a"], 1) == {"a": 1}
+
+    tracker.record({"n1": "c", "n2": "c"})
+    clock[0] += 60
+    assert tracker.counts(client, ["a", "c"], 1) == {"a": 1, "c": 2}
+    # Re-routing moves the lead's count; recording the same assignee again is a no-op.
+    tracker.record({"l1": "c", "n2": "c"})
+    assert tracker.counts(client, ["a", "c"], 1) == {"a": 0, "c": 3}
+    assert client.calls.count(("lead_assignments", "select")) == 1
+
+    # Older assignments slide out of the window as time passes.
+    clock[0] += 2 * 3600
+    assert tracker.counts(client, ["a", "c"], 1) == {"a": 0, "c": 0}
+    # The reconcile re-read the table, which never saw the recorded ones.
+    assert client.calls.count(("lead_assignments", "select")) == 2
+    assert tracker.counts(client, ["a", "c"], 24) == {"a": 2, "c": 0}
+    assert not tracker.covers(96)
+
+
+def test_tracker_reseeds_without_blocking_counts_and_keeps_new_assignments(monkeypatch, fake_client):
+    client = fake_client({"lead_assignments": [_assignment("l1", "a", timedelta(minutes=10))]})
+    clock = [NOW.timestamp()]
+    tracker = AssignmentLoadTracker(72, 5, 300, clock=lambda: clock[0])
+    tracker.refresh(client)
+
+    reading, release = threading.Event(), threading.Event()
+    query_class = type(client.table("lead_assignments"))
+    real_execute = query_class.execute
+
+    def slow_execute(query):
+        reading.set()
+        release.wait(5)
+        return real_execute(query)
+
+    monkeypatch.setattr(query_class, "execute", slow_execute)
+    clock[0] += 600
+    reseed = threading.Thread(target=tracker.refresh, args=(client,))
+    reseed.start()
+    assert reading.wait(5)
+    # While the re-seed reads, counts come from the previous state and new
+    # assignments are recorded, then replayed onto the fresh counts.
+    assert tracker.counts(client, ["a", "b"], 24) == {"a": 1, "b": 0}
+    tracker.record({"l1": "b", "l2": "b"})
+    release.set()
+    reseed.join(5)
+    assert tracker.counts(client, ["a", "b"], 24) == {"a": 0, "b": 2}
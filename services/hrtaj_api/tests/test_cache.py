@@ -0,0 +1,98 @@
+import asyncio
+
+from app import cache
+from app.cache import AsyncTTLCache, TTLCache
+
+
+def test_ttl_cache_expires_evicts_and_counts(monkeypatch):
+    clock = [100.0]
+    monkeypatch.setattr(cache.time, "monotonic", lambda: clock[0])
+    loads: list[str] = []
+
+    def loader(key):
+        return lambda: loads.append(key) or key.upper()
+
+    ttl_cache = TTLCache("test", max_entries=2, ttl_seconds=10)
+    assert ttl_cache.get_or_load("a", loader("a")) == "A"
+    assert ttl_cache.get_or_load("a", loader("a")) == "A"
+    ttl_cache.get_or_load("b", loader("b"))
+    ttl_cache.get_or_load("a", loader("a"))
+    ttl_cache.get_or_load("c", loader("c"))  # evicts "b", the least recently used
+    ttl_cache.get_or_load("a", loader("a"))
+    clock[0] += 11
+    ttl_cache.get_or_load("a", loader("a"))
+
+    assert loads == ["a", "b", "c", "a"]
+    stats = ttl_cache.stats()
+    assert (stats["hits"], stats["misses"], stats["evictions"], stats["expirations"]) == (3, 4, 1, 1)
+    assert stats["entries"] == 2
+
+
+def test_ttl_cache_invalidate_drops_in_flight_loads():
+    ttl_cache = TTLCache("test", max_entries=10, ttl_seconds=60)
+
+    def stale_load():
+        ttl_cache.invalidate()
+        return "stale"
+
+    assert ttl_cache.get_or_load("key", stale_load) == "stale"
+    assert ttl_cache.get_or_load("key", lambda: "fresh") == "fresh"
+    assert ttl_cache.invalidate("key") == 1
+    assert ttl_cache.invalidate() == 0
+
+
+def test_async_cache_coalesces_concurrent_misses():
+    ttl_cache = AsyncTTLCache("test", max_entries=10, ttl_seconds=60)
+    loads = []
+
+    async def load():
+        loads.append(1)
+        await asyncio.sleep(0.01)
+        return len(loads)
+
+    async def scenario():
+        first = await asyncio.gather(*(ttl_cache.get_or_load("key", load) for _ in range(5)))
+        return first, await ttl_cache.get_or_load("key", load)
+
+    first, again = asyncio.run(scenario())
+    assert first == [1] * 5 and again == 1
+    stats = ttl_cache.stats()
+    assert (stats["misses"], stats["coalesced"], stats["hits"]) == (1, 4, 1)
+
+
+def test_async_cache_shares_failures_without_caching_them():
+    ttl_cache = AsyncTTLCache("test", max_entries=10, ttl_seconds=60)
+
+    async def fail():
+        await asyncio.sleep(0.01)
+        raise RuntimeError("db down")
+
+    async def scenario():
+        return await asyncio.gather(*(ttl_cache.get_or_load("key", fail) for _ in range(3)), return_exceptions=True)
+
+    results = asyncio.run(scenario())
+    assert all(isinstance(result, RuntimeError) for result in results)
+    assert ttl_cache.stats()["entries"] == 0
+
+
+def test_async_cache_load_survives_a_cancelled_leader():
+    ttl_cache = AsyncTTLCache("test", max_entries=10, ttl_seconds=60)
+    loads = []
+
+    async def load():
+        loads.append(1)
+        await asyncio.sleep(0.02)
+        return "value"
+
+    async def scenario():
+        leader = asyncio.ensure_future(ttl_cache.get_or_load("key", load))
+        await asyncio.sleep(0)
+        waiter = asyncio.ensure_future(ttl_cache.get_or_load("key", load))
+        await asyncio.sleep(0)
+        leader.cancel()
+        return leader, await waiter
+
+    leader, value = asyncio.run(scenario())
+    assert leader.cancelled()
+    assert value == "value" and loads == [1]
+    assert ttl_cache.stats()["entries"] == 1
@@ -0,0 +1,93 @@
+import csv
+import dataclasses
+import io
+import json
+from datetime import datetime, timezone
+
+import pyarrow.parquet as pq
+import pytest
+
+from app.services import export_service
+
+
+def _day(day: int) -> datetime:
+    return datetime(2026, 10, day, tzinfo=timezone.utc)
+
+
+@pytest.fixture
+def leads_client(monkeypatch, fake_client):
+    # Seven leads share one timestamp, as after a bulk insert, so pages must
+    # continue by id within it.
+    leads = [
+        {
+            "id": f"lead-{index:02d}",
+            "created_at": "2026-10-01T00:00:00+00:00" if index < 7 else f"2026-10-{index:02d}T00:00:00+00:00",
+            "phone": None,
+            "budget_min": index * 1.5 if index % 2 else index,
+            "tags": ["vip"] if index == 3 else [],
+            # Null on the whole first page, numeric after it.
+            "score": index * 10 if index >= 3 else None,
+        }
+        for index in range(12)
+    ]
+    client = fake_client({"leads": list(reversed(leads))})
+    monkeypatch.setattr(export_service, "get_service_client", lambda: client)
+    monkeypatch.setattr(export_service, "settings", dataclasses.replace(export_service.settings, export_page_size=3))
+    return client
+
+
+def test_export_formats_stream_every_row_once(leads_client):
+    chunks = list(export_service.export_rows("leads", "ndjson"))
+    rows = [json.loads(line) for chunk in chunks for line in chunk.decode().splitlines()]
+    assert [row["id"] for row in rows] == [f"lead-{index:02d}" for index in range(12)]
+    # 3 + 3 + 1 rows at the shared timestamp, then 3 + 2 after it.
+    assert [len(chunk.decode().splitlines()) for chunk in chunks] == [3, 3, 1, 3, 2]
+
+    text = b"".join(export_service.export_rows("leads", "csv", ["id", "tags"])).decode()
+    parsed = list(csv.reader(io.StringIO(text)))
+    assert parsed[0] == ["id", "tags"]
+    assert parsed[4] == ["lead-03", '["vip"]']
+    assert len(parsed) == 13
+
+    table = pq.read_table(io.BytesIO(b"".join(export_service.export_rows("leads", "parquet"))))
+    assert table.num_rows == 12
+    assert table.column("budget_min").to_pylist()[:4] == [0.0, 1.5, 2.0, 4.5]
+    assert table.column("phone").null_count == 12
+    assert str(table.schema.field("score").type) == "int64"
+    assert table.column("score").to_pylist()[2:5] == [None, 30, 40]
+    assert table.column("tags").to_pylist()[3] == '["vip"]'
+    assert table.column_names == list(export_service.EXPORT_COLUMNS["leads"])
+
+
+def test_export_filters_and_validates(leads_client):
+    rows = b"".join(
+        export_service.export_rows("leads", "ndjson", created_from=_day(8), created_to=_day(10))
+    ).decode().splitlines()
+    assert [json.loads(row)["id"] for row in rows] == ["lead-08", "lead-09"]
+    with pytest.raises(ValueError):
+        export_service.export_rows("profiles", "csv")
+    with pytest.raises(ValueError):
+        export_service.export_rows("leads", "xlsx")
+    with pytest.raises(ValueError, match="nope"):
+        export_service.export_rows("leads", "csv", ["id", "nope"])
+
+    def empty(export_format):
+        return b"".join(export_service.export_rows("leads", export_format, ["id", "score"], created_from=_day(30)))
+
+    table = pq.read_table(io.BytesIO(empty("parquet")))
+    assert (table.num_rows, table.column_names) == (0, ["id", "score"])
+    assert empty("csv") == b"id,score\r\n"
+
+
+def test_export_endpoint_rejects_unknown_columns_before_streaming(monkeypatch, leads_client):
+    from fastapi.testclient import TestClient
+
+    from app import security
+    from main import app
+
+    monkeypatch.setattr(security, "settings", dataclasses.replace(security.settings, admin_api_key="secret"))
+    response = TestClient(app).get(
+        "/v1/export/leads", params={"columns": "id,nope"}, headers={"x-hrtaj-admin-key": "secret"}
+    )
+    assert response.status_code == 400
+    assert response.json()["error"]["code"] == "invalid_request"
@@ -0,0 +1,37 @@
+import pickle
+
+import numpy as np
+
+from app.import_errors import ImportErrorLog
+
+
+def test_error_log_keeps_counts_and_capped_samples():
+    log = ImportErrorLog(sample_limit=2)
+    rows = np.arange(2, 12)
+    log.add_checks(rows, np.zeros(10, dtype=int), [("price", "Invalid price."), ("type", "Missing unit type.")])
+    log.add(40, "type", "Missing unit type.", "Sheet 2")
+
+    assert len(log) == 11
+    assert log.counts() == {"price": 10, "type": 1}
+    assert [(error.row, error.field, error.sheet) for error in log.samples()] == [
+        (2, "price", None),
+        (3, "price", None),
+        (40, "type", "Sheet 2"),
+    ]
+    assert [error.row for error in log][-2:] == [11, 40]
+
+
+def test_error_log_merge_preserves_order_across_pickling():
+    first = ImportErrorLog()
+    first.add(5, "address", "Missing address.")
+    chunk = ImportErrorLog()
+    chunk.add_checks(np.array([7, 7]), np.array([1, 0]), [("type", "Missing unit type."), ("price", "Invalid price.")])
+
+    first.merge(pickle.loads(pickle.dumps(chunk)))
+
+    assert [(error.row, error.field, error.message) for error in first] == [
+        (5, "address", "Missing address."),
+        (7, "price", "Invalid price."),
+        (7, "type", "Missing unit type."),
+    ]
+    assert first.counts() == {"address": 1, "price": 1, "type": 1}
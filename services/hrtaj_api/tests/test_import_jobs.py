@@ -0,0 +1,57 @@
+import threading
+
+from app.schemas import ImportReport
+from app.services import import_jobs, import_service
+
+
+def _spool(content: bytes, filename: str) -> str:
+    path = import_jobs.spool_path(filename)
+    with open(path, "wb") as handle:
+        handle.write(content)
+    return path
+
+
+def test_resale_job_runs_in_background(monkeypatch, fake_client):
+    monkeypatch.setattr(import_service, "get_service_client", lambda: fake_client())
+    path = _spool(b"type,price,address,city\nflat,100,1 St,Cairo\nvilla,,2 St,Giza\n", "intake.csv")
+
+    queued = import_jobs.submit(
+        "resale",
+        "intake.csv",
+        path,
+        owner_user_id="owner-1",
+        hr_owner_user_id=None,
+        default_city=None,
+        default_purpose=None,
+        dry_run=True,
+    )
+    import_jobs._jobs[queued.job_id].future.result(timeout=10)
+
+    job = import_jobs.get_job(queued.job_id)
+    assert job.status == "succeeded"
+    assert job.rows_processed == 2
+    assert job.report.rows_inserted == 1
+    assert job.report.rows_failed == 1
+    assert job.report.error_counts == {"price": 1}
+    assert [(error.row, error.field) for error in import_jobs.get_job_errors(queued.job_id)] == [(3, "price")]
+
+
+def test_running_job_can_be_cancelled(monkeypatch):
+    started = threading.Event()
+
+    def slow_import(handle, filename, on_progress, **_kwargs):
+        report = ImportReport(rows_total=0, rows_inserted=0, rows_updated=0, rows_failed=0, mapping={})
+        started.set()
+        while True:
+            report.rows_total += 1
+            on_progress(report)
+
+    monkeypatch.setattr(import_jobs, "import_resale", slow_import)
+    queued = import_jobs.submit("resale", "big.csv", _spool(b"", "big.csv"))
+    assert started.wait(timeout=10)
+
+    import_jobs.cancel_job(queued.job_id)
+    import_jobs._jobs[queued.job_id].future.result(timeout=10)
+    job = import_jobs.get_job(queued.job_id)
+    assert job.status == "cancelled"
+    assert job.rows_processed > 0
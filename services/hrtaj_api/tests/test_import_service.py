@@ -0,0 +1,300 @@
+import dataclasses
+import gzip
+import io
+import zipfile
+
+import pytest
+
+from app.services import import_service
+
+
+RESALE_CSV = """type,price,address,city,unit code,owner phone
+Apartment,"1,500,000",12 Nile St,Cairo,HR-1,01011112222
+Villa,9000000,5 Palm Rd,Giza,,01033334444
+Villa,9500000,5 Palm Rd,Giza,,01033334444
+Duplex,,7 Sea Rd,Alex,,
+Studio,800000,9 Tahrir Sq,Cairo,,01055556666
+Studio,800000,9 Tahrir Sq,Cairo,,01055556666
+""".encode()
+
+
+def test_import_resale_batches_writes(monkeypatch, fake_client):
+    client = fake_client(
+        {
+            "listings": [{"id": "existing-1", "unit_code": "HR-1", "listing_code": "L-7"}],
+            "resale_intake": [],
+        }
+    )
+    monkeypatch.setattr(import_service, "get_service_client", lambda: client)
+
+    report = import_service.import_resale(RESALE_CSV, "intake.csv", "owner-1", None, None, None, False)
+
+    assert report.rows_total == 6
+    assert report.rows_inserted == 3
+    assert report.rows_updated == 1
+    assert report.rows_superseded == 1
+    assert report.rows_failed == 1
+    # The first Studio row is replaced by the identical row after it.
+    superseded = [(item.row, item.match_row) for item in report.duplicates if item.reason == "superseded"]
+    assert superseded == [(6, 7)]
+    assert [error.row for error in report.errors] == [5]
+    assert len(client.tables["listings"]) == 4
+    assert {row["listing_id"] for row in client.tables["resale_intake"]} == {
+        row["id"] for row in client.tables["listings"]
+    }
+    studio = next(row for row in client.tables["listings"] if row.get("type") == "Studio")
+    assert studio["price"] == 800000.0
+    assert sorted(row["unit_code"] for row in client.tables["listings"]) == [
+        "HR-0000001",
+        "HR-0000002",
+        "HR-0000003",
+        "HR-1",
+    ]
+    writes = [call for call in client.calls if call[1] != "select" and call[0] != "import_files"]
+    # Existing listings are updated in place, keeping columns the sheet does not carry.
+    assert writes == [
+        ("reserve_unit_code_block", "rpc"),
+        ("listings", "insert"),
+        ("resale_intake", "insert"),
+        ("apply_listing_updates", "rpc"),
+        ("resale_intake", "upsert"),
+    ]
+    existing = next(row for row in client.tables["listings"] if row["id"] == "existing-1")
+    assert (existing["listing_code"], existing["price"]) == ("L-7", 1500000.0)
+
+
+def test_resale_reimport_skips_unchanged_rows_and_files(monkeypatch, fake_client):
+    client = fake_client({"listings": [{"id": "existing-1", "unit_code": "HR-1"}], "resale_intake": []})
+    monkeypatch.setattr(import_service, "get_service_client", lambda: client)
+    first = import_service.import_resale(RESALE_CSV, "intake.csv", "owner-1", None, None, None, False)
+
+    client.calls.clear()
+    again = import_service.import_resale(RESALE_CSV, "intake.csv", "owner-1", None, None, None, False)
+    assert again.file_already_imported
+    assert again.file_sha256 == first.file_sha256
+    assert (again.rows_inserted, again.rows_updated, again.rows_unchanged, again.rows_superseded) == (0, 0, 4, 1)
+    assert [call for call in client.calls if call[1] != "select"] == []
+
+    client.calls.clear()
+    forced = import_service.import_resale(RESALE_CSV, "intake.csv", "owner-1", None, None, None, False, force=True)
+    assert (forced.rows_inserted, forced.rows_updated, forced.rows_unchanged, forced.rows_superseded) == (0, 0, 4, 1)
+    assert [call for call in client.calls if call[1] != "select"] == [("import_files", "upsert")]
+
+    client.calls.clear()
+    edited = RESALE_CSV.replace(b'"1,500,000"', b'"1,450,000"')
+    changed = import_service.import_resale(edited, "intake.csv", "owner-1", None, None, None, False)
+    assert (changed.rows_inserted, changed.rows_updated, changed.rows_unchanged) == (0, 1, 3)
+    assert [call for call in client.calls if call[1] != "select"] == [
+        ("apply_listing_updates", "rpc"),
+        ("resale_intake", "upsert"),
+        ("import_files", "upsert"),
+    ]
+
+
+
+def test_resale_rows_repeating_a_listing_settle_on_the_last_one(monkeypatch, fake_client):
+    client = fake_client({"listings": [{"id": "existing-1", "unit_code": "HR-1"}], "resale_intake": []})
+    monkeypatch.setattr(import_service, "get_service_client", lambda: client)
+    monkeypatch.setattr(import_service, "settings", dataclasses.replace(import_service.settings, import_batch_size=1))
+    csv = b"""type,price,address,city,unit code,owner phone
+Apartment,1500000,12 Nile St,Cairo,HR-1,01011112222
+Apartment,1600000,12 Nile St,Cairo,HR-1,01011112222
+"""
+    first = import_service.import_resale(csv, "intake.csv", "owner-1", None, None, None, False)
+    assert (first.rows_updated, first.rows_superseded) == (1, 1)
+    assert client.tables["listings"][0]["price"] == 1600000.0
+
+    client.calls.clear()
+    again = import_service.import_resale(csv, "intake.csv", "owner-1", None, None, None, False, force=True)
+    assert (again.rows_updated, again.rows_unchanged, again.rows_superseded) == (0, 1, 1)
+    assert [call for call in client.calls if call[1] != "select"] == [("import_files", "upsert")]
+
+PROJECTS_CSV = """project code,project title,type,price,unit code
+P1,Palm Hills,Apartment,100,U1
+P1,Palm Hills,Apartment,120,U2
+,Palm Hills,Villa,300,U3
+P2,New Lake,Studio,50,U1
+P2,New Lake,Studio,55,U1
+P3,,Duplex,,U9
+""".encode()
+
+
+def test_import_projects_uses_catalog_snapshot(monkeypatch, fake_client):
+    client = fake_client(
+        {
+            "projects": [{"id": "proj-1", "developer_id": "dev-1", "project_code": "P1", "title_ar": "Palm Hills"}],
+            "listings": [{"id": "unit-1", "project_id": "proj-1", "unit_code": "U1"}],
+        }
+    )
+    monkeypatch.setattr(import_service, "get_service_client", lambda: client)
+
+    report = import_service.import_projects(PROJECTS_CSV, "units.csv", "dev-1", "owner-1", False)
+
+    assert (report.rows_inserted, report.rows_updated, report.rows_failed) == (3, 2, 1)
+    assert len(client.tables["projects"]) == 2
+    new_lake = next(row for row in client.tables["projects"] if row["project_code"] == "P2")
+    studio = [row for row in client.tables["listings"] if row.get("project_id") == new_lake["id"]]
+    assert [row["price"] for row in studio] == [55.0]
+    assert client.calls.count(("projects", "select")) == 1
+    assert len([call for call in client.calls if call[0] != "import_files"]) == 5
+
+
+DEDUP_CSV = """type,price,address,city,owner phone
+Apartment,1200000,"12, Nile St.",Cairo,010 1234 5678
+Villa,7000000,3 Palm Rd,Giza,01099998888
+Villa,7000000,3 palm rd,Giza,01077776666
+""".encode()
+
+
+def test_import_resale_flags_duplicates(monkeypatch, fake_client):
+    client = fake_client(
+        {
+            "listings": [{"id": "existing-1", "unit_code": "HR-9"}],
+            "resale_intake": [
+                {
+                    "listing_id": "existing-1",
+                    "owner_phone": "+201012345678",
+                    "owner_phone_e164": "+201012345678",
+                    "address": "12 Nile St",
+                    "price": 1500000,
+                }
+            ],
+        }
+    )
+    monkeypatch.setattr(import_service, "get_service_client", lambda: client)
+
+    report = import_service.import_resale(DEDUP_CSV, "intake.csv", "owner-1", None, None, None, False)
+
+    assert report.rows_inserted == 3
+    assert [(d.row, d.match_row, d.listing_id, d.reason) for d in report.duplicates] == [
+        (2, None, "existing-1", "phone_address"),
+        (4, 3, report.duplicates[1].listing_id, "address_price"),
+    ]
+    assert client.tables["resale_intake"][1]["owner_phone_e164"] == "+201012345678"
+
+
+def test_duplicates_are_capped_and_checked_in_dry_runs(monkeypatch, fake_client):
+    monkeypatch.setattr(
+        import_service, "settings", dataclasses.replace(import_service.settings, import_duplicate_samples=1)
+    )
+    client = fake_client(
+        {
+            "listings": [{"id": "existing-1", "unit_code": "HR-9"}],
+            "resale_intake": [
+                {
+                    "listing_id": "existing-1",
+                    "owner_phone": "+201012345678",
+                    "owner_phone_e164": "+201012345678",
+                    "address": "12 Nile St",
+                    "price": 1500000,
+                }
+            ],
+        }
+    )
+    monkeypatch.setattr(import_service, "get_service_client", lambda: client)
+
+    report = import_service.import_resale(DEDUP_CSV, "intake.csv", "owner-1", None, None, None, True)
+
+    assert [(d.row, d.listing_id, d.reason) for d in report.duplicates] == [(2, "existing-1", "phone_address")]
+    assert report.duplicates_total == 2
+    assert report.duplicate_counts == {"phone_address": 1, "address_price": 1}
+    assert len(client.tables["resale_intake"]) == 1
+
+
+def _project_workbook() -> bytes:
+    from openpyxl import Workbook
+
+    workbook = Workbook()
+    palm = workbook.active
+    palm.title = "Palm Hills"
+    palm.append(["project code", "project title", "type", "price", "unit code"])
+    palm.append(["P1", "Palm Hills", "Apartment", 100, "U1"])
+    palm.append(["P1", "Palm Hills", "Apartment", None, "U2"])
+    lake = workbook.create_sheet("New Lake")
+    lake.append(["كود المشروع", "اسم المشروع", "نوع", "السعر", "الكود"])
+    lake.append(["P2", "New Lake", "Studio", 50, "U7"])
+    lake.append(["P2", "New Lake", "Studio", 55, "U8"])
+    workbook.create_sheet("Notes")
+    buffer = io.BytesIO()
+    workbook.save(buffer)
+    return buffer.getvalue()
+
+
+@pytest.mark.parametrize("parallel", [False, True])
+def test_import_projects_reads_every_sheet(monkeypatch, fake_client, parallel):
+    client = fake_client({"projects": [], "listings": []})
+    monkeypatch.setattr(import_service, "get_service_client", lambda: client)
+
+    report = import_service.import_projects(
+        _project_workbook(), "units.xlsx", "dev-1", "owner-1", False, all_sheets=True, parallel=parallel
+    )
+
+    assert (report.rows_total, report.rows_inserted, report.rows_failed) == (4, 3, 1)
+    assert [(error.sheet, error.row, error.field) for error in report.errors] == [("Palm Hills", 3, "price")]
+    assert sorted(row["project_code"] for row in client.tables["projects"]) == ["P1", "P2"]
+
+
+def test_import_resale_parallel_matches_sequential(monkeypatch, fake_client):
+    monkeypatch.setattr(import_service, "settings", dataclasses.replace(import_service.settings, import_chunk_rows=2))
+    reports = []
+    for parallel in (False, True):
+        client = fake_client({"listings": [{"id": "existing-1", "unit_code": "HR-1"}], "resale_intake": []})
+        monkeypatch.setattr(import_service, "get_service_client", lambda: client)
+        report = import_service.import_resale(RESALE_CSV, "intake.csv", "owner-1", None, None, None, True, parallel=parallel)
+        reports.append(report.model_dump())
+    assert reports[0] == reports[1]
+
+
+def test_import_resale_combines_zip_members(monkeypatch, fake_client):
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w") as archive:
+        archive.writestr("agent-a.csv", "type,price,address,city,owner phone\nflat,100,1 Nile St,Cairo,01011112222\n")
+        archive.writestr(
+            "agent-b.csv.gz",
+            gzip.compress(b"type,price,address,city,owner phone\nflat,,2 Nile St,Cairo,\nflat,100,1 nile st,Cairo,\n"),
+        )
+        archive.writestr("notes/readme.txt", "ignored")
+        archive.writestr("broken.csv", "kind,cost\nflat,1\n")
+    client = fake_client({"listings": [], "resale_intake": []})
+    monkeypatch.setattr(import_service, "get_service_client", lambda: client)
+
+    report = import_service.import_resale(buffer.getvalue(), "agents.zip", "owner-1", None, None, None, False)
+
+    assert (report.rows_total, report.rows_inserted, report.rows_failed) == (4, 2, 2)
+    assert [(error.sheet, error.row, error.field) for error in report.errors] == [
+        ("agent-b.csv.gz", 2, "price"),
+        ("broken.csv", 0, "headers"),
+    ]
+    assert [(d.sheet, d.row, d.match_sheet, d.match_row, d.reason) for d in report.duplicates] == [
+        ("agent-b.csv.gz", 3, "agent-a.csv", 2, "address_price")
+    ]
+    assert len(client.tables["listings"]) == 2
+
+
+
+def test_zip_members_are_sent_to_workers_one_at_a_time(monkeypatch, fake_client):
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w") as archive:
+        for name in ("a.csv", "b.csv"):
+            archive.writestr(name, "type,price,address,city,owner phone\nflat,100,1 Nile St,Cairo,01011112222\n")
+    client = fake_client({"listings": [], "resale_intake": []})
+    monkeypatch.setattr(import_service, "get_service_client", lambda: client)
+    sent = []
+    run_tasks = import_service.map_ordered
+
+    def record(fn, tasks, parallel):
+        tasks = list(tasks)
+        sent.extend((task[2], task[3]) for task in tasks)
+        return run_tasks(fn, tasks, False)
+
+    monkeypatch.setattr(import_service, "map_ordered", record)
+    upload = io.BytesIO(buffer.getvalue())  # a file object with no path, like an in-memory upload
+    report = import_service.import_resale(upload, "agents.zip", "owner-1", None, None, None, True)
+
+    assert report.rows_inserted == 2
+    assert [(name, data.startswith(b"type,")) for data, name in sent] == [("a.csv", True), ("b.csv", True)]
+
+def test_import_resale_reads_gzipped_csv(monkeypatch, fake_client):
+    monkeypatch.setattr(import_service, "get_service_client", lambda: fake_client())
+    report = import_service.import_resale(gzip.compress(RESALE_CSV), "intake.csv.gz", "owner-1", None, None, None, True)
+    assert (report.rows_total, report.rows_failed) == (6, 1)
@@ -0,0 +1,130 @@
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from app.import_utils import (
+    coerce_bool,
+    coerce_date,
+    coerce_float,
+    coerce_int,
+    coerce_text,
+    collect_row_errors,
+    is_missing,
+    normalize_text,
+    parse_bool,
+    parse_date,
+    parse_float,
+    parse_int,
+)
+
+MESSY = pd.Series(
+    [
+        "1,250,000",
+        " 42 ",
+        None,
+        np.nan,
+        "",
+        "abc",
+        "نعم",
+        "لا",
+        "Yes",
+        True,
+        3,
+        2.7,
+        "2024-03-05",
+        datetime(2024, 1, 2, 9, 30),
+        "1e3",
+    ],
+    dtype=object,
+)
+
+
+def test_column_coercers_match_scalar_parsers():
+    pairs = [
+        (coerce_text, normalize_text),
+        (coerce_float, parse_float),
+        (coerce_int, parse_int),
+        (coerce_bool, parse_bool),
+        (coerce_date, parse_date),
+    ]
+    for column_fn, scalar_fn in pairs:
+        expected = [scalar_fn(value) for value in MESSY]
+        assert list(column_fn(MESSY)) == expected, column_fn.__name__
+
+
+def test_numeric_column_coercion_keeps_missing_cells():
+    series = pd.Series([1.0, np.nan, 3.5])
+    assert list(coerce_float(series)) == [1.0, None, 3.5]
+    assert list(coerce_int(series)) == [1, None, 3]
+
+
+def test_collect_row_errors_orders_fields_per_row():
+    type_missing = is_missing(np.array(["flat", None, None], dtype=object))
+    price_missing = is_missing(np.array([None, 10.0, None], dtype=object))
+    failed, errors = collect_row_errors(
+        np.array([2, 3, 4]),
+        [("type", type_missing, "Missing unit type."), ("price", price_missing, "Invalid price.")],
+    )
+    assert failed.tolist() == [True, True, True]
+    assert [(error.row, error.field) for error in errors] == [
+        (2, "price"),
+        (3, "type"),
+        (4, "type"),
+        (4, "price"),
+    ]
+
+
+def test_iter_table_chunks_keeps_sheet_row_numbers():
+    from io import BytesIO
+
+    from openpyxl import Workbook
+
+    from app.import_utils import iter_table_chunks
+
+    workbook = Workbook()
+    sheet = workbook.active
+    sheet.append(["Type", "Price", "Type"])
+    sheet.append(["flat", 1000.0, "x"])
+    sheet.append([None, None, None])
+    sheet.append(["villa", "2,000", None])
+    sheet.append([None, None, None])
+    buffer = BytesIO()
+    workbook.save(buffer)
+
+    chunks = list(iter_table_chunks(buffer.getvalue(), "units.xlsx", 2))
+    assert [list(chunk.index) for chunk in chunks] == [[0, 1], [2]]
+    assert list(chunks[0].columns) == ["Type", "Price", "Type.1"]
+    assert chunks[0]["Price"].tolist() == [1000, None]
+
+    pytest.importorskip("python_calamine")
+    calamine = list(iter_table_chunks(buffer.getvalue(), "units.xlsx", 2, engine="calamine"))
+    assert [chunk.to_dict("records") for chunk in calamine] == [chunk.to_dict("records") for chunk in chunks]
+
+    csv_chunks = list(iter_table_chunks(b"type,price\nflat,0100\nvilla,5\n", "units.csv", 1))
+    assert [list(chunk.index) for chunk in csv_chunks] == [[0], [1]]
+    assert csv_chunks[0]["price"].tolist() == ["0100"]
+
+
+@pytest.mark.parametrize("suffix", [".parquet", ".feather"])
+def test_iter_table_chunks_reads_arrow_formats(tmp_path, suffix):
+    pytest.importorskip("pyarrow")
+    from app.import_utils import iter_table_chunks, transform_columns
+
+    frame = pd.DataFrame({"type": ["flat", None, "villa"], "price": [1500000.0, np.nan, 2.5], "beds": [3, 2, 4]})
+    path = tmp_path / f"units{suffix}"
+    if suffix == ".parquet":
+        frame.to_parquet(path)
+    else:
+        frame.to_feather(path)
+
+    with open(path, "rb") as handle:
+        chunks = list(iter_table_chunks(handle, path.name, 2))
+    assert [list(chunk.index) for chunk in chunks] == [[0, 1], [2]]
+    cols = transform_columns(chunks[0], {"type": "type", "price": "price"}, {"type": "text", "price": "float"})
+    assert cols["type"].tolist() == ["flat", None]
+    assert cols["price"].tolist() == [1500000.0, None]
+
+    in_memory = list(iter_table_chunks(path.read_bytes(), path.name, 5))
+    assert in_memory[0]["beds"].tolist() == [3, 2, 4]
@@ -0,0 +1,59 @@
+import dataclasses
+from datetime import datetime, timedelta, timezone
+
+from app.services import lead_scores, lead_service
+
+NOW = datetime(2026, 10, 18, 12, tzinfo=timezone.utc)
+
+
+def _lead(lead_id: str, age: timedelta, **fields) -> dict:
+    created = (NOW - age).isoformat()
+    return {
+        "id": lead_id,
+        "listing_id": "listing-1",
+        "phone": "01011112222",
+        "email": "a@example.com",
+        "source": "campaign",
+        "created_at": created,
+        "updated_at": created,
+        "score_stale": True,
+        "score_expires_at": None,
+        **fields,
+    }
+
+
+def test_refresh_lead_scores_rescores_stale_and_decayed_leads(monkeypatch, fake_client):
+    client = fake_client(
+        {
+            "leads": [
+                _lead("fresh", timedelta(hours=2)),
+                _lead("recent", timedelta(days=2)),
+                _lead("old", timedelta(days=20)),
+                _lead("scored", timedelta(days=20), score_stale=False, score=999),
+            ],
+            "listings": [{"id": "listing-1", "price": 1000000}],
+        }
+    )
+    clock = [NOW]
+    monkeypatch.setattr(lead_scores, "get_service_client", lambda: client)
+    monkeypatch.setattr(lead_scores, "_now", lambda: clock[0])
+    monkeypatch.setattr(lead_service, "_now", lambda: clock[0])
+    monkeypatch.setattr(lead_scores, "settings", dataclasses.replace(lead_scores.settings, lead_batch_size=2))
+
+    assert lead_scores.refresh_lead_scores() == {"stale": 3, "decayed": 0}
+    leads = {row["id"]: row for row in client.tables["leads"]}
+    assert (leads["fresh"]["score"], leads["fresh"]["score_label"]) == (90, "hot")
+    assert leads["fresh"]["score_expires_at"] == (NOW + timedelta(hours=22)).isoformat()
+    assert (leads["recent"]["score"], leads["recent"]["score_label"]) == (80, "hot")
+    assert leads["recent"]["score_expires_at"] == (NOW + timedelta(days=5)).isoformat()
+    assert (leads["old"]["score"], leads["old"]["score_expires_at"]) == (75, None)
+    assert leads["old"]["scored_at"] == leads["old"]["updated_at"]
+    assert leads["scored"]["score"] == 999
+
+    # A day later only "fresh" has crossed a boundary; nothing is stale.
+    clock[0] = NOW + timedelta(days=1)
+    client.calls.clear()
+    assert lead_scores.refresh_lead_scores() == {"stale": 0, "decayed": 1}
+    assert (leads["fresh"]["score"], leads["fresh"]["score_label"]) == (80, "hot")
+    assert leads["fresh"]["score_expires_at"] == (NOW + timedelta(days=7) - timedelta(hours=2)).isoformat()
+    assert client.calls.count(("apply_lead_scores", "rpc")) == 1
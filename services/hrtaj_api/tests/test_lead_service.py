@@ -0,0 +1,138 @@
+import dataclasses
+from datetime import datetime, timedelta, timezone
+
+from app.schemas import LeadRouteBatchRequest, LeadRouteRequest, LeadScoreBatchRequest
+from app.services import lead_service
+
+NOW = datetime(2026, 10, 18, 12, tzinfo=timezone.utc)
+
+
+def _view(result) -> tuple:
+    return result.score, result.label, result.recommended_next_action
+
+
+def _leads() -> list[dict]:
+    ages = [timedelta(hours=1), timedelta(days=3), timedelta(days=30), None]
+    leads = []
+    for index in range(16):
+        age = ages[index % 4]
+        leads.append(
+            {
+                "id": f"lead-{index:02d}",
+                "listing_id": f"listing-{index % 3}" if index % 5 else None,
+                "phone": "" if index % 2 else "01011112222",
+                "email": "a@example.com" if index % 3 else None,
+                "source": ["Campaign", "walk-in", None, "REFERRAL"][index % 4],
+                "created_at": (NOW - age).isoformat().replace("+00:00", "Z") if age else None,
+                "status": "new" if index % 2 else "won",
+            }
+        )
+    return leads
+
+
+def test_score_leads_matches_single_lead_rules(monkeypatch, fake_client):
+    leads = _leads()
+    listings = [{"id": "listing-0", "price": 0}, {"id": "listing-1", "price": 2500000}, {"id": "listing-2"}]
+    client = fake_client({"leads": leads, "listings": listings})
+    monkeypatch.setattr(lead_service, "get_service_client", lambda: client)
+    monkeypatch.setattr(lead_service, "_now", lambda: NOW)
+    monkeypatch.setattr(lead_service, "settings", dataclasses.replace(lead_service.settings, lead_batch_size=5))
+
+    lead_ids = [lead["id"] for lead in leads] + ["missing"]
+    results = list(lead_service.score_leads(LeadScoreBatchRequest(lead_ids=lead_ids)))
+
+    prices = {listing["id"]: listing.get("price") for listing in listings}
+    expected = [
+        lead_service._score(lead, lead["source"], prices.get(lead["listing_id"]) if lead["listing_id"] else None)
+        for lead in leads
+    ] + [lead_service._score(None, None, None)]
+    assert [result.lead_id for result in results] == lead_ids
+    assert [_view(result) for result in results] == [_view(score) for score in expected]
+    assert {result.label for result in results} == {"hot", "warm", "cold"}
+    assert client.calls.count(("leads", "select")) == 4
+
+
+def test_score_leads_pages_filtered_leads_by_id(monkeypatch, fake_client):
+    client = fake_client({"leads": _leads(), "listings": []})
+    monkeypatch.setattr(lead_service, "get_service_client", lambda: client)
+    monkeypatch.setattr(lead_service, "settings", dataclasses.replace(lead_service.settings, lead_batch_size=3))
+
+    results = list(lead_service.score_leads(LeadScoreBatchRequest(status="new", limit=7)))
+
+    assert [result.lead_id for result in results] == [f"lead-{index:02d}" for index in range(1, 14, 2)]
+    assert client.calls.count(("leads", "select")) == 3
+
+
+def test_route_lead_reuses_cached_candidates(monkeypatch, fake_client):
+    client = fake_client(
+        {
+            "leads": [{"id": "lead-1", "listing_id": "listing-1"}, {"id": "lead-2", "listing_id": "listing-2"}],
+            "listings": [
+                {"id": "listing-1", "inventory_source": "resale"},
+                {"id": "listing-2", "inventory_source": "developer", "developer_id": "dev-1"},
+            ],
+            "profiles": [{"id": "staff-1", "role": "ops"}, {"id": "user-1", "role": "user"}],
+            "developer_members": [{"developer_id": "dev-1", "user_id": "member-1"}],
+            "lead_assignments": [],
+        }
+    )
+    monkeypatch.setattr(lead_service, "get_service_client", lambda: client)
+
+    for lead_id in ["lead-1", "lead-2", "lead-1", "lead-2"]:
+        lead_service.route_lead(LeadRouteRequest(lead_id=lead_id, dry_run=True))
+
+    assert client.calls.count(("profiles", "select")) == 1
+    assert client.calls.count(("developer_members", "select")) == 1
+    assert lead_service.candidate_cache.stats()["hits"] == 2
+    assert client.calls.count(("lead_assignments", "select")) == 1
+
+    assert lead_service.invalidate_candidates(developer_id="dev-1") == 1
+    result = lead_service.route_lead(LeadRouteRequest(lead_id="lead-2", dry_run=True))
+    assert result.candidates == ["member-1"]
+    assert client.calls.count(("developer_members", "select")) == 2
+
+
+def test_route_leads_balances_pools_with_bulk_writes(monkeypatch, fake_client):
+    leads = [{"id": f"lead-{index}", "listing_id": "resale-1", "assigned_to": None} for index in range(4)]
+    leads += [{"id": f"lead-{index}", "listing_id": "project-1", "assigned_to": None} for index in range(4, 6)]
+    leads.append({"id": "lead-9", "listing_id": "resale-1", "assigned_to": "staff-1"})
+    client = fake_client(
+        {
+            "leads": leads,
+            "listings": [
+                {"id": "resale-1", "inventory_source": "resale"},
+                {"id": "project-1", "inventory_source": "developer", "developer_id": "dev-1"},
+            ],
+            "profiles": [{"id": "staff-1", "role": "admin"}, {"id": "staff-2", "role": "ops"}],
+            "developer_members": [
+                {"developer_id": "dev-1", "user_id": "member-1"},
+                {"developer_id": "dev-1", "user_id": "member-2"},
+            ],
+            "lead_assignments": [
+                {"lead_id": "old-1", "assigned_to": "staff-1", "created_at": datetime.now(timezone.utc).isoformat()},
+                {"lead_id": "old-2", "assigned_to": "staff-1", "created_at": datetime.now(timezone.utc).isoformat()},
+            ],
+        }
+    )
+    monkeypatch.setattr(lead_service, "get_service_client", lambda: client)
+
+    result = lead_service.route_leads(LeadRouteBatchRequest())
+
+    assert [(item.lead_id, item.assigned_to, item.mode) for item in result.assignments] == [
+        ("lead-0", "staff-2", "staff"),
+        ("lead-1", "staff-2", "staff"),
+        ("lead-2", "staff-1", "staff"),
+        ("lead-3", "staff-2", "staff"),
+        ("lead-4", "member-1", "developer"),
+        ("lead-5", "member-2", "developer"),
+    ]
+    assert result.loads == {"staff-1": 3, "staff-2": 3, "member-1": 1, "member-2": 1}
+    assert {row["id"]: row["assigned_to"] for row in client.tables["leads"]}["lead-3"] == "staff-2"
+    assert len(client.tables["lead_assignments"]) == 8
+    writes = [call for call in client.calls if call[1] != "select"]
+    assert writes.count(("leads", "update")) == 4
+    assert writes.count(("lead_assignments", "upsert")) == 1
+
+    again = lead_service.route_leads(LeadRouteBatchRequest(lead_ids=["lead-9", "missing"], dry_run=True))
+    assert [item.assigned_to for item in again.assignments] == ["staff-1"]
+    assert again.not_found == ["missing"]
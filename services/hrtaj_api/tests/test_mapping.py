@@ -1,4 +1,4 @@
-from app.import_utils import map_headers
+from app.import_utils import map_headers, match_headers
 
 
 def test_map_headers_arabic():
@@ -28,3 +28,21 @@ def test_map_headers_english():
     assert mapping["price"] == "Price"
     assert mapping["address"] == "Address"
     assert mapping["unit_code"] == "Unit Code"
+
+
+def test_map_headers_arabic_spelling_variants():
+    columns = ["نـــوع", "السّعر", "العنوان", "أعلان", "المساحه"]
+    mapping, _ = map_headers(columns)
+    assert mapping["type"] == "نـــوع"
+    assert mapping["price"] == "السّعر"
+    assert mapping["ad_channel"] == "أعلان"
+    assert mapping["size_m2"] == "المساحه"
+
+
+def test_match_headers_fuzzy_scores():
+    mapping, reverse, scores = match_headers(["Adress", "Pricee", "Type", "Zzz"])
+    assert mapping["address"] == "Adress"
+    assert mapping["price"] == "Pricee"
+    assert scores["type"] == 1.0
+    assert 0.85 <= scores["address"] < 1.0
+    assert "Zzz" not in reverse
@@ -0,0 +1,68 @@
+from app import db, metrics
+
+
+def test_histogram_renders_cumulative_buckets():
+    histogram = metrics.Histogram("test_latency_seconds", "Test latency.", ("route",), buckets=(0.1, 1.0))
+    metrics.registry.remove(histogram)
+    for value in (0.05, 0.1, 0.5, 3.0):
+        histogram.observe(value, route='/a"b')
+
+    assert histogram.render() == [
+        "# HELP test_latency_seconds Test latency.",
+        "# TYPE test_latency_seconds histogram",
+        'test_latency_seconds_bucket{route="/a\\"b",le="0.1"} 2',
+        'test_latency_seconds_bucket{route="/a\\"b",le="1"} 3',
+        'test_latency_seconds_bucket{route="/a\\"b",le="+Inf"} 4',
+        'test_latency_seconds_sum{route="/a\\"b"} 3.65',
+        'test_latency_seconds_count{route="/a\\"b"} 4',
+    ]
+
+
+def test_execute_records_attempts_retries_and_rows(monkeypatch, fake_client):
+    client = fake_client({"leads": [{"id": "a"}, {"id": "b"}]})
+    monkeypatch.setattr(db.execute.retry, "sleep", lambda _seconds: None)
+    query = client.table("leads").select("id")
+    real_execute = query.execute
+    attempts = []
+
+    def flaky_execute():
+        attempts.append(1)
+        if len(attempts) == 1:
+            raise ConnectionError("reset")
+        return real_execute()
+
+    query.execute = flaky_execute
+    labels = {"table": "leads", "operation": "select"}
+    before_rows = metrics.db_rows_returned.value(**labels) or 0
+    before_retries = metrics.db_query_retries.value(**labels) or 0
+    before_errors = metrics.db_queries.value(outcome="error", **labels) or 0
+
+    assert len(db.execute(query).data) == 2
+
+    assert metrics.db_rows_returned.value(**labels) - before_rows == 2
+    assert metrics.db_query_retries.value(**labels) - before_retries == 1
+    assert metrics.db_queries.value(outcome="error", **labels) - before_errors == 1
+
+
+def test_metrics_endpoint_reports_route_templates(monkeypatch):
+    import dataclasses
+
+    from fastapi.testclient import TestClient
+
+    from app import security
+    from main import app
+
+    monkeypatch.setattr(security, "settings", dataclasses.replace(security.settings, admin_api_key="secret"))
+    client = TestClient(app)
+    labels = {"method": "GET", "route": "/health", "status": "200"}
+    before = metrics.http_requests.value(**labels) or 0
+    assert client.get("/health").status_code == 200
+    client.get("/no/such/path")
+
+    assert client.get("/metrics").status_code == 401
+    response = client.get("/metrics", headers={"x-hrtaj-admin-key": "secret"})
+    assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+    assert metrics.http_requests.value(**labels) - before == 1
+    assert 'hrtaj_http_requests_total{method="GET",route="unmatched",status="404"}' in response.text
+    assert 'hrtaj_http_request_duration_seconds_bucket{method="GET",route="/health",le="+Inf"}' in response.text
+    assert metrics.http_requests_in_progress.value(method="GET", route="/health") == 0
@@ -0,0 +1,69 @@
+import asyncio
+from datetime import datetime, timezone
+
+from app import db
+from app.services import report_service
+
+
+def test_reports_read_lead_rollups(monkeypatch, fake_client):
+    client = fake_client(
+        {
+            "lead_daily_rollups": [
+                {"day": "2026-10-01", "status": "new", "source": "", "leads": 4},
+                {"day": "2026-10-16", "status": "new", "source": "campaign", "leads": 3},
+                {"day": "2026-10-16", "status": "won", "source": "campaign", "leads": 1},
+                {"day": "2026-10-17", "status": "contacted", "source": "", "leads": 2},
+                {"day": "2026-10-17", "status": "lost", "source": "partner", "leads": 0},
+            ],
+            "report_units_per_day": [{"day": "2026-10-17", "units": 5}],
+        }
+    )
+
+    async def execute_async(query):
+        return query.execute()
+
+    async def get_client():
+        return client
+
+    monkeypatch.setattr(db, "execute_async", execute_async)
+    monkeypatch.setattr(report_service, "execute_async", execute_async)
+    monkeypatch.setattr(report_service, "get_async_service_client", get_client)
+    monkeypatch.setattr(report_service, "_now", lambda: datetime(2026, 10, 18, 9, tzinfo=timezone.utc))
+
+    pipeline = asyncio.run(report_service.pipeline_report(7))
+    assert pipeline["counts"] == {"new": 3, "won": 1, "contacted": 2}
+    assert pipeline["by_source"] == {"campaign": {"new": 3, "won": 1}, "unknown": {"contacted": 2}}
+    assert pipeline["since_day"] == "2026-10-11"
+
+    daily = asyncio.run(report_service.daily_report(7))
+    assert daily["leads"] == [{"day": "2026-10-17", "leads": 2}, {"day": "2026-10-16", "leads": 4}]
+    assert daily["units"] == [{"day": "2026-10-17", "units": 5}]
+
+
+def test_report_endpoint_caches_and_answers_conditional_gets(monkeypatch):
+    from fastapi.testclient import TestClient
+
+    from main import app
+
+    calls = []
+
+    async def pipeline(days):
+        calls.append(days)
+        return {"counts": {"new": days}}
+
+    monkeypatch.setitem(report_service.REPORTS, "pipeline", pipeline)
+    report_service.report_cache.invalidate()
+    client = TestClient(app)
+
+    first = client.get("/v1/reports/pipeline", params={"days": 3})
+    assert first.status_code == 200
+    assert first.json()["data"] == {"counts": {"new": 3}}
+    etag = first.headers["etag"]
+
+    again = client.get("/v1/reports/pipeline", params={"days": 3}, headers={"If-None-Match": etag})
+    assert again.status_code == 304
+    assert again.headers["etag"] == etag
+    assert client.get("/v1/reports/pipeline", params={"days": 3}, headers={"If-None-Match": '"other"'}).status_code == 200
+    client.get("/v1/reports/pipeline", params={"days": 9})
+    assert calls == [3, 9]
+    report_service.report_cache.invalidate()
@@ -0,0 +1,112 @@
+import asyncio
+import dataclasses
+from datetime import datetime, timedelta, timezone
+
+from app import db
+from app.services import lead_service, sla_monitor as sla_module
+from app.services.sla_monitor import SlaMonitor
+
+NOW = datetime(2026, 10, 18, 12, tzinfo=timezone.utc)
+
+
+def _lead(lead_id: str, age: timedelta, status: str = "new") -> dict:
+    stamp = (NOW - age).isoformat()
+    return {"id": lead_id, "listing_id": "listing-1", "status": status, "updated_at": stamp, "created_at": stamp}
+
+
+def _patch_client(monkeypatch, client, clock):
+    async def execute_async(query):
+        return query.execute()
+
+    async def get_client():
+        return client
+
+    monkeypatch.setattr(db, "execute_async", execute_async)
+    monkeypatch.setattr(db, "settings", dataclasses.replace(db.settings, supabase_page_size=2))
+    monkeypatch.setattr(sla_module, "get_async_service_client", get_client)
+    monkeypatch.setattr(lead_service, "get_async_service_client", get_client)
+    monkeypatch.setattr(sla_module, "_now", lambda: clock[0])
+    monkeypatch.setattr(lead_service, "_now", lambda: clock[0])
+    monkeypatch.setattr(sla_module, "settings", dataclasses.replace(sla_module.settings, supabase_page_size=2))
+
+
+def test_sla_monitor_scans_incrementally_and_pages(monkeypatch, fake_client):
+    bulk = timedelta(hours=5)
+    client = fake_client(
+        {
+            "leads": [
+                _lead("a", bulk),
+                _lead("b", bulk),
+                _lead("c", bulk),
+                _lead("d", timedelta(hours=2)),
+                _lead("e", timedelta(minutes=30)),
+                _lead("f", timedelta(hours=9), status="won"),
+            ]
+        }
+    )
+    clock = [NOW]
+    _patch_client(monkeypatch, client, clock)
+    monitor = SlaMonitor([90], interval_seconds=60, full_scan_seconds=86400)
+    monkeypatch.setattr(lead_service, "sla_monitor", monitor)
+
+    asyncio.run(monitor.refresh())
+    report = asyncio.run(lead_service.sla_report(90, 0, 2, None))
+    assert report["total"] == 4
+    assert [row["id"] for row in report["breached"]] == ["a", "b"]
+    report = asyncio.run(lead_service.sla_report(90, 2, 10, None))
+    assert [row["id"] for row in report["breached"]] == ["c", "d"]
+
+    # "a" is won, "b" touched and "g" created; an hour later "e" is overdue too.
+    rows = {row["id"]: row for row in client.tables["leads"]}
+    rows["a"].update(status="won", updated_at=NOW.isoformat())
+    rows["b"].update(updated_at=NOW.isoformat())
+    client.tables["leads"].append(_lead("g", timedelta(minutes=-1)))
+    client.calls.clear()
+    clock[0] = NOW + timedelta(minutes=70)
+    asyncio.run(monitor.refresh())
+
+    report = asyncio.run(lead_service.sla_report(90, 0, 10, None))
+    assert [row["id"] for row in report["breached"]] == ["c", "d", "e"]
+    assert len(monitor.snapshot.rows) == 5
+    delta = asyncio.run(lead_service.sla_report(90, 0, 10, NOW))
+    assert [row["id"] for row in delta["breached"]] == ["e"]
+    assert sorted(delta["resolved"]) == ["a", "b"]
+    assert asyncio.run(lead_service.sla_report(60, 0, 10, NOW))["resolved"] is None
+    # Only the changed rows (plus the overlap) were read, not the whole table.
+    assert client.calls.count(("leads", "select")) == 3
+
+
+def test_sla_monitor_drops_deleted_leads_on_incremental_scans(monkeypatch, fake_client):
+    client = fake_client({"leads": [_lead(lead_id, timedelta(hours=3)) for lead_id in "abcd"]})
+    clock = [NOW]
+    _patch_client(monkeypatch, client, clock)
+    monitor = SlaMonitor([90], interval_seconds=60, full_scan_seconds=86400)
+    asyncio.run(monitor.refresh())
+    assert [row["id"] for row in monitor.snapshot.rows] == ["a", "b", "c", "d"]
+
+    # "a" is soft deleted; "b" is hard deleted and only leaves a tombstone.
+    later = NOW + timedelta(minutes=5)
+    rows = {row["id"]: row for row in client.tables["leads"]}
+    rows["a"].update(deleted_at=later.isoformat(), updated_at=later.isoformat())
+    client.tables["leads"].remove(rows["b"])
+    client.tables["lead_deletions"] = [{"lead_id": "b", "deleted_at": later.isoformat()}]
+    clock[0] = NOW + timedelta(minutes=10)
+    asyncio.run(monitor.refresh())
+
+    assert [row["id"] for row in monitor.snapshot.rows] == ["c", "d"]
+
+
+def test_sla_report_fallback_pages_past_the_row_limit(monkeypatch, fake_client):
+    leads = [_lead(f"lead-{index}", timedelta(hours=3)) for index in range(5)]
+    leads.append(_lead("recent", timedelta(minutes=10)))
+    leads.append({**_lead("deleted", timedelta(hours=4)), "deleted_at": NOW.isoformat()})
+    client = fake_client({"leads": leads})
+    _patch_client(monkeypatch, client, [NOW])
+    monkeypatch.setattr(lead_service, "sla_monitor", SlaMonitor([90], interval_seconds=60, full_scan_seconds=86400))
+
+    report = asyncio.run(lead_service.sla_report(90, 0, 10, None))
+    assert report["total"] == 5 and report["resolved"] is None
+    assert [row["id"] for row in report["breached"]] == [f"lead-{index}" for index in range(5)]
+    # Page size 2: every page was bounded, so nothing was cut at the row limit.
+    assert client.calls.count(("leads", "select")) >= 3
+    assert asyncio.run(lead_service.sla_report(90, 0, 10, NOW - timedelta(minutes=60)))["total"] == 0
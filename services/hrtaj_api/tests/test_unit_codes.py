@@ -0,0 +1,20 @@
+import dataclasses
+
+from app.services import unit_codes
+
+
+def test_allocate_unit_codes_draws_from_reserved_blocks(monkeypatch, fake_client):
+    monkeypatch.setattr(unit_codes, "settings", dataclasses.replace(unit_codes.settings, unit_code_block_size=3))
+    client = fake_client()
+
+    first = unit_codes.allocate_unit_codes(client, "HR", 2)
+    second = unit_codes.allocate_unit_codes(client, "HR", 2)
+    large = unit_codes.allocate_unit_codes(client, "HR", 5)
+    other = unit_codes.allocate_unit_codes(client, "PR", 1)
+
+    assert first == ["HR-0000001", "HR-0000002"]
+    assert second == ["HR-0000003", "HR-0000004"]
+    assert large == [unit_codes.format_unit_code("HR", value) for value in range(5, 10)]
+    assert other == ["PR-0000001"]
+    assert client.calls == [("reserve_unit_code_block", "rpc")] * 4
+    assert unit_codes.allocate_unit_codes(client, "HR", 0) == []
@@ -0,0 +1,42 @@
+-- Normalized owner phone on resale intake for duplicate detection
+
+-- Mirrors normalizeEgyptPhone in src/lib/phone.ts
+create or replace function public.normalize_egypt_phone(raw text)
+returns text
+language plpgsql
+immutable
+as $$
+declare
+  cleaned text;
+begin
+  cleaned := translate(btrim(coalesce(raw, '')), '٠١٢٣٤٥٦٧٨٩۰۱۲۳۴۵۶۷۸۹', '01234567890123456789');
+  cleaned := regexp_replace(cleaned, '[^0-9+]', '', 'g');
+  if cleaned = '' then
+    return null;
+  end if;
+  if left(cleaned, 1) = '+' then
+    cleaned := substr(cleaned, 2);
+  end if;
+  if left(cleaned, 2) = '00' then
+    cleaned := substr(cleaned, 3);
+  end if;
+  if left(cleaned, 1) = '0' then
+    cleaned := '20' || substr(cleaned, 2);
+  elsif length(cleaned) = 10 then
+    cleaned := '20' || cleaned;
+  end if;
+  if length(cleaned) < 11 then
+    return null;
+  end if;
+  return '+' || cleaned;
+end;
+$$;
+
+alter table public.resale_intake add column if not exists owner_phone_e164 text;
+
+update public.resale_intake
+set owner_phone_e164 = public.normalize_egypt_phone(owner_phone)
+where owner_phone_e164 is null and owner_phone is not null;
+
+create index if not exists resale_intake_owner_phone_e164_idx
+  on public.resale_intake(owner_phone_e164);
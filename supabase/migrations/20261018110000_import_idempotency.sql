@@ -0,0 +1,23 @@
+-- Idempotent re-imports: whole-file hashes and per-row fingerprints
+
+create table if not exists public.import_files (
+  id uuid primary key default gen_random_uuid(),
+  kind text not null,
+  sha256 text not null,
+  options_hash text not null,
+  filename text null,
+  report jsonb not null,
+  created_at timestamptz not null default now(),
+  updated_at timestamptz not null default now(),
+  unique (kind, sha256, options_hash)
+);
+
+alter table public.import_files enable row level security;
+
+drop policy if exists "Import files select by admin" on public.import_files;
+create policy "Import files select by admin"
+  on public.import_files for select
+  using (public.is_admin());
+
+-- Hash of the normalized listing + intake payload last written for the row
+alter table public.resale_intake add column if not exists row_fingerprint text;
@@ -0,0 +1,41 @@
+-- Block-allocated unit codes for imports
+
+create table if not exists public.unit_code_counters (
+  prefix text primary key,
+  next_value bigint not null default 1,
+  updated_at timestamptz not null default now()
+);
+
+alter table public.unit_code_counters enable row level security;
+
+-- Reserves block_size consecutive values for prefix and returns the first.
+-- The row lock taken by the update makes concurrent reservations disjoint.
+create or replace function public.reserve_unit_code_block(code_prefix text, block_size integer)
+returns bigint
+language plpgsql
+security definer
+set search_path = public
+as $$
+declare
+  block_end bigint;
+begin
+  if block_size is null or block_size < 1 then
+    raise exception 'block_size must be positive';
+  end if;
+
+  insert into public.unit_code_counters (prefix)
+  values (code_prefix)
+  on conflict (prefix) do nothing;
+
+  update public.unit_code_counters
+  set next_value = next_value + block_size,
+      updated_at = now()
+  where prefix = code_prefix
+  returning next_value into block_end;
+
+  return block_end - block_size;
+end;
+$$;
+
+revoke all on function public.reserve_unit_code_block(text, integer) from public, anon, authenticated;
+grant execute on function public.reserve_unit_code_block(text, integer) to service_role;
@@ -0,0 +1,3 @@
+-- Keyset scans of leads by (updated_at, id) for the API's SLA monitor
+
+create index if not exists leads_updated_at_id_idx on public.leads(updated_at, id);
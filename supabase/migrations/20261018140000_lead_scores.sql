@@ -0,0 +1,94 @@
+-- Persisted lead scores, refreshed by the API for leads whose inputs changed
+
+alter table public.leads add column if not exists score integer;
+alter table public.leads add column if not exists score_label text;
+alter table public.leads add column if not exists score_next_action text;
+-- updated_at of the lead when it was scored; a later updated_at means the score is stale.
+alter table public.leads add column if not exists scored_at timestamptz;
+-- Next time the score drops because of the lead's age (24h / 7d), null once it no longer can.
+alter table public.leads add column if not exists score_expires_at timestamptz;
+alter table public.leads add column if not exists score_stale boolean
+  generated always as (scored_at is null or updated_at > scored_at) stored;
+
+create index if not exists leads_score_stale_idx on public.leads(id) where score_stale;
+create index if not exists leads_score_expires_at_idx on public.leads(score_expires_at)
+  where score_expires_at is not null;
+create index if not exists leads_score_label_idx on public.leads(score_label);
+
+-- Writing only score columns must not look like lead activity: keep updated_at
+-- and updated_by as they were. Named to fire after leads_set_updated_at and
+-- leads_set_actor_fields (same-event triggers run in name order).
+create or replace function public.leads_keep_timestamps_on_score_write()
+returns trigger
+language plpgsql
+as $$
+declare
+  score_columns text[] := array[
+    'score', 'score_label', 'score_next_action', 'scored_at', 'score_expires_at', 'score_stale',
+    'updated_at', 'updated_by'
+  ];
+begin
+  if (to_jsonb(new) - score_columns) = (to_jsonb(old) - score_columns) then
+    new.updated_at := old.updated_at;
+    new.updated_by := old.updated_by;
+  end if;
+  return new;
+end;
+$$;
+
+drop trigger if exists leads_zz_keep_timestamps_on_score_write on public.leads;
+create trigger leads_zz_keep_timestamps_on_score_write
+before update on public.leads
+for each row execute function public.leads_keep_timestamps_on_score_write();
+
+-- A listing price change affects the score of every lead on the listing.
+create or replace function public.listings_invalidate_lead_scores()
+returns trigger
+language plpgsql
+security definer
+set search_path = public
+as $$
+begin
+  update public.leads set scored_at = null where listing_id = new.id and scored_at is not null;
+  return new;
+end;
+$$;
+
+drop trigger if exists listings_invalidate_lead_scores on public.listings;
+create trigger listings_invalidate_lead_scores
+after update of price on public.listings
+for each row
+when (old.price is distinct from new.price)
+execute function public.listings_invalidate_lead_scores();
+
+create or replace function public.apply_lead_scores(scores jsonb)
+returns integer
+language plpgsql
+security definer
+set search_path = public
+as $$
+declare
+  written integer;
+begin
+  update public.leads l
+  set score = s.score,
+      score_label = s.score_label,
+      score_next_action = s.score_next_action,
+      scored_at = s.scored_at,
+      score_expires_at = s.score_expires_at
+  from jsonb_to_recordset(scores) as s(
+    id uuid,
+    score integer,
+    score_label text,
+    score_next_action text,
+    scored_at timestamptz,
+    score_expires_at timestamptz
+  )
+  where l.id = s.id;
+  get diagnostics written = row_count;
+  return written;
+end;
+$$;
+
+revoke all on function public.apply_lead_scores(jsonb) from public, anon, authenticated;
+grant execute on function public.apply_lead_scores(jsonb) to service_role;
@@ -0,0 +1,126 @@
+-- Per-day lead counts by status and source, kept current by statement triggers
+
+create table if not exists public.lead_daily_rollups (
+  day date not null,
+  status text not null,
+  source text not null default '',
+  leads bigint not null default 0,
+  updated_at timestamptz not null default now(),
+  primary key (day, status, source)
+);
+
+alter table public.lead_daily_rollups enable row level security;
+
+-- Adds the net change of a statement to the rollups. Day is the UTC day of
+-- created_at; a missing source is stored as ''.
+create or replace function public.apply_lead_rollup_deltas(deltas jsonb)
+returns void
+language plpgsql
+security definer
+set search_path = public
+as $$
+begin
+  insert into public.lead_daily_rollups as r (day, status, source, leads)
+  select d.day, d.status, d.source, d.delta
+  from jsonb_to_recordset(deltas) as d(day date, status text, source text, delta bigint)
+  order by d.day, d.status, d.source
+  on conflict (day, status, source) do update
+  set leads = r.leads + excluded.leads,
+      updated_at = now();
+end;
+$$;
+
+create or replace function public.leads_rollup_statement()
+returns trigger
+language plpgsql
+security definer
+set search_path = public
+as $$
+declare
+  deltas jsonb;
+begin
+  if TG_OP = 'INSERT' then
+    select jsonb_agg(d) into deltas from (
+      select (created_at at time zone 'utc')::date as day, status::text as status,
+             coalesce(source, '') as source, count(*) as delta
+      from new_rows group by 1, 2, 3
+    ) d;
+  elsif TG_OP = 'DELETE' then
+    select jsonb_agg(d) into deltas from (
+      select (created_at at time zone 'utc')::date as day, status::text as status,
+             coalesce(source, '') as source, -count(*) as delta
+      from old_rows group by 1, 2, 3
+    ) d;
+  else
+    -- Most updates (notes, assignment, scores) leave every key unchanged and
+    -- net out to nothing here.
+    select jsonb_agg(d) into deltas from (
+      select day, status, source, sum(delta) as delta
+      from (
+        select (created_at at time zone 'utc')::date as day, status::text as status,
+               coalesce(source, '') as source, 1 as delta
+        from new_rows
+        union all
+        select (created_at at time zone 'utc')::date, status::text, coalesce(source, ''), -1
+        from old_rows
+      ) changes
+      group by 1, 2, 3
+      having sum(delta) <> 0
+    ) d;
+  end if;
+
+  if deltas is not null then
+    perform public.apply_lead_rollup_deltas(deltas);
+  end if;
+  return null;
+end;
+$$;
+
+drop trigger if exists leads_rollup_insert on public.leads;
+create trigger leads_rollup_insert
+after insert on public.leads
+referencing new table as new_rows
+for each statement execute function public.leads_rollup_statement();
+
+drop trigger if exists leads_rollup_update on public.leads;
+create trigger leads_rollup_update
+after update on public.leads
+referencing old table as old_rows new table as new_rows
+for each statement execute function public.leads_rollup_statement();
+
+drop trigger if exists leads_rollup_delete on public.leads;
+create trigger leads_rollup_delete
+after delete on public.leads
+referencing old table as old_rows
+for each statement execute function public.leads_rollup_statement();
+
+-- Recomputes the rollups from from_day on; used for the backfill below and to
+-- reconcile if rows were ever changed with triggers disabled.
+create or replace function public.rebuild_lead_daily_rollups(from_day date default null)
+returns integer
+language plpgsql
+security definer
+set search_path = public
+as $$
+declare
+  written integer;
+begin
+  lock table public.leads in share row exclusive mode;
+  delete from public.lead_daily_rollups where from_day is null or day >= from_day;
+  insert into public.lead_daily_rollups (day, status, source, leads)
+  select (created_at at time zone 'utc')::date, status::text, coalesce(source, ''), count(*)
+  from public.leads
+  where from_day is null or created_at >= (from_day::timestamp at time zone 'utc')
+  group by 1, 2, 3;
+  get diagnostics written = row_count;
+  return written;
+end;
+$$;
+
+select public.rebuild_lead_daily_rollups();
+
+revoke all on function public.apply_lead_rollup_deltas(jsonb) from public, anon, authenticated;
+revoke all on function public.rebuild_lead_daily_rollups(date) from public, anon, authenticated;
+grant execute on function public.rebuild_lead_daily_rollups(date) to service_role;
+revoke all on public.lead_daily_rollups from public, anon, authenticated;
+grant select on public.lead_daily_rollups to service_role;
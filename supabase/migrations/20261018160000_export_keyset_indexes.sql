@@ -0,0 +1,5 @@
+-- Keyset indexes for the API's streaming exports (ordered by created_at, then the primary key)
+
+create index if not exists leads_created_at_id_idx on public.leads(created_at, id);
+create index if not exists listings_created_at_id_idx on public.listings(created_at, id);
+create index if not exists resale_intake_created_at_listing_id_idx on public.resale_intake(created_at, listing_id);
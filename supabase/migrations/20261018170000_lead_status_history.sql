@@ -0,0 +1,57 @@
+-- Lead status transitions, for funnel, time-in-stage and cohort analytics
+
+create table if not exists public.lead_status_history (
+  id uuid primary key default gen_random_uuid(),
+  lead_id uuid not null references public.leads(id) on delete cascade,
+  status text not null,
+  entered_at timestamptz not null default now(),
+  -- Rows reconstructed from the lead's current state when this table was
+  -- created; they carry no reliable durations.
+  backfilled boolean not null default false
+);
+
+create index if not exists lead_status_history_lead_idx on public.lead_status_history(lead_id, entered_at);
+create index if not exists lead_status_history_entered_idx on public.lead_status_history(entered_at, id);
+
+alter table public.lead_status_history enable row level security;
+
+create or replace function public.leads_record_status_history()
+returns trigger
+language plpgsql
+security definer
+set search_path = public
+as $$
+begin
+  if TG_OP = 'INSERT' then
+    insert into public.lead_status_history (lead_id, status, entered_at)
+    values (new.id, new.status::text, new.created_at);
+  elsif new.status is distinct from old.status then
+    insert into public.lead_status_history (lead_id, status, entered_at)
+    values (new.id, new.status::text, now());
+  end if;
+  return null;
+end;
+$$;
+
+drop trigger if exists leads_record_status_history on public.leads;
+create trigger leads_record_status_history
+after insert or update of status on public.leads
+for each row execute function public.leads_record_status_history();
+
+-- Backfill: every existing lead entered 'new' when created and its current
+-- status at its last update.
+insert into public.lead_status_history (lead_id, status, entered_at, backfilled)
+select l.id, 'new', l.created_at, true
+from public.leads l
+where not exists (select 1 from public.lead_status_history h where h.lead_id = l.id);
+
+insert into public.lead_status_history (lead_id, status, entered_at, backfilled)
+select l.id, l.status::text, greatest(l.updated_at, l.created_at), true
+from public.leads l
+where l.status::text <> 'new'
+  and not exists (
+    select 1 from public.lead_status_history h where h.lead_id = l.id and h.status = l.status::text
+  );
+
+revoke all on public.lead_status_history from public, anon, authenticated;
+grant select on public.lead_status_history to service_role;
@@ -0,0 +1,24 @@
+-- Keep resale_intake.owner_phone_e164 current for every writer (staff UI
+-- included), not just the importer
+
+create or replace function public.resale_intake_set_owner_phone_e164()
+returns trigger
+language plpgsql
+security definer
+set search_path = public
+as $$
+begin
+  new.owner_phone_e164 := public.normalize_egypt_phone(new.owner_phone);
+  return new;
+end;
+$$;
+
+drop trigger if exists resale_intake_set_owner_phone_e164 on public.resale_intake;
+create trigger resale_intake_set_owner_phone_e164
+before insert or update of owner_phone, owner_phone_e164 on public.resale_intake
+for each row execute function public.resale_intake_set_owner_phone_e164();
+
+-- Rows written without the key since 20261018100000.
+update public.resale_intake
+set owner_phone_e164 = public.normalize_egypt_phone(owner_phone)
+where owner_phone_e164 is distinct from public.normalize_egypt_phone(owner_phone);
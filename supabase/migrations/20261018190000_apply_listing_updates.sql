@@ -0,0 +1,45 @@
+-- Batched UPDATEs of existing listings for imports. An upsert (INSERT ... ON
+-- CONFLICT) would fire insert triggers and RLS insert checks and need every
+-- NOT NULL column in the payload; this only sets the columns each row carries,
+-- like the row-at-a-time updates it batches.
+
+-- Every element of `rows` must have the same keys (the importer groups rows
+-- that way); `id` identifies the listing and is never updated. Returns the
+-- number of listings updated.
+create or replace function public.apply_listing_updates(rows jsonb)
+returns integer
+language plpgsql
+security definer
+set search_path = public
+as $$
+declare
+  assignments text;
+  updated integer;
+begin
+  if rows is null or jsonb_typeof(rows) <> 'array' or jsonb_array_length(rows) = 0 then
+    return 0;
+  end if;
+
+  select string_agg(format('%I = r.%I', c.column_name, c.column_name), ', ')
+  into assignments
+  from information_schema.columns c
+  where c.table_schema = 'public'
+    and c.table_name = 'listings'
+    and c.column_name <> 'id'
+    and c.is_generated = 'NEVER'
+    and rows -> 0 ? c.column_name;
+  if assignments is null then
+    return 0;
+  end if;
+
+  execute format(
+    'update public.listings t set %s from jsonb_populate_recordset(null::public.listings, $1) r where t.id = r.id',
+    assignments
+  ) using rows;
+  get diagnostics updated = row_count;
+  return updated;
+end;
+$$;
+
+revoke all on function public.apply_listing_updates(jsonb) from public, anon, authenticated;
+grant execute on function public.apply_listing_updates(jsonb) to service_role;
@@ -0,0 +1,37 @@
+-- Tombstones for hard-deleted leads, so the SLA monitor's incremental scan
+-- (which only sees rows whose updated_at moved) can drop them without a full
+-- rescan. Soft deletes set deleted_at and updated_at and need no tombstone.
+
+create table if not exists public.lead_deletions (
+  lead_id uuid primary key,
+  deleted_at timestamptz not null default now()
+);
+
+create index if not exists lead_deletions_deleted_at_idx on public.lead_deletions(deleted_at, lead_id);
+
+alter table public.lead_deletions enable row level security;
+
+create or replace function public.leads_record_deletions()
+returns trigger
+language plpgsql
+security definer
+set search_path = public
+as $$
+begin
+  insert into public.lead_deletions (lead_id, deleted_at)
+  select id, now() from removed_rows
+  on conflict (lead_id) do update set deleted_at = excluded.deleted_at;
+  -- Readers only look back one incremental scan; a week is plenty.
+  delete from public.lead_deletions where deleted_at < now() - interval '7 days';
+  return null;
+end;
+$$;
+
+drop trigger if exists leads_record_deletions on public.leads;
+create trigger leads_record_deletions
+after delete on public.leads
+referencing old table as removed_rows
+for each statement execute function public.leads_record_deletions();
+
+revoke all on public.lead_deletions from public, anon, authenticated;
+grant select on public.lead_deletions to service_role;
@@ -0,0 +1,78 @@
+-- Block-allocated unit codes (PREFIX-0000001) share listings.unit_code with
+-- codes typed by staff, developers or price lists, which are only unique per
+-- project. Only the allocator format is unique across listings; the counters
+-- start past every existing code in that format and reservations skip any
+-- block that was claimed by hand in the meantime.
+
+do $$
+declare
+  duplicated text;
+begin
+  select string_agg(unit_code, ', ' order by unit_code) into duplicated
+  from (
+    select unit_code
+    from public.listings
+    where unit_code ~ '^[A-Z]+-[0-9]{7,}$'
+    group by unit_code
+    having count(*) > 1
+    limit 20
+  ) d;
+  if duplicated is not null then
+    raise exception 'generated unit codes are duplicated, resolve them before applying this migration: %', duplicated;
+  end if;
+end $$;
+
+create unique index if not exists listings_generated_unit_code_key
+  on public.listings(unit_code)
+  where unit_code ~ '^[A-Z]+-[0-9]{7,}$';
+
+insert into public.unit_code_counters (prefix, next_value)
+select substring(unit_code from '^([A-Z]+)-'), max(substring(unit_code from '([0-9]+)$')::bigint) + 1
+from public.listings
+where unit_code ~ '^[A-Z]+-[0-9]{7,}$'
+group by 1
+on conflict (prefix) do update
+set next_value = greatest(public.unit_code_counters.next_value, excluded.next_value),
+    updated_at = now();
+
+-- Reserves block_size consecutive values for prefix and returns the first.
+-- The row lock taken by the update makes concurrent reservations disjoint. A
+-- block in which a listing already uses a code is skipped for the next one.
+create or replace function public.reserve_unit_code_block(code_prefix text, block_size integer)
+returns bigint
+language plpgsql
+security definer
+set search_path = public
+as $$
+declare
+  block_end bigint;
+begin
+  if block_size is null or block_size < 1 then
+    raise exception 'block_size must be positive';
+  end if;
+
+  insert into public.unit_code_counters (prefix)
+  values (code_prefix)
+  on conflict (prefix) do nothing;
+
+  loop
+    update public.unit_code_counters
+    set next_value = next_value + block_size,
+        updated_at = now()
+    where prefix = code_prefix
+    returning next_value into block_end;
+
+    if not exists (
+      select 1
+      from generate_series(block_end - block_size, block_end - 1) as value
+      join public.listings l
+        on l.unit_code = code_prefix || '-' || lpad(value::text, greatest(7, length(value::text)), '0')
+    ) then
+      return block_end - block_size;
+    end if;
+  end loop;
+end;
+$$;
+
+revoke all on function public.reserve_unit_code_block(text, integer) from public, anon, authenticated;
+grant execute on function public.reserve_unit_code_block(text, integer) to service_role;